@@ -0,0 +1,139 @@
+"""In-process solver API.
+
+Solves an instance dict and returns the solution dict, without any file I/O:
+
+    from dex_open_solver.api import solve
+
+    solution = solve(instance, 'token-pair', {'token_pair': ['T0', 'T1']})
+
+The solution is the same as the one written by `gp_match` for the same
+instance and options (except for the solver block).
+"""
+from copy import deepcopy
+from decimal import Decimal as D
+from fractions import Fraction as F
+
+from .core.config import Config
+from .core.context import SolveContext
+
+# Options accepted in the config of each mode, as named on the command line.
+FEE_OPTIONS = {'min_avg_fee_per_order', 'min_abs_fee_per_order'}
+MODE_OPTIONS = {
+    'token-pair': FEE_OPTIONS | {'token_pair', 'xrate', 'time_limit'},
+    'best-token-pair': FEE_OPTIONS | {'time_limit'}
+}
+
+
+def to_fraction(value):
+    """Convert a number, or its string representation, to a Fraction."""
+    return F(str(value))
+
+
+def check_options(mode, options):
+    """Check the mode and the options dict of a solve (see `solve`).
+
+    Raises:
+        ValueError: If the mode or an option is unknown, the token pair is
+            missing, or an option value is invalid.
+    """
+    if mode not in MODE_OPTIONS:
+        raise ValueError(f"Unknown mode '{mode}'.")
+    unknown_options = set(options.keys()) - MODE_OPTIONS[mode]
+    if unknown_options:
+        raise ValueError(
+            f"Unknown {mode} options: {', '.join(sorted(unknown_options))}."
+        )
+
+    if mode == 'token-pair':
+        token_pair = options.get('token_pair')
+        if token_pair is None:
+            raise ValueError("Missing token_pair for token-pair mode.")
+        if not isinstance(token_pair, (list, tuple)) or len(token_pair) != 2 \
+                or not all(isinstance(token, str) for token in token_pair):
+            raise ValueError(f"Invalid token_pair {token_pair!r}.")
+
+    time_limit = options.get('time_limit')
+    if time_limit is not None and (
+        isinstance(time_limit, bool)
+        or not isinstance(time_limit, (int, float, D))
+    ):
+        raise ValueError(f"Invalid time_limit {time_limit!r}.")
+
+    for name in ['xrate', 'min_avg_fee_per_order', 'min_abs_fee_per_order']:
+        if options.get(name) is not None:
+            to_fraction(options[name])
+
+
+def solver_config(options):
+    """Return the SolverConfig with the economic viability options given."""
+    min_avg_fee_per_order = to_fraction(options.get('min_avg_fee_per_order', 0))
+    min_abs_fee_per_order = options.get('min_abs_fee_per_order')
+    if min_abs_fee_per_order is None:
+        min_abs_fee_per_order = min_avg_fee_per_order
+    return Config.snapshot(
+        MIN_AVERAGE_ORDER_FEE=min_avg_fee_per_order,
+        MIN_ABSOLUTE_ORDER_FEE=to_fraction(min_abs_fee_per_order)
+    )
+
+
+def solve(instance, mode, config=None, observer=None):
+    """Solve an instance dict and return the solution dict.
+
+    Args:
+        instance: The instance, as loaded from json (with floats parsed
+            as Decimal, as the command line does). It is not modified.
+        mode: 'token-pair' or 'best-token-pair'.
+        config: Dict of solver options, named as the command line options:
+            token_pair (required in token-pair mode), xrate, time_limit,
+            min_avg_fee_per_order, min_abs_fee_per_order.
+        observer: Callable called with the events of the solve (see
+            core.events).
+
+    Raises:
+        ValueError: If the mode or a config option is unknown, the token
+            pair is missing, or an option value is invalid (see
+            `check_options`).
+    """
+    # The solvers integrate the solution into the instance.
+    return solve_instance(deepcopy(instance), mode, config, observer)
+
+
+def solve_instance(instance, mode, config=None, observer=None):
+    """Same as `solve`, but the solution is integrated into the instance,
+    which is modified (this saves copying it if it is not needed anymore).
+    """
+    options = dict(config or {})
+    check_options(mode, options)
+    time_limit = options.get('time_limit')
+    if time_limit is not None:
+        time_limit = float(time_limit)
+
+    # Each solve gets its own parameters and context, so that solves can run
+    # concurrently.
+    config = solver_config(options)
+    context = SolveContext.create(observer=observer)
+
+    if isinstance(instance['fee']['ratio'], float):
+        instance['fee']['ratio'] = D(str(instance['fee']['ratio']))
+
+    if mode == 'token-pair':
+        from .token_pair_solver.solver import \
+            solve_instance as solve_token_pair_instance
+
+        xrate = options.get('xrate')
+        return solve_token_pair_instance(
+            instance,
+            tuple(options['token_pair']),
+            xrate=None if xrate is None else to_fraction(xrate),
+            time_limit=time_limit,
+            config=config,
+            context=context
+        )
+    else:
+        from .best_token_pair_solver.solver import \
+            solve_instance as solve_best_token_pair_instance
+
+        return solve_best_token_pair_instance(
+            instance, time_limit=time_limit, config=config,
+            context=context
+        )
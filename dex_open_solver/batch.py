@@ -0,0 +1,173 @@
+"""Solve many instances in one process.
+
+Instances are read as JSON Lines, one instance per line, and solutions are
+written as JSON Lines, in the same order:
+
+    gp_match batch best-token-pair instances.jsonl --output solutions.jsonl
+
+Solver options are given on the command line, and apply to every instance.
+A line can also be a request object, as posted to `gp_match serve`, whose
+options override the command line ones:
+
+    {"instance": {...}, "token_pair": ["T0000", "T0001"]}
+
+If an instance can not be solved, its line in the output is an object with
+the error instead: {"error": "..."}.
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from collections import deque
+from decimal import Decimal as D
+from importlib import import_module
+
+from .api import MODE_OPTIONS, solve_instance
+from .core.util import open_file, setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def solve_line(line, mode, options):
+    """Solve the instance (or request) of a line, and return the solution
+    (or error) line.
+    """
+    try:
+        request = json.loads(line, parse_float=D)
+        if 'instance' in request:
+            instance = request.pop('instance')
+            options = dict(options, **request)
+        else:
+            instance = request
+        solution = solve_instance(instance, mode, options)
+    except Exception as e:
+        logger.exception("Could not solve instance.")
+        solution = {'error': repr(e)}
+    return json.dumps(solution, separators=(',', ':')) + '\n'
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog='gp_match batch',
+        description="Solve instances read as JSON Lines."
+    )
+    parser.add_argument(
+        'mode',
+        choices=sorted(MODE_OPTIONS.keys()),
+        help="Solver to run on every instance."
+    )
+    parser.add_argument(
+        'instances',
+        type=str,
+        nargs='?',
+        default='-',
+        help="File containing one instance per line "
+             "(possibly compressed: .gz, .bz2 or .xz). Reads stdin by default."
+    )
+    parser.add_argument(
+        '--output',
+        type=str,
+        default='-',
+        help="File where the solutions should be output to, one per line. "
+             "Writes to stdout by default."
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help="Number of worker processes solving instances."
+    )
+    parser.add_argument(
+        '--token-pair',
+        type=str,
+        nargs=2,
+        default=None,
+        help="Token pair to match (token-pair mode)."
+    )
+    parser.add_argument(
+        '--xrate',
+        type=str,
+        default=None,
+        help="Exchange rate to use (token-pair mode, optional)."
+    )
+    parser.add_argument(
+        '--time-limit',
+        type=int,
+        default=None,
+        help="Maximum time for solving each instance, in seconds."
+    )
+    parser.add_argument(
+        '--min-avg-fee-per-order',
+        type=str,
+        default=None,
+        help="Minimum average fee payed per order on an admissible solution."
+    )
+    parser.add_argument(
+        '--min-abs-fee-per-order',
+        type=str,
+        default=None,
+        help="Minimum absolute fee payed per order (not selling the "
+        "fee token) on an admissible solution."
+    )
+    parser.add_argument(
+        '--logging',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        default='INFO',
+        type=str,
+        help="Logging level."
+    )
+    args = parser.parse_args(argv)
+
+    setup_logging(args.logging)
+
+    options = {
+        option: getattr(args, option) for option in MODE_OPTIONS[args.mode]
+        if getattr(args, option) is not None
+    }
+
+    # Import the solvers once, before any worker process is started.
+    import_module('dex_open_solver.token_pair_solver.solver')
+    import_module('dex_open_solver.best_token_pair_solver.solver')
+
+    input_fd = sys.stdin if args.instances == '-' else open_file(args.instances)
+    output_fd = sys.stdout if args.output == '-' else open_file(args.output, 'w')
+
+    start_time = time.time()
+    lines = (line for line in input_fd if line.strip())
+    nr_instances = 0
+    try:
+        if args.workers > 1:
+            from multiprocessing import Pool
+
+            # Solutions are written in input order. Only a few lines are
+            # read ahead, so that the input is not loaded all at once.
+            with Pool(args.workers) as pool:
+                pending = deque()
+                for line in lines:
+                    pending.append(pool.apply_async(
+                        solve_line, (line, args.mode, options)
+                    ))
+                    if len(pending) > 2 * args.workers:
+                        output_fd.write(pending.popleft().get())
+                        nr_instances += 1
+                while pending:
+                    output_fd.write(pending.popleft().get())
+                    nr_instances += 1
+        else:
+            for line in lines:
+                output_fd.write(solve_line(line, args.mode, options))
+                nr_instances += 1
+    finally:
+        if input_fd is not sys.stdin:
+            input_fd.close()
+        if output_fd is not sys.stdout:
+            output_fd.close()
+        else:
+            output_fd.flush()
+
+    runtime = time.time() - start_time
+    logger.info(
+        "Solved %d instances in %.3fs (%.2f instances/s).",
+        nr_instances, runtime, nr_instances / runtime if runtime > 0 else 0
+    )
@@ -0,0 +1,131 @@
+"""Checkpoints of time-limited best-token-pair runs.
+
+A checkpoint records the token pairs already matched and the best solution
+found so far (the incumbent), so that a follow-up run on the same instance
+only matches the remaining token pairs. Token pairs are matched in an order
+given by a seed, which is recorded as well, so that runs are reproducible.
+
+A checkpoint records the digest of its instance (see `api.instance_digest`)
+and its shard (if any), and is ignored by runs on other instances or shards.
+"""
+import json
+import logging
+import os
+from collections import namedtuple
+from copy import deepcopy
+
+from ..core.order import parse_amount
+from ..core.orderbook import compute_objective_of_touched_orders
+from ..core.validation import validate
+
+logger = logging.getLogger(__name__)
+
+Checkpoint = namedtuple('Checkpoint', [
+    'seed',
+    'instance_digest',
+    'shard',
+    'evaluated_token_pairs',
+    'objective',
+    'solution'
+])
+
+
+def load_checkpoint(
+    filename, instance_digest, shard, accounts, orders, fee, config
+):
+    """Load a checkpoint, if it exists and is of the instance with the given
+    digest, and of the given shard (k, n), or None.
+
+    The solution is restored from the orders loaded from the instance (see
+    `restore_solution`), and the checkpoint is ignored unless the solution is
+    valid and has the objective recorded.
+    """
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'r') as fd:
+        checkpoint_dict = json.load(fd)
+    if checkpoint_dict.get('instance_digest') != instance_digest:
+        logger.warning(
+            "Ignoring checkpoint '%s' of another instance.", filename
+        )
+        return None
+    stored_shard = checkpoint_dict.get('shard')
+    if stored_shard is not None:
+        stored_shard = tuple(stored_shard)
+    if stored_shard != shard:
+        logger.warning(
+            "Ignoring checkpoint '%s' of another shard.", filename
+        )
+        return None
+
+    objective = parse_amount(checkpoint_dict['objective'])
+    try:
+        solution = restore_solution(checkpoint_dict['solution'], orders)
+        solution_orders, prices = solution
+        validate(accounts, solution_orders, prices, fee, config=config)
+        assert compute_objective_of_touched_orders(
+            prices, accounts, solution_orders, fee
+        ) == objective
+    except (AssertionError, KeyError):
+        logger.warning(
+            "Ignoring checkpoint '%s' with an invalid solution.", filename
+        )
+        return None
+
+    return Checkpoint(
+        seed=checkpoint_dict['seed'],
+        instance_digest=instance_digest,
+        shard=shard,
+        evaluated_token_pairs=[
+            tuple(token_pair)
+            for token_pair in checkpoint_dict['evaluated_token_pairs']
+        ],
+        objective=objective,
+        solution=solution
+    )
+
+
+def write_checkpoint(filename, checkpoint):
+    """Write a checkpoint, replacing the previous one atomically."""
+    orders, prices = checkpoint.solution
+    checkpoint_dict = {
+        'seed': checkpoint.seed,
+        'instance_digest': checkpoint.instance_digest,
+        'shard': checkpoint.shard,
+        'evaluated_token_pairs': checkpoint.evaluated_token_pairs,
+        'objective': str(checkpoint.objective),
+        'solution': {
+            'orders': [
+                [order.id, str(order.buy_amount), str(order.sell_amount)]
+                for order in orders
+            ],
+            'prices': {
+                token: None if price is None else str(price)
+                for token, price in prices.items()
+            }
+        }
+    }
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'w') as fd:
+        json.dump(checkpoint_dict, fd)
+    os.replace(temp_filename, filename)
+
+
+def restore_solution(stored_solution, orders):
+    """Return the (orders, prices) solution as stored in a checkpoint.
+
+    The orders of the solution are copies of the orders loaded from the
+    instance (with ids as stored), with the stored buy and sell amounts.
+    """
+    orders_by_id = {order.id: order for order in orders}
+    solution_orders = []
+    for id, buy_amount, sell_amount in stored_solution['orders']:
+        order = deepcopy(orders_by_id[id])
+        order.buy_amount = parse_amount(buy_amount)
+        order.sell_amount = parse_amount(sell_amount)
+        solution_orders.append(order)
+    prices = {
+        token: None if price is None else parse_amount(price)
+        for token, price in stored_solution['prices'].items()
+    }
+    return solution_orders, prices
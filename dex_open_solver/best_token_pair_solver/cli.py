@@ -0,0 +1,55 @@
+"""Command line interface for the best-token-pair subcommand.
+
+Kept apart from the solver module so that setting up the argument parser
+does not import the solver.
+"""
+import argparse
+
+
+def shard(value):
+    """Parse a shard 'K/N' as (K, N), for 1 <= K <= N."""
+    try:
+        k, n = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard '{value}', not K/N")
+    if not 1 <= k <= n:
+        raise argparse.ArgumentTypeError(
+            f"invalid shard '{value}', K must be between 1 and N"
+        )
+    return (k, n)
+
+
+def main(args):
+    from .solver import main
+    return main(args)
+
+
+def setup_arg_parser(subparsers):
+    parser = subparsers.add_parser(
+        'best-token-pair',
+        help="Matches orders on the token pair that leads to higher objective."
+    )
+
+    parser.add_argument(
+        '--shard',
+        type=shard,
+        default=None,
+        help="Only match the token pairs of shard K of N (given as K/N). "
+             "The solutions of all shards can be merged with `gp_match merge`."
+    )
+    parser.add_argument(
+        '--checkpoint',
+        type=str,
+        default=None,
+        help="File where the token pairs matched and the best solution are "
+             "saved. If it exists, only the remaining token pairs are matched."
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help="Seed of the order in which token pairs are matched "
+             "(the seed of the checkpoint takes precedence)."
+    )
+
+    parser.set_defaults(exec_subcommand=main)
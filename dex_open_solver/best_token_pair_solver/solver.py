@@ -1,23 +1,38 @@
-import json
 import logging
 import time
 from copy import deepcopy
-from decimal import Decimal as D
 from functools import reduce
-from random import shuffle
-
-from ..core.api import IntegerTraits, Stats, dump_solution, load_problem
-from ..core.orderbook import compute_objective, update_accounts
+from random import Random, randrange, shuffle
+
+from ..core.api import (IntegerTraits, Stats, build_solution, exit_status,
+                        instance_digest, load_instance_file, load_problem,
+                        write_solution)
+from ..core.config import Config
+from ..core.context import NULL_CONTEXT, Deadline, SolveContext
+from ..core.events import PAIR_FINISHED, PAIR_STARTED
+from ..core.orderbook import (compute_objective,
+                              compute_objective_of_touched_orders,
+                              update_accounts)
+from ..core.util import stopping_on_signals
 from ..token_pair_solver.solver import \
     solve_token_pair_and_fee_token_economic_viable
+from .checkpoint import Checkpoint, load_checkpoint, write_checkpoint
 
 logger = logging.getLogger(__name__)
 
 
 TRIVIAL_SOLUTION = ([], {})
 
+# Minimum time between checkpoint writes, in seconds.
+CHECKPOINT_INTERVAL = 1
+
+# Minimum time between incumbent solution notifications, in seconds.
+INCUMBENT_INTERVAL = 1
+
 
-def match_token_pair(token_pair, accounts, orders, fee):
+def match_token_pair(
+    token_pair, accounts, orders, fee, config=None, context=NULL_CONTEXT
+):
     b_buy_token, s_buy_token = token_pair
 
     b_orders = [
@@ -47,28 +62,32 @@ def match_token_pair(token_pair, accounts, orders, fee):
 
     # Find token pair + fee token matching.
     orders, prices = solve_token_pair_and_fee_token_economic_viable(
-        token_pair, accounts, b_orders, s_orders, f_orders, fee
+        token_pair, accounts, b_orders, s_orders, f_orders, fee, config=config,
+        context=context
     )
     return (orders, prices)
 
 
 def match_token_pair_and_evaluate(
-    token_pair, accounts, orders, fee, touched_only=False
+    token_pair, accounts, orders, fee, touched_only=False, config=None,
+    context=NULL_CONTEXT
 ):
     """If touched_only=true, then evaluate objective over touched orders only."""
 
     # Compute current token pair solution: buy/sell amounts and best prices.
-    orders, prices = match_token_pair(token_pair, accounts, orders, fee)
-
-    # Update accounts for current token pair solution.
-    accounts_updated = deepcopy(accounts)
-    update_accounts(accounts_updated, orders)
+    orders, prices = match_token_pair(
+        token_pair, accounts, orders, fee, config, context
+    )
 
     # Compute objective value for current token pair solution.
     if touched_only:
-        touched_orders = [o for o in orders if o.buy_amount > 0]
-        objective = compute_objective(prices, accounts_updated, touched_orders, fee)
+        objective = compute_objective_of_touched_orders(
+            prices, accounts, orders, fee
+        )
     else:
+        # Update accounts for current token pair solution.
+        accounts_updated = deepcopy(accounts)
+        update_accounts(accounts_updated, orders)
         objective = compute_objective(prices, accounts_updated, orders, fee)
 
     return (objective, (orders, prices))
@@ -94,60 +113,254 @@ def eligible_token_pairs(orders, fee_token):
         yield (fee_token, s_token)
 
 
-def main(args):
-    start_time = time.time()
+def shard_token_pairs(token_pairs, shard):
+    """Return the token pairs of a shard (k, n), for 1 <= k <= n.
 
-    # Load dict from json.
-    instance = json.load(args.instance, parse_float=D)
+    The n shards partition the token pairs. The partition only depends on
+    the set of token pairs (not on their order), so that shards solved
+    separately from the same instance do not overlap.
+    """
+    k, n = shard
+    return sorted(token_pairs)[k - 1::n]
+
+
+def solve_instance(
+    instance, time_limit=None, start_time=None, config=None, shard=None,
+    checkpoint=None, seed=None, on_incumbent=None, context=None
+):
+    """Find the token pair + fee token matching with highest objective value
+    for an instance dict.
+
+    If shard (k, n) is given, only the token pairs of the k-th of n shards
+    are matched (see `shard_token_pairs`).
+
+    If a checkpoint filename is given, the token pairs matched and the best
+    solution found are saved to it while solving. If it exists, only the
+    token pairs not matched yet are, and the solution found is the best of
+    both runs. Token pairs are matched in a random order, reproducible if
+    a seed is given (the one of the checkpoint, if any, is used instead).
+    Checkpoints of other instances or shards, or with an invalid solution,
+    are ignored.
+
+    If time_limit is given, the solver stops once it has elapsed since
+    start_time, also within the matching of a token pair (see `Deadline`),
+    and the exit status is 'timeout'. Token pairs whose matching was cut
+    short are not saved as matched in the checkpoint.
+
+    If no context is given, the solve gets its own (see `SolveContext`).
+
+    If on_incumbent is given, it is called with the best solution found so
+    far (as returned, with exit status 'incumbent') as soon as there is one,
+    and then when a better one was found, at most once every
+    INCUMBENT_INTERVAL seconds. The last one found may only be returned.
+    The instance is not modified by these calls.
+
+    Returns the solution as a dict (see `build_solution`), with the
+    objective value, and the phase times and counters of the solve (see
+    `metrics`) in the solver block.
+    The instance is modified in place.
+    """
+    if start_time is None:
+        start_time = time.time()
+    if config is None:
+        config = Config.snapshot()
+    if context is None:
+        context = SolveContext.create()
+    if time_limit is not None:
+        context = context._replace(deadline=Deadline(time_limit, start_time))
 
     # Load problem.
-    accounts, orders, fee = load_problem(instance)
+    accounts, orders, fee = load_problem(instance, config, context)
+    digest = instance_digest(accounts, orders)
 
     # Find token pair + fee token matching.
     # TODO: parallelize this loop.
     best_objective = 0
     best_solution = TRIVIAL_SOLUTION
 
+    with context.metrics.phase('pair_enumeration'):
+        token_pairs = list(eligible_token_pairs(orders, fee.token))
+        if shard is not None:
+            token_pairs = shard_token_pairs(token_pairs, shard)
+
+    evaluated_token_pairs = []
+    if checkpoint is not None:
+        saved = load_checkpoint(
+            checkpoint, digest, shard, accounts, orders, fee, config
+        )
+        if saved is not None:
+            logger.info(
+                "Resuming from checkpoint (%d token pairs matched).",
+                len(saved.evaluated_token_pairs)
+            )
+            seed = saved.seed
+            evaluated_token_pairs = saved.evaluated_token_pairs
+            best_objective = saved.objective
+            best_solution = saved.solution
+        elif seed is None:
+            seed = randrange(2**32)
+
+        def save_checkpoint():
+            write_checkpoint(checkpoint, Checkpoint(
+                seed=seed,
+                instance_digest=digest,
+                shard=shard,
+                evaluated_token_pairs=evaluated_token_pairs,
+                objective=best_objective,
+                solution=best_solution
+            ))
+
     # Shuffle token pairs so that the open solver has a chance
     # to solve an instance in consecutive batches in the
     # case the timeout is limiting each run to complete.
-    token_pairs = list(eligible_token_pairs(orders, fee.token))
-    shuffle(token_pairs)
+    if seed is not None:
+        token_pairs.sort()
+        Random(seed).shuffle(token_pairs)
+    else:
+        shuffle(token_pairs)
+    if len(evaluated_token_pairs) > 0:
+        evaluated = set(evaluated_token_pairs)
+        token_pairs = [tp for tp in token_pairs if tp not in evaluated]
+
+    def notify_incumbent_if_due():
+        nonlocal incumbent_pending, last_incumbent_time
+        if on_incumbent is None or not incumbent_pending or \
+                time.time() - last_incumbent_time < INCUMBENT_INTERVAL:
+            return
+        incumbent_pending = False
+        last_incumbent_time = time.time()
+        with context.metrics.phase('dump'):
+            on_incumbent(build_best_token_pair_solution(
+                instance, best_solution, best_objective, fee,
+                Stats(
+                    runtime=time.time() - start_time, exit_status="incumbent",
+                    metrics=context.metrics
+                ),
+                shard, digest, in_place=False
+            ))
+
+    # The first (non-trivial) incumbent, possibly the one of the checkpoint,
+    # is notified right away, so that a run killed early leaves it behind.
+    best_orders, _ = best_solution
+    incumbent_pending = len(best_orders) > 0
+    last_incumbent_time = float('-inf')
+    notify_incumbent_if_due()
+
+    last_checkpoint_time = time.time()
     for token_pair in token_pairs:
+        if context.deadline_expired():
+            break
+        context.metrics.count('token_pairs')
+        if context.observer is not None:
+            context.observer(PAIR_STARTED, token_pair=token_pair)
+            pair_start_time = time.time()
         objective, solution = match_token_pair_and_evaluate(
-            token_pair, accounts, orders, fee, touched_only=True
+            token_pair, accounts, orders, fee, touched_only=True, config=config,
+            context=context
         )
+        if context.observer is not None:
+            context.observer(
+                PAIR_FINISHED, token_pair=token_pair, objective=objective,
+                runtime=time.time() - pair_start_time
+            )
         if best_objective is None or objective > best_objective:
             best_objective = objective
             best_solution = deepcopy(solution)
-        if hasattr(args, 'time_limit') and \
-           args.time_limit is not None and \
-           args.time_limit < time.time() - start_time:
-            logging.warning("Time limit reached - leaving.")
-            break
-
-    orders, prices = best_solution
+            incumbent_pending = True
+        notify_incumbent_if_due()
+        # Token pairs whose matching was cut short by the deadline are
+        # matched again when resuming.
+        interrupted = context.deadline is not None and context.deadline.reached
+        if checkpoint is not None and not interrupted:
+            evaluated_token_pairs.append(token_pair)
+            if time.time() - last_checkpoint_time >= CHECKPOINT_INTERVAL:
+                save_checkpoint()
+                last_checkpoint_time = time.time()
+
+    if checkpoint is not None:
+        save_checkpoint()
 
     runtime = time.time() - start_time
-    stats = Stats(runtime=runtime, exit_status="completed")
+    stats = Stats(
+        runtime=runtime, exit_status=exit_status(context),
+        metrics=context.metrics
+    )
+
+    return build_best_token_pair_solution(
+        instance, best_solution, best_objective, fee, stats, shard, digest
+    )
 
-    # Dump solution to file.
-    dump_solution(
-        instance, args.solution_filename,
+
+def build_best_token_pair_solution(
+    instance, best_solution, best_objective, fee, stats, shard, digest,
+    in_place=True
+):
+    """Build the solution dict of an instance (see `build_solution`), with
+    the objective value, the instance digest (and shard, if any) in the
+    solver block."""
+    orders, prices = best_solution
+    solution = build_solution(
+        instance,
         orders,
         prices,
         fee=fee,
         stats=stats,
-        arith_traits=IntegerTraits
+        arith_traits=IntegerTraits,
+        in_place=in_place
     )
 
-    return instance
+    # Recorded so that the solutions of shards can be compared when merged.
+    solution['solver']['objective'] = str(best_objective)
+    solution['solver']['instance_digest'] = digest
+    if shard is not None:
+        solution['solver']['shard'] = '%d/%d' % shard
+
+    return solution
 
 
-def setup_arg_parser(subparsers):
-    parser = subparsers.add_parser(
-        'best-token-pair',
-        help="Matches orders on the token pair that leads to higher objective."
+def main(args):
+    start_time = time.time()
+
+    # The solution file holds the best solution found so far (written as
+    # soon as there is one, then at most every INCUMBENT_INTERVAL seconds,
+    # and always at the end), and the solver returns it (soon) on SIGTERM or
+    # SIGINT, so that a killed run leaves a solution behind.
+    config = getattr(args, 'config', None)
+    if config is None:
+        config = Config.snapshot()
+    deadline = Deadline(getattr(args, 'time_limit', None), start_time)
+    context = SolveContext.create(
+        deadline=deadline, trace_filename=getattr(args, 'trace', None)
     )
 
-    parser.set_defaults(exec_subcommand=main)
+    # Load dict from json.
+    with context.metrics.phase('load'):
+        instance = load_instance_file(args.instance, config)
+    compact = getattr(args, 'compact_solution', False)
+
+    def write_incumbent(solution):
+        write_solution(solution, args.solution_filename, compact=compact)
+
+    on_incumbent = write_incumbent if args.solution_filename is not None else None
+
+    loaded_orders = instance['orders']
+    with stopping_on_signals(deadline):
+        solution = solve_instance(
+            instance, start_time=start_time, config=config,
+            shard=getattr(args, 'shard', None),
+            checkpoint=getattr(args, 'checkpoint', None),
+            seed=getattr(args, 'seed', None), on_incumbent=on_incumbent,
+            context=context
+        )
+
+    # The solution holds copies of the order dicts it needs, so the orders
+    # loaded from the instance file (e.g. a memory-mapped snapshot) can be
+    # released.
+    loaded_orders.close()
+
+    # Dump solution (and trace, if asked) to file.
+    write_solution(solution, args.solution_filename, compact=compact)
+    if context.trace.filename is not None:
+        context.trace.dump()
+
+    return instance
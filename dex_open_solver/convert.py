@@ -0,0 +1,53 @@
+"""Convert instance json files into binary snapshots.
+
+Solving a snapshot skips json parsing, which saves time when the same large
+instance is solved repeatedly (e.g. with different options or token pairs):
+
+    gp_match convert instance.json instance.snapshot
+    gp_match instance.snapshot best-token-pair
+"""
+import argparse
+import logging
+import time
+
+from .core.snapshot import write_snapshot
+from .core.util import open_file, setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog='gp_match convert',
+        description="Convert an instance json file into a binary snapshot."
+    )
+    parser.add_argument(
+        'instance',
+        type=str,
+        help="File containing the instance "
+             "(possibly compressed: .gz, .bz2 or .xz)."
+    )
+    parser.add_argument(
+        'snapshot',
+        type=str,
+        help="File where the snapshot should be output to "
+             "(conventionally with extension .snapshot)."
+    )
+    parser.add_argument(
+        '--logging',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        default='INFO',
+        type=str,
+        help="Logging level."
+    )
+    args = parser.parse_args(argv)
+
+    setup_logging(args.logging)
+
+    start_time = time.time()
+    with open_file(args.instance) as instance_fd, \
+            open(args.snapshot, 'wb') as snapshot_fd:
+        write_snapshot(instance_fd, snapshot_fd)
+    logger.info(
+        "Snapshot file is '%s' (%.1fs).", args.snapshot, time.time() - start_time
+    )
@@ -1,53 +1,146 @@
-import json
+import hashlib
+import io
 import logging
+import os
 import sys
-import tempfile
 from collections import namedtuple
-from copy import deepcopy
 from fractions import Fraction as F
 
+from .config import Config
+from .context import NULL_CONTEXT
 from .order import Order
 from .order_util import IntegerTraits
 from .orderbook import (compute_solution_metrics,
                         restrict_order_sell_amounts_by_balances,
                         update_accounts)
-from .util import stringify_numeric
+from .snapshot import SnapshotOrders, load_snapshot
+from .stream import StreamedOrders, load_instance, write_json
+from .util import intern_accounts, open_file, stringify_numeric
 
 logger = logging.getLogger(__name__)
 
 Fee = namedtuple('Fee', ['token', 'value'])
-Stats = namedtuple('Stats', ['runtime', 'exit_status'])
+# metrics: the SolveMetrics of the solve (see metrics), if recorded.
+Stats = namedtuple(
+    'Stats', ['runtime', 'exit_status', 'metrics'], defaults=[None]
+)
+
+
+def exit_status(context):
+    """Return the exit status of a solve, given whether its deadline (see
+    context.Deadline) was reached."""
+    deadline = context.deadline
+    if deadline is None or not deadline.reached:
+        return "completed"
+    if deadline.stopped:
+        logger.warning("Interrupted - returning best solution found.")
+        return "interrupted"
+    logger.warning("Time limit reached - returning best solution found.")
+    return "timeout"
 
 
 def load_fee(fee_dict):
     return Fee(token=fee_dict['token'], value=F(fee_dict['ratio']))
 
 
-def load_problem(instance):
+def load_instance_file(fd, config=None, order_filter=None):
+    """Load an instance from a json file, or from a snapshot file if opened
+    in binary mode (see `snapshot.load_snapshot`).
+    """
+    if isinstance(fd, io.TextIOBase):
+        return load_instance(fd, config, order_filter)
+    return load_snapshot(fd, config, order_filter)
+
+
+def load_accounts_and_orders(instance, config=None, order_filter=None):
+    """Load the accounts and orders of an instance json.
+
+    If order_filter is given, only the order dicts for which it returns True
+    are loaded, and only the accounts of those orders are returned.
+
+    For instances loaded by `load_instance_file` the already loaded orders
+    are returned (order_filter can be given to `load_instance_file` instead),
+    and the accounts are not copied.
+    """
+    if isinstance(instance['orders'], (StreamedOrders, SnapshotOrders)):
+        return instance['accounts'], instance['orders'].orders
+
+    orders = Order.load_from_dicts(instance['orders'], config, order_filter)
+
+    if order_filter is None:
+        accounts = intern_accounts(instance['accounts'])
+    else:
+        accounts = intern_accounts({
+            account_id: instance['accounts'][account_id]
+            for account_id in {order.account_id for order in orders}
+            if account_id in instance['accounts']
+        })
+
+    return accounts, orders
+
+
+def load_problem(instance, config=None, context=NULL_CONTEXT):
     """Load and setup a problem from an instance json."""
-    accounts = deepcopy(instance['accounts'])
+    if config is None:
+        config = Config.snapshot()
 
-    orders = [
-        Order.load_from_dict(order_dict, str(index))
-        for index, order_dict in enumerate(instance['orders'])
-    ]
+    with context.metrics.phase('load'):
+        accounts, orders = load_accounts_and_orders(instance, config)
 
-    orders = restrict_order_sell_amounts_by_balances(orders, accounts)
+    with context.metrics.phase('balance_restriction'):
+        orders = restrict_order_sell_amounts_by_balances(orders, accounts)
 
     fee = load_fee(instance['fee'])
 
     return accounts, orders, fee
 
 
-def dump_solution(
+def instance_digest(accounts, orders):
+    """Return a hex digest identifying the accounts and orders of a problem
+    (as returned by `load_problem`).
+
+    Files written for an instance (e.g. checkpoints, shard solutions) record
+    it, so that they are not mistaken for those of another instance.
+    """
+    digest = hashlib.sha256()
+    for account_id, balances in accounts.items():
+        digest.update(f'{account_id}:{sorted(balances.items())}\n'.encode())
+    for order in orders:
+        digest.update((
+            f'{order.id}:{order.account_id}:{order.sell_token}:'
+            f'{order.buy_token}:{order.max_sell_amount}:{order.max_xrate}\n'
+        ).encode())
+    return digest.hexdigest()
+
+
+def build_solution(
     instance,
-    solution_filename,
     orders,
     prices,
     fee,
     stats,
-    arith_traits=IntegerTraits
+    arith_traits=IntegerTraits,
+    in_place=True
 ):
+    """Integrate orders, prices and stats in the instance, and return the
+    solution: the instance with numeric fields converted to strings.
+
+    Only the parts of the instance changed by the solution are converted: the
+    accounts of orders that are not touched are shared with the instance, as
+    loaded (with balances already as strings).
+
+    If in_place is False, the solution is integrated into a copy of the
+    instance instead (of the parts it changes only), so that the solution of
+    an instance can be built more than once.
+    """
+    if not in_place:
+        accounts = dict(instance['accounts'])
+        for account_id in {order.account_id for order in orders}:
+            accounts[account_id] = dict(accounts[account_id])
+        instance = dict(
+            instance, accounts=accounts, fee=dict(instance['fee'])
+        )
+
     # Dump prices.
     instance['prices'] = prices
 
@@ -60,13 +153,11 @@ def dump_solution(
 
     # Dump touched orders.
     orders = sorted(orders, key=lambda order: order.id)
-    original_orders = {
-        str(index): order for index, order in enumerate(instance['orders'])
-    }
+    original_orders = instance['orders']
     instance['orders'] = []
     for order in orders:
         if order.sell_amount > 0:
-            original_order = original_orders[order.id]
+            original_order = dict(original_orders[int(order.id)])
             original_order['execSellAmount'] = str(order.sell_amount)
             original_order['execBuyAmount'] = str(order.buy_amount)
             instance['orders'].append(original_order)
@@ -75,8 +166,14 @@ def dump_solution(
     instance['fee']['ratio'] = float(instance['fee']['ratio'])
 
     # Convert numeric fields to strings.
-    instance = stringify_numeric(instance)
-    for order in instance['orders']:
+    solution_accounts = dict(accounts)
+    for account_id in {order.account_id for order in orders}:
+        solution_accounts[account_id] = stringify_numeric(accounts[account_id])
+    solution = {
+        key: solution_accounts if key == 'accounts' else stringify_numeric(value)
+        for key, value in instance.items()
+    }
+    for order in solution['orders']:
         if 'orderID' in order.keys():
             order['orderID'] = int(order['orderID'])
 
@@ -86,17 +183,56 @@ def dump_solution(
     solver['args'] = sys.argv
     solver['runtime'] = stats.runtime
     solver['exit_status'] = stats.exit_status
-    instance['solver'] = solver
+    if stats.metrics is not None:
+        solver.update(stats.metrics.to_dict())
+    solution['solver'] = solver
+
+    return solution
 
-    # Dump json.
+
+def write_solution(solution, solution_filename, compact=False):
+    """Write solution json to file (by default a file in a temp directory).
+
+    The json is indented, unless compact is True. The file is compressed if
+    its extension is .gz, .bz2 or .xz.
+
+    The solution is written to a temporary file that then replaces the
+    solution file, so that the solution file is never partially written
+    (e.g. if the process is killed while writing an incumbent solution).
+    """
+    temp_filename = None
     if solution_filename is None:
+        import tempfile
         solution_file = tempfile.NamedTemporaryFile(
             mode='w+', delete=False, prefix='solution-', suffix='.json'
         )
         solution_filename = solution_file.name
+    elif os.path.exists(solution_filename) \
+            and not os.path.isfile(solution_filename):
+        # E.g. /dev/stdout, which can not be replaced.
+        solution_file = open_file(solution_filename, 'w')
     else:
-        solution_file = open(solution_filename, "w+")
-    json.dump(instance, solution_file, indent=4)
-    solution_file.close()
+        directory, basename = os.path.split(solution_filename)
+        temp_filename = os.path.join(directory, '.tmp-' + basename)
+        solution_file = open_file(temp_filename, 'w')
+    with solution_file:
+        write_json(solution, solution_file, indent=None if compact else 4)
+    if temp_filename is not None:
+        os.replace(temp_filename, solution_filename)
 
     logger.info("Solution file is '%s'.", solution_filename)
+
+
+def dump_solution(
+    instance,
+    solution_filename,
+    orders,
+    prices,
+    fee,
+    stats,
+    arith_traits=IntegerTraits,
+    compact=False
+):
+    solution = build_solution(instance, orders, prices, fee, stats, arith_traits)
+    write_solution(solution, solution_filename, compact)
+    return solution
@@ -1,8 +1,37 @@
+from collections import namedtuple
+
 from .util import classproperty
 
 
+class SolverConfig(namedtuple('SolverConfig', [
+    'MIN_TRADABLE_AMOUNT',
+    'MAX_NR_EXEC_ORDERS',
+    'MIN_AVERAGE_ORDER_FEE',
+    'MIN_ABSOLUTE_ORDER_FEE',
+    'MIN_TRADABLE_AMOUNT_ROUNDING_TOL'
+])):
+    """Immutable parameters of a single solve (see Config for their meaning).
+
+    Solvers receive one of these instead of reading the Config class, so that
+    solves with different parameters can run side by side in one process.
+    The runtime state of a solve is passed in a SolveContext (see context).
+    """
+    __slots__ = ()
+
+    # Convenience method to compute effective min tradable amount.
+    @property
+    def MIN_RATIONAL_TRADABLE_AMOUNT(self):
+        return int(
+            self.MIN_TRADABLE_AMOUNT * (1 + self.MIN_TRADABLE_AMOUNT_ROUNDING_TOL)
+        )
+
+
 class Config:
-    """Configuration parameters for the solver."""
+    """Configuration parameters for the solver.
+
+    The parameters that are part of SolverConfig are only defaults: a solve
+    uses the snapshot of them taken when it starts (see `snapshot`).
+    """
 
     # Main problem parameters:
 
@@ -48,3 +77,11 @@ class Config:
         return int(
             self.MIN_TRADABLE_AMOUNT * (1 + self.MIN_TRADABLE_AMOUNT_ROUNDING_TOL)
         )
+
+    @classmethod
+    def snapshot(cls, **overrides):
+        """Return the current solve parameters, with the given overrides."""
+        config = SolverConfig(
+            **{field: getattr(cls, field) for field in SolverConfig._fields}
+        )
+        return config._replace(**overrides)
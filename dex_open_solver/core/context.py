@@ -0,0 +1,72 @@
+"""Runtime state of a single solve.
+
+A SolverConfig only holds the parameters of a solve. What a solve is stopped
+by, or reports to, changes while it runs and belongs to that solve only, so
+it is passed separately to the functions that need it, in a SolveContext.
+"""
+import time
+from collections import namedtuple
+
+from .metrics import NULL_METRICS, SolveMetrics
+from .trace import NULL_TRACE, TraceBuffer
+
+
+class Deadline:
+    """Point in time after which a solve stops early.
+
+    Solvers check it in their main loops, and return the best solution found
+    so far (or the trivial one) once it has expired. Whether any check found
+    it expired is recorded in `reached`, so that the solve can be reported
+    as timed out. A deadline without time limit only expires if stopped.
+    """
+
+    def __init__(self, time_limit=None, start_time=None):
+        if start_time is None:
+            start_time = time.time()
+        self.time = None if time_limit is None else start_time + time_limit
+        self.stopped = False
+        self.reached = False
+
+    def stop(self):
+        """Make the deadline expire now (e.g. on SIGTERM)."""
+        self.stopped = True
+
+    def expired(self):
+        if not self.reached and (
+            self.stopped or self.time is not None and time.time() >= self.time
+        ):
+            self.reached = True
+        return self.reached
+
+
+class SolveContext(namedtuple('SolveContext', [
+    'deadline',
+    'observer',
+    'metrics',
+    'trace'
+])):
+    """The deadline (see Deadline, None for no deadline), observer (see
+    events, None for no observer), metrics (see metrics) and trace (see
+    trace) of a solve.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, deadline=None, observer=None, trace_filename=None):
+        """Return the context of a new solve, recording its metrics and trace
+        (dumped to trace_filename, if given)."""
+        return cls(
+            deadline=deadline, observer=observer, metrics=SolveMetrics(),
+            trace=TraceBuffer(trace_filename)
+        )
+
+    def deadline_expired(self):
+        """Return True if the solve has a deadline, and it has expired."""
+        return self.deadline is not None and self.deadline.expired()
+
+
+# Context of solves run on their own (e.g. from tests): no deadline, no
+# observer, and metrics and trace that record nothing.
+NULL_CONTEXT = SolveContext(
+    deadline=None, observer=None, metrics=NULL_METRICS, trace=NULL_TRACE
+)
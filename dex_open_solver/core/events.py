@@ -0,0 +1,37 @@
+"""Events emitted while solving, to follow the progress of a solve.
+
+An observer is a callable given to a solve as the observer of its
+SolveContext (or to `api.solve`). It is called with the name of every event
+and the event fields as keyword arguments:
+
+    def observer(event, **fields):
+        print(event, fields)
+
+    solution = solve(instance, 'best-token-pair', observer=observer)
+
+Events, all with a token_pair field:
+
+    PAIR_STARTED         The matching of the token pair started.
+    XRATE_FOUND          xrate: the optimal exchange rate between the token
+                         pair (None if no order can be matched).
+    F_ORDERS_CHOSEN      nr_exec_f_orders: the number of orders selling fee
+                         chosen, objective: the (rational) objective value.
+    ROUNDING_DONE        rounded: whether the solution could be rounded.
+    VIABILITY_ITERATION  iteration: the iteration of the economic viability
+                         loop (from 0), nr_orders: the number of orders left,
+                         viable: whether the solution found is economically
+                         viable.
+    PAIR_FINISHED        objective: the objective value of the solution,
+                         runtime: the time spent matching the token pair.
+
+Observers are called from the solving thread, and should return quickly. To
+stop a solve early, an observer can stop its deadline (see
+`context.Deadline`). When no observer is given, emitting an event costs a
+single attribute check.
+"""
+PAIR_STARTED = 'pair_started'
+XRATE_FOUND = 'xrate_found'
+F_ORDERS_CHOSEN = 'f_orders_chosen'
+ROUNDING_DONE = 'rounding_done'
+VIABILITY_ITERATION = 'viability_iteration'
+PAIR_FINISHED = 'pair_finished'
@@ -0,0 +1,86 @@
+"""Wall time spent in each phase of a solve, and counts of the work done.
+
+Solvers record them in the metrics of their SolveContext, which do nothing
+unless the solve has its own SolveMetrics (as solve_instance gives it). They
+end up in the solver block of the solution:
+
+    "phases": {"load": 1.2, "xrate_search": 0.4, ...},   (seconds)
+    "counters": {"intervals": 152, "compute_buy_amounts": 310, ...}
+
+Phases can be nested (e.g. the xrate search within the economic viability
+loop): the time of a phase does not include the time of the phases nested
+in it, so that the times add up to (at most) the runtime.
+
+Phases:
+    load                 Loading the instance and its orders.
+    balance_restriction  Restricting order sell amounts by account balances.
+    pair_enumeration     Finding the token pairs to match (best-token-pair).
+    xrate_search         Finding the optimal exchange rate of a token pair.
+    f_orders             Choosing the number of orders selling fee.
+    rounding             Rounding solutions to integers.
+    viability            Dropping orders until a solution is economically
+                         viable.
+    validation           Validating solutions.
+    dump                 Writing incumbent solutions (best-token-pair).
+
+Counters:
+    token_pairs          Token pairs matched (best-token-pair).
+    intervals            Exchange rate intervals visited.
+    candidates           Exchange rate candidates evaluated.
+    compute_buy_amounts  Calls of compute_buy_amounts.
+    viability_iterations Iterations of the economic viability loop.
+    rounding_*           Rounding outcomes (see round.round_solution).
+"""
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+
+class SolveMetrics:
+    """Phase times and counters of a solve."""
+
+    def __init__(self):
+        self.phase_times = Counter()
+        self.counters = Counter()
+        self._phases = []
+        self._last_time = None
+
+    def _charge(self, now):
+        """Charge the time since the last phase change to the current phase."""
+        if self._phases:
+            self.phase_times[self._phases[-1]] += now - self._last_time
+        self._last_time = now
+
+    @contextmanager
+    def phase(self, name):
+        self._charge(time.perf_counter())
+        self._phases.append(name)
+        try:
+            yield
+        finally:
+            self._charge(time.perf_counter())
+            self._phases.pop()
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def to_dict(self):
+        return {
+            'phases': dict(self.phase_times),
+            'counters': dict(self.counters)
+        }
+
+
+class NullMetrics:
+    """Metrics that are not recorded (the default of every solve)."""
+
+    _null_phase = nullcontext()
+
+    def phase(self, name):
+        return self._null_phase
+
+    def count(self, name, n=1):
+        pass
+
+
+NULL_METRICS = NullMetrics()
@@ -1,13 +1,36 @@
 """Class/Functions for handling Order's."""
 from copy import copy
 from fractions import Fraction as F
+from sys import intern
 from uuid import uuid4
 
 from .config import Config
+from .util import gc_paused
+
+
+def parse_amount(amount):
+    """Parse an amount of an order dict.
+
+    Amounts are decimal integer strings, which int() parses much faster than
+    Fraction does. Any other input is parsed by Fraction.
+    """
+    if type(amount) is str and amount.isdigit() and amount.isascii():
+        return int(amount)
+    if type(amount) is int:
+        return amount
+    return F(amount)
 
 
 class Order(object):
     """Class representing an Order."""
+
+    # Instances can be numerous, so avoid a per-instance __dict__.
+    __slots__ = (
+        '_id', '_account_id', '_buy_token', '_sell_token', '_max_sell_amount',
+        '_original_max_sell_amount', '_max_xrate', '_buy_amount', '_sell_amount',
+        '_utility', '_utility_disreg'
+    )
+
     def __init__(
         self,
         buy_token,
@@ -106,20 +129,43 @@ class Order(object):
         self._utility_disreg = new_utility_disreg
 
     @classmethod
-    def load_from_dict(cls, order_dict, id=None):
+    def load_from_dict(cls, order_dict, id=None, config=None):
+        # Tokens and account ids are interned, so that all orders share the
+        # same string objects: this saves memory, and dict lookups keyed by
+        # them (e.g. balances, prices) compare equal strings by identity.
+        if config is None:
+            config = Config.snapshot()
+        sell_amount = parse_amount(order_dict['sellAmount'])
         buy_amount_ceiled = max(
-            Config.MIN_TRADABLE_AMOUNT,
-            F(order_dict['buyAmount'])
+            config.MIN_TRADABLE_AMOUNT,
+            parse_amount(order_dict['buyAmount'])
         )
         return Order(
-            buy_token=order_dict['buyToken'],
-            sell_token=order_dict['sellToken'],
-            max_sell_amount=F(order_dict['sellAmount']),
-            max_xrate=F(order_dict['sellAmount']) / buy_amount_ceiled,
-            account_id=order_dict['accountID'],
+            buy_token=intern(order_dict['buyToken']),
+            sell_token=intern(order_dict['sellToken']),
+            max_sell_amount=F(sell_amount),
+            max_xrate=F(sell_amount, buy_amount_ceiled),
+            account_id=intern(order_dict['accountID']),
             id=id
         )
 
+    @classmethod
+    def load_from_dicts(cls, order_dicts, config=None, order_filter=None):
+        """Load a list of order dicts. Each order id is its index in the list.
+
+        Same as calling `load_from_dict` for every order dict (for which
+        order_filter returns True, if given), with garbage collection paused.
+        """
+        if config is None:
+            config = Config.snapshot()
+
+        with gc_paused():
+            return [
+                cls.load_from_dict(order_dict, str(index), config)
+                for index, order_dict in enumerate(order_dicts)
+                if order_filter is None or order_filter(order_dict)
+            ]
+
     def update_order_dict(self, order_dict):
         order_dict['execBuyAmount'] = self.buy_amount
         order_dict['execSellAmount'] = self.sell_amount
@@ -147,22 +193,28 @@ class Order(object):
         return self.__str__()
 
     def get_sell_amount_from_buy_amount(
-        self, prices, fee, arith_traits
+        self, prices, fee, arith_traits, buy_amount=None
     ):
-        """Compute the execSellAmount from execBuyAmount of this order."""
+        """Compute the execSellAmount from execBuyAmount of this order.
+
+        If buy_amount is given, then it is used instead of execBuyAmount.
+        """
+        if buy_amount is None:
+            buy_amount = self.buy_amount
+
         buy_token_price = prices[self.buy_token]
         sell_token_price = prices[self.sell_token]
 
         if buy_token_price and sell_token_price:
             xrate = F(buy_token_price, sell_token_price)
             return arith_traits.compute_sell_from_buy_amount(
-                buy_amount=self.buy_amount,
+                buy_amount=buy_amount,
                 xrate=xrate,
                 buy_token_price=buy_token_price,
                 fee=fee
             )
         else:
-            assert self.buy_amount == 0
+            assert buy_amount == 0
             return 0
 
     def set_sell_amount_from_buy_amount(self, *args, **kwargs):
@@ -216,6 +216,22 @@ def compute_objective(prices, accounts_updated, orders, fee):
     return 2 * total_u - total_umax
 
 
+def compute_objective_of_touched_orders(prices, accounts, orders, fee):
+    """Compute objective function value of a solution, over its touched
+    orders only.
+
+    Only the accounts of the solution orders are copied to be updated, the
+    accounts dict is not modified.
+    """
+    accounts_updated = {
+        account_id: dict(accounts[account_id])
+        for account_id in {order.account_id for order in orders}
+    }
+    update_accounts(accounts_updated, orders)
+    touched_orders = [o for o in orders if o.buy_amount > 0]
+    return compute_objective(prices, accounts_updated, touched_orders, fee)
+
+
 # Update accounts from order execution.
 def update_accounts(accounts, orders):
     for order in orders:
@@ -277,18 +293,21 @@ def compute_average_order_fee(orders, prices, fee, arith_traits):
         / count_nr_exec_orders(orders)
 
 
-def is_economic_viable(orders, prices, fee, arith_traits):
+def is_economic_viable(orders, prices, fee, arith_traits, config=None):
     # Trivial solution is economically viable.
     if count_nr_exec_orders(orders) == 0:
         return True
 
+    if config is None:
+        config = Config.snapshot()
+
     # Shortcut to avoid computing fees.
-    if Config.MIN_AVERAGE_ORDER_FEE == 0 and Config.MIN_ABSOLUTE_ORDER_FEE == 0:
+    if config.MIN_AVERAGE_ORDER_FEE == 0 and config.MIN_ABSOLUTE_ORDER_FEE == 0:
         return True
 
     # Check minimum absolute order fee.
     if any(
-        o.fee(prices, fee) < Config.MIN_ABSOLUTE_ORDER_FEE
+        o.fee(prices, fee) < config.MIN_ABSOLUTE_ORDER_FEE
         for o in orders
         if o.sell_token != fee.token and o.buy_amount > 0
     ):
@@ -296,7 +315,7 @@ def is_economic_viable(orders, prices, fee, arith_traits):
 
     # Check minimum average order fee.
     average_order_fee = compute_average_order_fee(orders, prices, fee, arith_traits)
-    return average_order_fee >= Config.MIN_AVERAGE_ORDER_FEE
+    return average_order_fee >= config.MIN_AVERAGE_ORDER_FEE
 
 
 def is_trivial(orders):
@@ -305,9 +324,14 @@ def is_trivial(orders):
 
 # Note: this is an approximation, there is no guarantee that the returned
 # subset is economically viable (or even feasible) at all.
-def compute_approx_economic_viable_subset(orders, prices, fee, arith_traits):
+def compute_approx_economic_viable_subset(
+    orders, prices, fee, arith_traits, config=None
+):
+    if config is None:
+        config = Config.snapshot()
+
     # Shortcut.
-    if Config.MIN_AVERAGE_ORDER_FEE == 0 and Config.MIN_ABSOLUTE_ORDER_FEE == 0:
+    if config.MIN_AVERAGE_ORDER_FEE == 0 and config.MIN_ABSOLUTE_ORDER_FEE == 0:
         return orders
 
     # Compute maximal subset of orders that satisfy the minimum economic
@@ -317,7 +341,7 @@ def compute_approx_economic_viable_subset(orders, prices, fee, arith_traits):
     orders = [
         o for o in orders
         if o.sell_token == fee.token
-        or o.fee(prices, fee) >= Config.MIN_ABSOLUTE_ORDER_FEE
+        or o.fee(prices, fee) >= config.MIN_ABSOLUTE_ORDER_FEE
     ]
 
     # 2. Minimum average fee per order.
@@ -336,7 +360,7 @@ def compute_approx_economic_viable_subset(orders, prices, fee, arith_traits):
     while i < len(orders_by_dec_volume) and \
         compute_average_order_fee(
         orders_by_dec_volume[:i], prices, fee, arith_traits
-    ) >= Config.MIN_AVERAGE_ORDER_FEE:
+    ) >= config.MIN_AVERAGE_ORDER_FEE:
         i += 1
 
     orders = orders_by_dec_volume[:i]
@@ -1,18 +1,23 @@
 import logging
-from collections import OrderedDict
+from collections import Counter, OrderedDict, defaultdict, deque
 from fractions import Fraction as F
+from itertools import product
 from math import ceil, floor
 from typing import Dict, List
 
-import networkx as nx
-
 from .api import Fee
 from .config import Config
+from .context import NULL_CONTEXT
 from .order import Order
 from .order_util import IntegerTraits
 
 logger = logging.getLogger(__name__)
 
+# Spanning arborescences of graphs up to this number of tokens are computed
+# by enumeration. This covers token pair solutions (b_buy_token, s_buy_token
+# and fee token) without having to resort to networkx.
+MAX_NR_TOKENS_ENUMERATED_ARBORESCENCE = 3
+
 
 def compute_token_balances(tokens, orders):
     """Compute the (im)balances for all tokens."""
@@ -29,7 +34,8 @@ def setup_rounding_buffer(
     orders: List[Order],
     connected_tokens: List[str],
     estimated_token_prices: Dict[str, F],
-    fee: Fee
+    fee: Fee,
+    solution_prices: bool = False
 ) -> List[Order]:
     """Introduce rounding buffer for order sell amounts.
 
@@ -38,6 +44,9 @@ def setup_rounding_buffer(
         connected_tokens: List of tokens connected to the fee token.
         estimated_token_prices: Dict of estimated prices for all tokens.
         fee: Fee namedtuple.
+        solution_prices: If true, then estimated_token_prices are exactly the
+            prices of the solution to be rounded, and the buffer is sized from
+            them and the fee instead of accounting for PRICE_ESTIMATION_ERROR.
 
     Returns:
         The updated orders.
@@ -46,6 +55,7 @@ def setup_rounding_buffer(
     # Compute amount of all tokens equivalent to MAX_ROUNDING_VOLUME.
     max_rounding_amounts = {}
     fee_token_price = estimated_token_prices[fee.token]
+    nr_orders_per_token = Counter(t for o in orders for t in (o.sell_token, o.buy_token))
     for t in connected_tokens:
         assert t in estimated_token_prices
 
@@ -56,6 +66,13 @@ def setup_rounding_buffer(
         max_rounding_amounts[t] = ceil(max_rounding_amount)
         assert max_rounding_amounts[t] >= 1
 
+        # Rounding the amounts of n orders down to integers can imbalance
+        # a token by less than n units.
+        if solution_prices:
+            max_rounding_amounts[t] = max(
+                max_rounding_amounts[t], nr_orders_per_token[t] + 1
+            )
+
         # logging.info("Maximum assumed rounding error for [%s] : %20d"
         #             % (t, max_rounding_amounts[t].quantize(Decimal('1e-4'))))
 
@@ -73,8 +90,14 @@ def setup_rounding_buffer(
         # sure that expected adjustments on the buy-side will not lead to
         # violations on the sell-side (i.e., exceeding maximum sell amount).
         estimated_xrate = estimated_token_prices[tB] / estimated_token_prices[tS]
-        rounding_buffer = max_rounding_amounts[tB] * estimated_xrate
-        rounding_buffer = rounding_buffer * Config.PRICE_ESTIMATION_ERROR**2
+        if solution_prices:
+            # sell_amount = buy_amount * xrate / (1 - fee), plus one unit
+            # lost when rounding the sell amount.
+            rounding_buffer = max_rounding_amounts[tB] * estimated_xrate
+            rounding_buffer = rounding_buffer / (1 - fee.value) + 1
+        else:
+            rounding_buffer = max_rounding_amounts[tB] * estimated_xrate
+            rounding_buffer = rounding_buffer * Config.PRICE_ESTIMATION_ERROR**2
         rounding_buffer = ceil(rounding_buffer)
         assert rounding_buffer >= 1
 
@@ -82,7 +105,7 @@ def setup_rounding_buffer(
         old_max_sell_amount = o.max_sell_amount
         new_max_sell_amount = max(old_max_sell_amount - rounding_buffer, 0)
 
-        logging.debug(
+        logger.debug(
             "Reducing max sell amount [%s] of order <%s> : %25d --> %25d",
             tS, o.id, old_max_sell_amount, new_max_sell_amount
         )
@@ -93,11 +116,52 @@ def setup_rounding_buffer(
     return orders
 
 
+def is_acyclic(tree):
+    """Check if a {child_token -> parent_token} dict has no cycles."""
+    for token in tree:
+        visited = {token}
+        while token in tree:
+            token = tree[token]
+            if token in visited:
+                return False
+            visited.add(token)
+    return True
+
+
+def enumerate_spanning_arborescence(edges):
+    """Compute a maximum spanning arborescence by enumerating all trees.
+
+    Only suitable for graphs with very few nodes.
+
+    Args:
+        edges: List of (parent_token, child_token) pairs.
+
+    Returns:
+        The rooted spanning tree as dict of {child_token -> parent_token}.
+
+    """
+    tokens = list(OrderedDict.fromkeys(token for edge in edges for token in edge))
+    parent_candidates = [
+        [parent for parent, child in edges if child == token] + [None]
+        for token in tokens
+    ]
+    best_tree = {}
+    for parents in product(*parent_candidates):
+        tree = {
+            token: parent for token, parent in zip(tokens, parents)
+            if parent is not None
+        }
+        if len(tree) > len(best_tree) and is_acyclic(tree):
+            best_tree = tree
+    return best_tree
+
+
 def compute_spanning_order_arborescence(orders, fee):
     """Compute a spanning arborescence with fee token as root.
 
     Arcs correspond to orders and point from sellToken to buyToken.
-    The arborescence is computed via Edmond's algorithm.
+    The arborescence is computed by enumeration for small graphs, or via
+    Edmond's algorithm otherwise.
 
     Args:
         orders: Orders as list[dict].
@@ -108,34 +172,62 @@ def compute_spanning_order_arborescence(orders, fee):
     """
     # Force fee token to be root by excluding any edges pointing to it.
     # (use OrderedDict.fromkeys() to remove duplicates while preserving order)
-    edges = OrderedDict.fromkeys([
+    edges = list(OrderedDict.fromkeys([
         (o.sell_token, o.buy_token)
         for o in orders if o.buy_token != fee.token
-    ])
+    ]))
+
+    tokens = {token for edge in edges for token in edge}
+    if len(tokens) <= MAX_NR_TOKENS_ENUMERATED_ARBORESCENCE:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Directed edges: %s", edges)
+            logger.debug("%s Touched tokens: %s", len(tokens), sorted(tokens))
+        return enumerate_spanning_arborescence(edges)
 
-    G = nx.DiGraph(list(edges))
+    import networkx as nx
 
-    logging.debug("Directed edges: {}".format(G.edges))
-    logging.debug("{} Touched tokens: {}".format(len(G.nodes), sorted(G.nodes)))
+    G = nx.DiGraph(edges)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Directed edges: %s", G.edges)
+        logger.debug("%s Touched tokens: %s", len(G.nodes), sorted(G.nodes))
 
     # Compute spanning arborescence
     arborescence = nx.algorithms.tree.branchings.Edmonds(G).find_optimum()
     return {e[1]: e[0] for e in arborescence.edges}
 
 
-def round_leaf_token(leaf_token, parent_token, orders, token_balances, prices, fee):
-    # Find and adjust order selling tL, buying tP.
-    # Sort in decreasing executed buy amount so that the full rounding
-    # procedure touches the less number of orders.
-    for order in sorted(orders, key=lambda order: order.buy_amount, reverse=True):
+def index_orders_by_token_pair(orders):
+    """Index executed orders by (sell_token, buy_token).
 
-        if order.buy_token != leaf_token or order.sell_token != parent_token \
-           or order.buy_amount == 0:
-            continue
+    Orders of each token pair are sorted in decreasing executed buy amount so that
+    the full rounding procedure touches the less number of orders.
+    """
+    index = defaultdict(list)
+    for order in orders:
+        if order.buy_amount > 0:
+            index[order.sell_token, order.buy_token].append(order)
+    for token_pair_orders in index.values():
+        token_pair_orders.sort(key=lambda order: order.buy_amount, reverse=True)
+    return index
+
+
+def round_leaf_token(
+    leaf_token, parent_token, orders, token_balances, prices, fee, config,
+    context=NULL_CONTEXT
+):
+    """Move the imbalance of leaf_token to parent_token.
+
+    Adjusts the buy amount of orders selling parent_token for leaf_token, which
+    must be given in `orders` as sorted by `index_orders_by_token_pair`, and
+    updates token_balances accordingly.
+    """
+    # Adjust orders selling tP, buying tL.
+    for order in orders:
 
         # Min amount that can be added to order.buy_amount without violating
         # the minimum tradable amount constraint.
-        min_buy_amount_delta = Config.MIN_TRADABLE_AMOUNT - order.buy_amount
+        min_buy_amount_delta = config.MIN_TRADABLE_AMOUNT - order.buy_amount
 
         # Amount to be added to order.buy_amount.
         buy_amount_delta = max(
@@ -143,32 +235,40 @@ def round_leaf_token(leaf_token, parent_token, orders, token_balances, prices, f
             token_balances[leaf_token]
         )
 
-        new_sell_amount = order.with_buy_amount(order.buy_amount + buy_amount_delta)\
-            .get_sell_amount_from_buy_amount(prices, fee, IntegerTraits)
+        new_sell_amount = order.get_sell_amount_from_buy_amount(
+            prices, fee, IntegerTraits,
+            buy_amount=order.buy_amount + buy_amount_delta
+        )
 
         # Skip order if rounding would lead to violation of max sell amount.
         if new_sell_amount > order.max_sell_amount:
             continue
 
         # Skip order if rounding would lead to violation of min tradable amount.
-        if new_sell_amount < Config.MIN_TRADABLE_AMOUNT:
+        if new_sell_amount < config.MIN_TRADABLE_AMOUNT:
             continue
 
         # Can't violate min tradable amount for the buy amount.
-        assert order.buy_amount + buy_amount_delta >= Config.MIN_TRADABLE_AMOUNT
+        assert order.buy_amount + buy_amount_delta >= config.MIN_TRADABLE_AMOUNT
 
-        # Round order and update balance:
-        token_balances[leaf_token] -= buy_amount_delta
+        # Round order and update balances:
         old_buy_amount, old_sell_amount = order.buy_amount, order.sell_amount
         order.buy_amount += buy_amount_delta
         order.set_sell_amount_from_buy_amount(prices, fee, IntegerTraits)
+        token_balances[leaf_token] -= buy_amount_delta
+        token_balances[parent_token] += order.sell_amount - old_sell_amount
 
-        logging.debug("Adjusting order %s:", order.id)
-        logging.debug(
+        context.trace.record(
+            'round', order=order.id, token=leaf_token,
+            buy_amount=(old_buy_amount, order.buy_amount),
+            sell_amount=(old_sell_amount, order.sell_amount)
+        )
+        logger.debug("Adjusting order %s:", order.id)
+        logger.debug(
             "\t(old) buy_amount : %25d  -- sell_amount: %25d",
             old_buy_amount, old_sell_amount
         )
-        logging.debug(
+        logger.debug(
             "\t(new) buy_amount : %25d  -- sell_amount: %25d",
             order.buy_amount, order.sell_amount
         )
@@ -177,7 +277,109 @@ def round_leaf_token(leaf_token, parent_token, orders, token_balances, prices, f
             break
 
 
-def round_solution(prices, orders, fee):
+def max_buy_amount_within_max_sell_amount(order, buy_amount_ub, prices, fee):
+    """Largest buy amount in [order.buy_amount, buy_amount_ub] not violating
+    the max sell amount constraint (found by binary search)."""
+    lb, ub = order.buy_amount, buy_amount_ub
+    while lb < ub:
+        buy_amount = (lb + ub + 1) // 2
+        sell_amount = order.get_sell_amount_from_buy_amount(
+            prices, fee, IntegerTraits, buy_amount=buy_amount
+        )
+        if sell_amount <= order.max_sell_amount:
+            lb = buy_amount
+        else:
+            ub = buy_amount - 1
+    return lb
+
+
+def min_buy_amount_within_min_tradable_amount(
+    order, buy_amount_lb, prices, fee, config
+):
+    """Smallest buy amount in [buy_amount_lb, order.buy_amount] not violating
+    the min tradable amount constraint (found by binary search)."""
+    lb, ub = max(buy_amount_lb, config.MIN_TRADABLE_AMOUNT), order.buy_amount
+    if lb > ub:
+        return order.buy_amount
+    while lb < ub:
+        buy_amount = (lb + ub) // 2
+        sell_amount = order.get_sell_amount_from_buy_amount(
+            prices, fee, IntegerTraits, buy_amount=buy_amount
+        )
+        if sell_amount >= config.MIN_TRADABLE_AMOUNT:
+            ub = buy_amount
+        else:
+            lb = buy_amount + 1
+    return ub
+
+
+def repair_leaf_token(
+    leaf_token, parent_token, orders, token_balances, prices, fee, config,
+    context=NULL_CONTEXT
+):
+    """Spread the remaining imbalance of leaf_token over several orders.
+
+    Used when round_leaf_token could not move the imbalance to a single order.
+    Each order selling parent_token for leaf_token absorbs as much of the
+    imbalance as its max sell amount and min tradable amount allow.
+    """
+    for order in orders:
+        imbalance = token_balances[leaf_token]
+        if imbalance == 0:
+            break
+
+        if imbalance > 0:
+            new_buy_amount = max_buy_amount_within_max_sell_amount(
+                order, order.buy_amount + imbalance, prices, fee
+            )
+        else:
+            new_buy_amount = min_buy_amount_within_min_tradable_amount(
+                order, order.buy_amount + imbalance, prices, fee, config
+            )
+
+        if new_buy_amount == order.buy_amount:
+            continue
+
+        old_buy_amount, old_sell_amount = order.buy_amount, order.sell_amount
+        order.buy_amount = new_buy_amount
+        order.set_sell_amount_from_buy_amount(prices, fee, IntegerTraits)
+        token_balances[leaf_token] -= order.buy_amount - old_buy_amount
+        token_balances[parent_token] += order.sell_amount - old_sell_amount
+
+        context.trace.record(
+            'repair', order=order.id, token=leaf_token,
+            buy_amount=(old_buy_amount, order.buy_amount),
+            sell_amount=(old_sell_amount, order.sell_amount)
+        )
+        logger.debug("Repairing order %s:", order.id)
+        logger.debug(
+            "\t(old) buy_amount : %25d  -- sell_amount: %25d",
+            old_buy_amount, old_sell_amount
+        )
+        logger.debug(
+            "\t(new) buy_amount : %25d  -- sell_amount: %25d",
+            order.buy_amount, order.sell_amount
+        )
+
+
+def log_token_balances(when, token_balances):
+    """Log the table of token balances (at debug level)."""
+    logger.debug("Token balances (%s):", when)
+    for token, balance in token_balances.items():
+        logger.debug("\t%5s : %28d", token, balance)
+
+
+def round_solution(prices, orders, fee, config=None, context=NULL_CONTEXT):
+    """Round the amounts of a solution to integers, and return whether it
+    could be done without violating the order constraints.
+
+    The outcome is counted in the metrics of the solve: 'rounding_rounded'
+    if imbalances were moved to the fee token one order at a time,
+    'rounding_repaired' if some imbalance had to be spread over several
+    orders, 'rounding_failed' if the solution could not be rounded.
+    """
+    if config is None:
+        config = Config.snapshot()
 
     # Iterate over orders and round amounts.
     for order in orders:
@@ -187,9 +389,8 @@ def round_solution(prices, orders, fee):
         order.set_sell_amount_from_buy_amount(prices, fee, IntegerTraits)
 
     token_balances = compute_token_balances(prices.keys(), orders)
-    logging.debug("Token balances (initial):")
-    for token, balance in token_balances.items():
-        logging.debug("\t%5s : %28d", token, balance)
+    if logger.isEnabledFor(logging.DEBUG):
+        log_token_balances("initial", token_balances)
 
     # Compute spanning tree of orders with fee token as root.
     tree = compute_spanning_order_arborescence(
@@ -197,32 +398,51 @@ def round_solution(prices, orders, fee):
         fee
     )
 
-    # Iteratively move rounding errors towards fee token.
-    while tree:
+    # Executed orders per tree edge, sorted once for all leaves.
+    orders_by_token_pair = index_orders_by_token_pair(orders)
+
+    # Iteratively move rounding errors towards fee token, visiting each token
+    # only after all its children were visited.
+    nr_children = Counter(tree.values())
+    leaf_tokens = deque(token for token in tree if nr_children[token] == 0)
+    repaired = False
+    while leaf_tokens:
 
-        # Find leaf and parent node.
-        leaf_token = [
-            child for child in tree.keys()
-            if child not in tree.values()
-        ][0]
+        leaf_token = leaf_tokens.popleft()
         parent_token = tree[leaf_token]
 
         if token_balances[leaf_token] != 0:
             round_leaf_token(
-                leaf_token, parent_token, orders, token_balances, prices, fee
+                leaf_token, parent_token,
+                orders_by_token_pair[parent_token, leaf_token],
+                token_balances, prices, fee, config, context
+            )
+
+        # If no single order could absorb the imbalance, try to spread it.
+        if token_balances[leaf_token] != 0:
+            repaired = True
+            repair_leaf_token(
+                leaf_token, parent_token,
+                orders_by_token_pair[parent_token, leaf_token],
+                token_balances, prices, fee, config, context
             )
 
-        # Compute and check updated token balances.
-        token_balances = compute_token_balances(prices.keys(), orders)
-        logging.debug("Token balances (after balancing %s):", leaf_token)
-        for token, balance in token_balances.items():
-            logging.debug("\t%5s : %28d", token, balance)
+        # Check updated token balances (which are kept up to date by
+        # round_leaf_token).
+        if logger.isEnabledFor(logging.DEBUG):
+            log_token_balances(f"after balancing {leaf_token}", token_balances)
 
         # If it is not possible to round, return false.
         # This can happen if rounding buffer was too small.
         if token_balances[leaf_token] != 0:
+            context.metrics.count('rounding_failed')
             return False
 
-        del tree[leaf_token]
+        # Parent becomes a leaf once all its children are balanced.
+        nr_children[parent_token] -= 1
+        if nr_children[parent_token] == 0 and parent_token in tree:
+            leaf_tokens.append(parent_token)
 
+    outcome = 'repaired' if repaired else 'rounded'
+    context.metrics.count('rounding_' + outcome)
     return True
@@ -0,0 +1,326 @@
+"""Binary snapshots of instances.
+
+A snapshot stores the orders and accounts of an instance as fixed-width
+integer columns, with tokens, account ids and other strings in a string
+table. Loading a snapshot memory-maps the file and reads the columns in
+place, skipping json parsing entirely.
+
+Layout (little-endian, every section padded to a multiple of 8 bytes):
+
+    header           MAGIC, then the sizes in HEADER
+    metadata         json text of the instance, with null orders and accounts
+    string offsets   uint64 x (nr_strings + 1)
+    string data      utf-8
+    accounts         uint32 x nr_accounts (string index of account id)
+    orders           uint32 x nr_orders x 4 (account, sell token, buy token,
+                     string index of the json text of the order, with
+                     placeholders for the fields stored in columns),
+                     uint256 x nr_orders x 2 (sell amount, buy amount)
+    balances         uint32 x nr_balances x 2 (account, token),
+                     uint256 x nr_balances (balance)
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from decimal import Decimal as D
+from sys import intern
+
+from .config import Config
+from .order import Order
+from .stream import JSONStreamReader
+from .util import gc_paused
+
+MAGIC = b'GPSNAP02'
+HEADER = struct.Struct('<8s6Q')
+
+# Size of amounts, in bytes.
+AMOUNT_SIZE = 32
+
+# Order fields stored in columns. Other fields are stored as json text.
+ORDER_COLUMN_FIELDS = (
+    'accountID', 'sellToken', 'buyToken', 'sellAmount', 'buyAmount'
+)
+
+# Placeholders of the column fields in the json text of an order. Amounts
+# given as integers rather than decimal strings are loaded back as integers.
+STRING_PLACEHOLDER = 'null'
+STRING_AMOUNT_PLACEHOLDER = '""'
+INT_AMOUNT_PLACEHOLDER = '0'
+
+
+def _padding(size):
+    return b'\0' * (-size % 8)
+
+
+def _to_amount_bytes(amount):
+    """Encode an integer amount, or its decimal string, as uint256."""
+    if type(amount) is str and amount.isdigit() and amount.isascii():
+        amount = int(amount)
+    if type(amount) is not int or not 0 <= amount < 2**(8 * AMOUNT_SIZE):
+        raise ValueError(f"Can not store amount {amount!r} in a snapshot.")
+    return amount.to_bytes(AMOUNT_SIZE, 'little')
+
+
+def _uint32_bytes(values):
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+class StringTable:
+    """Interned strings, by index of first insertion."""
+
+    def __init__(self):
+        self._indexes = {}
+
+    def index(self, string):
+        index = self._indexes.get(string)
+        if index is None:
+            index = self._indexes[string] = len(self._indexes)
+        return index
+
+    def to_bytes(self):
+        data = bytearray()
+        offsets = array('Q', [0])
+        for string in self._indexes:
+            data += string.encode()
+            offsets.append(len(data))
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        return offsets.tobytes(), bytes(data)
+
+
+def write_snapshot(instance_fd, snapshot_fd):
+    """Convert an instance json file into a snapshot, written to a binary file.
+
+    Raises:
+        ValueError: If an order amount or balance is not an integer that
+            fits in 256 bits.
+    """
+    reader = JSONStreamReader(instance_fd)
+    metadata = []
+    strings = StringTable()
+    accounts = array('I')
+    order_columns = array('I')
+    order_amounts = bytearray()
+    balance_columns = array('I')
+    balance_amounts = bytearray()
+
+    for key in reader.iter_object():
+        if key == 'orders':
+            for _ in reader.iter_array():
+                # Other fields are stored as their json text, so that they
+                # are loaded exactly as they would be from the json file, in
+                # their original order among the column fields.
+                order_dict = {}
+                fields = []
+                for field in reader.iter_object():
+                    value, text = reader.read_value()
+                    if field in ORDER_COLUMN_FIELDS:
+                        order_dict[field] = value
+                        if field not in ('sellAmount', 'buyAmount'):
+                            text = STRING_PLACEHOLDER
+                        elif type(value) is int:
+                            text = INT_AMOUNT_PLACEHOLDER
+                        else:
+                            text = STRING_AMOUNT_PLACEHOLDER
+                    fields.append(f'{json.dumps(field)}: {text}')
+                order_columns.extend((
+                    strings.index(order_dict['accountID']),
+                    strings.index(order_dict['sellToken']),
+                    strings.index(order_dict['buyToken']),
+                    strings.index('{' + ', '.join(fields) + '}')
+                ))
+                order_amounts += _to_amount_bytes(order_dict['sellAmount'])
+                order_amounts += _to_amount_bytes(order_dict['buyAmount'])
+            text = 'null'
+        elif key == 'accounts':
+            for account_id in reader.iter_object():
+                account_index = strings.index(account_id)
+                accounts.append(account_index)
+                balances, _ = reader.read_value()
+                for token, balance in balances.items():
+                    balance_columns.extend(
+                        (account_index, strings.index(token))
+                    )
+                    balance_amounts += _to_amount_bytes(balance)
+            text = 'null'
+        else:
+            _, text = reader.read_value()
+        metadata.append(f'{json.dumps(key)}: {text}')
+    reader.expect_end()
+
+    metadata = ('{' + ', '.join(metadata) + '}').encode()
+    string_offsets, string_data = strings.to_bytes()
+    nr_orders = len(order_amounts) // (2 * AMOUNT_SIZE)
+    nr_balances = len(balance_amounts) // AMOUNT_SIZE
+
+    snapshot_fd.write(HEADER.pack(
+        MAGIC, len(metadata), len(string_offsets) // 8 - 1, len(string_data),
+        len(accounts), nr_orders, nr_balances
+    ))
+    for section in (
+        metadata, string_offsets, string_data, _uint32_bytes(accounts),
+        _uint32_bytes(order_columns), bytes(order_amounts),
+        _uint32_bytes(balance_columns), bytes(balance_amounts)
+    ):
+        snapshot_fd.write(section)
+        snapshot_fd.write(_padding(len(section)))
+
+
+class SnapshotReader:
+    """Sections of a memory-mapped snapshot, as memoryviews.
+
+    The sections can not be read once the reader is closed.
+    """
+
+    def __init__(self, fd):
+        self._buffer = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        (
+            magic, metadata_size, nr_strings, string_data_size, nr_accounts,
+            self.nr_orders, self.nr_balances
+        ) = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC:
+            raise ValueError("Not an instance snapshot.")
+        self._view = memoryview(self._buffer)
+        self._views.append(self._view)
+        self._pos = HEADER.size
+
+        self.metadata = self._section(metadata_size)
+        string_offsets = self._section(8 * (nr_strings + 1), 'Q')
+        string_data = str(self._section(string_data_size), 'utf-8')
+        self.strings = [
+            intern(string_data[string_offsets[i]:string_offsets[i + 1]])
+            for i in range(nr_strings)
+        ]
+        self.accounts = self._section(4 * nr_accounts, 'I')
+        self.order_columns = self._section(4 * 4 * self.nr_orders, 'I')
+        self.order_amounts = self._section(2 * AMOUNT_SIZE * self.nr_orders)
+        self.balance_columns = self._section(4 * 2 * self.nr_balances, 'I')
+        self.balance_amounts = self._section(AMOUNT_SIZE * self.nr_balances)
+
+    def _section(self, size, format='B'):
+        view = self._view[self._pos:self._pos + size]
+        self._views.append(view)
+        self._pos += size + (-size % 8)
+        if format == 'B':
+            return view
+        if sys.byteorder != 'little':
+            # Swap a copy to native byte order.
+            values = array(format, view.tobytes())
+            values.byteswap()
+            return memoryview(values)
+        view = view.cast(format)
+        self._views.append(view)
+        return view
+
+    def close(self):
+        """Release the sections, and unmap the snapshot."""
+        # Views must be released before the views they were made from.
+        while self._views:
+            self._views.pop().release()
+        self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def amount(self, amounts, index):
+        return int.from_bytes(
+            amounts[AMOUNT_SIZE * index:AMOUNT_SIZE * (index + 1)], 'little'
+        )
+
+
+class SnapshotOrders(Sequence):
+    """The orders of an instance loaded by `load_snapshot`.
+
+    Indexing returns the order dict as parsed from the json file (with the
+    same key order and amount types), built from the snapshot columns. The
+    Order objects, with ids given by their index, are in `orders` (as for
+    `stream.StreamedOrders`).
+    """
+
+    def __init__(self, reader):
+        self.orders = []
+        self._reader = reader
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if not -len(self) <= index < len(self):
+            raise IndexError("order index out of range")
+        index %= len(self)
+        text = self._reader.strings[self._reader.order_columns[4 * index + 3]]
+        order_dict = json.loads(text, parse_float=D)
+        # Replacing the placeholders keeps the key order of the json file.
+        for field, value in self.column_fields(index).items():
+            if field in ('sellAmount', 'buyAmount') and \
+                    type(order_dict[field]) is str:
+                value = str(value)
+            order_dict[field] = value
+        return order_dict
+
+    def column_fields(self, index):
+        """Return a dict of the order fields stored in columns (see
+        ORDER_COLUMN_FIELDS), with amounts as integers."""
+        reader = self._reader
+        columns = reader.order_columns
+        strings = reader.strings
+        return {
+            'accountID': strings[columns[4 * index]],
+            'sellToken': strings[columns[4 * index + 1]],
+            'buyToken': strings[columns[4 * index + 2]],
+            'sellAmount': reader.amount(reader.order_amounts, 2 * index),
+            'buyAmount': reader.amount(reader.order_amounts, 2 * index + 1)
+        }
+
+    def __len__(self):
+        return self._reader.nr_orders
+
+    def close(self):
+        """Close the snapshot. Order dicts can not be built anymore."""
+        self._reader.close()
+
+
+def load_snapshot(fd, config=None, order_filter=None):
+    """Load an instance from a snapshot file (opened in binary mode).
+
+    Returns the instance dict, with the orders as SnapshotOrders. As for
+    `stream.load_instance`, order dicts for which order_filter returns False
+    are skipped (only the fields stored in columns are passed to it), and the
+    Order objects are meant to be solved once. The snapshot stays mapped
+    until the orders are closed.
+    """
+    if config is None:
+        config = Config.snapshot()
+    reader = SnapshotReader(fd)
+    strings = reader.strings
+    instance = json.loads(str(reader.metadata, 'utf-8'), parse_float=D)
+
+    with gc_paused():
+        accounts = {strings[account]: {} for account in reader.accounts}
+        balance_columns = reader.balance_columns
+        for index in range(reader.nr_balances):
+            account = strings[balance_columns[2 * index]]
+            token = strings[balance_columns[2 * index + 1]]
+            accounts[account][token] = str(
+                reader.amount(reader.balance_amounts, index)
+            )
+
+        orders = SnapshotOrders(reader)
+        for index in range(reader.nr_orders):
+            order_dict = orders.column_fields(index)
+            if order_filter is None or order_filter(order_dict):
+                orders.orders.append(
+                    Order.load_from_dict(order_dict, str(index), config)
+                )
+
+    instance['accounts'] = accounts
+    instance['orders'] = orders
+    return instance
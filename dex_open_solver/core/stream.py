@@ -0,0 +1,233 @@
+"""Incremental loading of instance json files, and writing of solution files.
+
+Parsing an instance with `json.load` keeps the whole file text, the full
+instance dict and, once loaded, all Order objects in memory at the same time.
+Here the file is read in chunks and orders are converted to Order objects as
+soon as they are parsed. Of each order dict only its json text is kept, which
+is what is needed to dump it in the solution if it gets touched.
+
+Solutions are written item by item (see `write_json`), instead of being
+serialized as a whole by `json.dump`.
+"""
+import json
+import re
+from collections.abc import Sequence
+from decimal import Decimal as D
+from sys import intern
+
+from .config import Config
+from .order import Order
+from .util import gc_paused, intern_balances
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class JSONStreamReader:
+    """Reads json values from a file, one at a time.
+
+    Objects and arrays can be iterated item by item (see `iter_object` and
+    `iter_array`) so that only one item needs to be held in the buffer.
+    """
+
+    def __init__(self, fd, chunk_size=2**16):
+        self._fd = fd
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder(parse_float=D)
+        self._buffer = ''
+        self._pos = 0
+
+    def _fill(self):
+        """Append the next chunk of the file to the unconsumed buffer.
+
+        Returns False if the end of the file was reached.
+        """
+        chunk = self._fd.read(self._chunk_size)
+        if not chunk:
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Skip whitespace and return the next character ('' at end of file)."""
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars):
+        """Consume the next character, which must be one of chars."""
+        char = self.peek()
+        if char == '' or char not in chars:
+            raise json.JSONDecodeError(
+                f"Expecting one of '{chars}'", self._buffer, self._pos
+            )
+        self._pos += 1
+        return char
+
+    def read_value(self):
+        """Parse the next json value. Returns the value and its json text."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk.
+            if end == len(self._buffer) and self._fill():
+                continue
+            break
+        text = self._buffer[self._pos:end]
+        self._pos = end
+        return value, text
+
+    def iter_object(self):
+        """Iterate through the keys of the next json object.
+
+        The value of each key must be consumed before advancing to the next.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key, _ = self.read_value()
+            if not isinstance(key, str):
+                raise json.JSONDecodeError(
+                    "Expecting property name", self._buffer, self._pos
+                )
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def iter_array(self):
+        """Iterate through the indexes of the next json array.
+
+        Each item must be consumed before advancing to the next.
+        """
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            if self.expect(',]') == ']':
+                return
+
+    def expect_end(self):
+        if self.peek() != '':
+            raise json.JSONDecodeError("Extra data", self._buffer, self._pos)
+
+
+class StreamedOrders(Sequence):
+    """The orders of an instance loaded by `load_instance`.
+
+    Indexing returns the original order dict (parsed again from its json text).
+    The Order objects, with ids given by their index, are in `orders`.
+    Skipped orders are counted, but neither loaded nor kept.
+    """
+
+    def __init__(self):
+        self.orders = []
+        self._texts = []
+
+    def append(self, order_dict, text, config=None):
+        self.orders.append(
+            Order.load_from_dict(order_dict, str(len(self._texts)), config)
+        )
+        self._texts.append(text)
+
+    def skip(self):
+        self._texts.append(None)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return json.loads(self._texts[index], parse_float=D)
+
+    def __len__(self):
+        return len(self._texts)
+
+    def close(self):
+        """Nothing to release (see `snapshot.SnapshotOrders.close`)."""
+
+
+def load_instance(fd, config=None, order_filter=None, chunk_size=2**16):
+    """Load an instance json from a file, parsing orders and accounts
+    incrementally.
+
+    Returns the instance dict, with the orders as StreamedOrders. If
+    order_filter is given, order dicts for which it returns False are skipped.
+    The Order objects are meant to be solved once: `load_problem` uses them
+    and the instance accounts as they are, instead of creating copies.
+    """
+    if config is None:
+        config = Config.snapshot()
+    reader = JSONStreamReader(fd, chunk_size)
+    instance = {}
+    with gc_paused():
+        for key in reader.iter_object():
+            if key == 'orders':
+                orders = StreamedOrders()
+                for _ in reader.iter_array():
+                    order_dict, text = reader.read_value()
+                    if order_filter is None or order_filter(order_dict):
+                        orders.append(order_dict, text, config)
+                    else:
+                        orders.skip()
+                instance[key] = orders
+            elif key == 'accounts':
+                accounts = {}
+                for account_id in reader.iter_object():
+                    balances, _ = reader.read_value()
+                    accounts[intern(account_id)] = intern_balances(balances)
+                instance[key] = accounts
+            else:
+                instance[key], _ = reader.read_value()
+    reader.expect_end()
+    return instance
+
+
+def write_json(obj, fd, indent=4):
+    """Write a dict as json to a file, one item at a time.
+
+    The output is the same as `json.dump(obj, fd, indent=indent)`, or compact
+    (without any whitespace) if indent is None. Nested dicts (e.g. the
+    solution accounts) are never serialized as a whole: only their leaf
+    values are encoded, which strings and numbers are by the C json encoder.
+    """
+    if indent is None:
+        encoder = json.JSONEncoder(separators=(',', ':'))
+        newline, separator = '', ':'
+    else:
+        encoder = json.JSONEncoder(indent=indent)
+        newline, separator = '\n', ': '
+
+    def write_value(value, level):
+        if isinstance(value, dict):
+            if not value:
+                fd.write('{}')
+                return
+            item_indent = newline + ' ' * ((indent or 0) * (level + 1))
+            delimiter = '{' + item_indent
+            for key, item in value.items():
+                fd.write(delimiter)
+                fd.write(encoder.encode(key))
+                fd.write(separator)
+                write_value(item, level + 1)
+                delimiter = ',' + item_indent
+            fd.write(newline + ' ' * ((indent or 0) * level) + '}')
+        else:
+            text = encoder.encode(value)
+            if level > 0 and indent is not None and '\n' in text:
+                text = text.replace('\n', '\n' + ' ' * (indent * level))
+            fd.write(text)
+
+    write_value(obj, 0)
@@ -0,0 +1,79 @@
+"""Structured trace of the decisions of a solve, kept in memory.
+
+Solvers record them in the trace of their SolveContext, which does nothing
+unless the solve has its own TraceBuffer (as solve_instance gives it). A
+TraceBuffer keeps the last TRACE_CAPACITY records in a ring buffer: recording
+only appends the values, nothing is formatted unless the trace is dumped,
+so it is cheap enough to be always on.
+
+The trace is dumped when asked (`gp_match --trace trace.jsonl ...`), and when
+a solution fails validation. It is written as JSON Lines, one record per
+line, with numbers as strings (rationals as 'n/d'):
+
+    {"kind": "interval", "xrate_lb": "1/2", "xrate_ub": "3/4", ...}
+
+Records:
+    pair            token_pair (start of the matching of a token pair)
+    interval        xrate_lb, xrate_ub, and the exchange rate candidates in
+                    the interval, as [xrate, root_ids, objective]
+    xrate           token_pair, xrate (optimal exchange rate found)
+    f_orders        token_pair, nr_exec_f_orders, objective (number of
+                    orders selling fee chosen)
+    round, repair   order, token, buy_amount and sell_amount as [old, new]
+                    (rounding adjustments, see round.round_solution)
+"""
+import json
+import logging
+import os
+from collections import deque
+
+from .util import stringify_numeric
+
+logger = logging.getLogger(__name__)
+
+# Number of records kept (older ones are dropped).
+TRACE_CAPACITY = 4096
+
+
+class TraceBuffer:
+    """The last records of a solve, to be dumped to filename (or a file in
+    a temp directory if None)."""
+
+    def __init__(self, filename=None, capacity=TRACE_CAPACITY):
+        self.filename = filename
+        self.records = deque(maxlen=capacity)
+
+    def record(self, kind, **fields):
+        self.records.append((kind, fields))
+
+    def dump(self):
+        """Write the records to the trace file, and return its name."""
+        filename = self.filename
+        if filename is None:
+            import tempfile
+            fd, filename = tempfile.mkstemp(prefix='trace-', suffix='.jsonl')
+            os.close(fd)
+        with open(filename, 'w') as fd:
+            for kind, fields in self.records:
+                fd.write(json.dumps(
+                    dict(kind=kind, **stringify_numeric(fields)),
+                    separators=(',', ':')
+                ))
+                fd.write('\n')
+        logger.info(
+            "Trace of %d records written to '%s'.", len(self.records), filename
+        )
+        return filename
+
+
+class NullTrace:
+    """Trace that is not recorded (the default of every solve)."""
+
+    def record(self, kind, **fields):
+        pass
+
+    def dump(self):
+        return None
+
+
+NULL_TRACE = NullTrace()
@@ -1,5 +1,23 @@
+from contextlib import contextmanager
 from fractions import Fraction as F
+import gc
+import importlib
 import logging
+import os
+import signal
+import sys
+
+
+# Modules (de)compressing files, by file extension.
+COMPRESSION_MODULES = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'lzma',
+    '.lzma': 'lzma'
+}
+
+# Extension of instance snapshot files (see core.snapshot).
+SNAPSHOT_EXTENSION = '.snapshot'
 
 
 def transform(obj, transformer):
@@ -21,6 +39,20 @@ def stringify_numeric(obj):
     return transform(obj, transformer)
 
 
+def intern_accounts(accounts):
+    """Return a copy of the accounts dict with interned account ids and
+    tokens (see `Order.load_from_dict`)."""
+    return {
+        sys.intern(account_id): intern_balances(balances)
+        for account_id, balances in accounts.items()
+    }
+
+
+def intern_balances(balances):
+    """Return a copy of an account balances dict with interned tokens."""
+    return {sys.intern(token): balance for token, balance in balances.items()}
+
+
 class PrettyFloat(float):
     def __str__(self):
         return '%.3e' % self
@@ -37,6 +69,10 @@ class PrettyFraction(F):
         return self.__str__()
 
 
+# Types of log record args that LoggerFormatter does not need to convert.
+PLAIN_LOG_ARG_TYPES = frozenset([str, int, float, bool, type(None)])
+
+
 class LoggerFormatter(logging.Formatter):
     def __init__(self, *args, **kwargs):
         self.rationals = 'rationals' in kwargs.keys() and kwargs['rationals']
@@ -53,15 +89,95 @@ class LoggerFormatter(logging.Formatter):
             return PrettyFraction(obj)
         return obj
 
-    def format(self, record):
-        if not self.rationals:
-            record.args = transform(record.args, self.transform_fractions_to_floats)
+    def convert_args(self, args):
+        """Return the record args with fractions made pretty.
+
+        Only containers are walked, scalar args that are not fractions
+        are kept as is.
+        """
+        if self.rationals:
+            transformer = self.prettify_fractions
         else:
-            record.args = transform(record.args, self.prettify_fractions)
+            transformer = self.transform_fractions_to_floats
+        if isinstance(args, dict):
+            return transform(args, transformer)
+        return tuple(
+            arg if type(arg) in PLAIN_LOG_ARG_TYPES else transform(arg, transformer)
+            for arg in args
+        )
+
+    def format(self, record):
+        if record.args:
+            record.args = self.convert_args(record.args)
         text = f'{record.levelname:7s}::{record.module:<11s}: {record.getMessage()}'
         return text
 
 
+def setup_logging(level, rationals=False):
+    """Log to stderr using LoggerFormatter at the given level name."""
+    log_level = getattr(logging, level)
+    handler = logging.StreamHandler()
+    formatter = LoggerFormatter(style='{', rationals=rationals)
+    handler.setFormatter(formatter)
+    logging.basicConfig(level=log_level, style='{', handlers=[handler])
+
+
 class classproperty(property):
     def __get__(self, cls, owner):
         return classmethod(self.fget).__get__(None, owner)()
+
+
+@contextmanager
+def gc_paused():
+    """Pause the cyclic garbage collector.
+
+    Creating many objects that do not form reference cycles (e.g. when loading
+    orders) otherwise triggers many useless collections.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+@contextmanager
+def stopping_on_signals(deadline, signums=(signal.SIGTERM, signal.SIGINT)):
+    """Stop a deadline (see context.Deadline) on SIGTERM or SIGINT, so that
+    the solve returns the best solution found so far instead of being killed.
+
+    Only the first signal is handled: the handlers in place before are
+    restored by it, so that a second signal has the usual effect.
+    """
+    previous_handlers = {}
+
+    def handler(signum, frame):
+        deadline.stop()
+        for restored_signum, previous_handler in previous_handlers.items():
+            signal.signal(restored_signum, previous_handler)
+
+    for signum in signums:
+        previous_handlers[signum] = signal.signal(signum, handler)
+    try:
+        yield
+    finally:
+        for signum, previous_handler in previous_handlers.items():
+            signal.signal(signum, previous_handler)
+
+
+def open_file(filename, mode='r'):
+    """Open a file in text mode, (de)compressing it according to its
+    extension (see COMPRESSION_MODULES).
+
+    Compressed files are (de)compressed incrementally as they are read or
+    written. Snapshot files are opened in binary mode.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == SNAPSHOT_EXTENSION:
+        return open(filename, mode + 'b')
+    if extension in COMPRESSION_MODULES:
+        module = importlib.import_module(COMPRESSION_MODULES[extension])
+        return module.open(filename, mode + 't')
+    return open(filename, mode)
@@ -4,7 +4,7 @@ from .config import Config
 from .orderbook import count_nr_exec_orders
 
 
-def validate_order_constraints(order, buy_amount, sell_amount):
+def validate_order_constraints(order, buy_amount, sell_amount, config):
     # Limit exchange rate constraint
     assert buy_amount == 0 or F(sell_amount, buy_amount) <= order.max_xrate
 
@@ -12,8 +12,8 @@ def validate_order_constraints(order, buy_amount, sell_amount):
     assert sell_amount <= order.max_sell_amount
 
     # Minimum tradable amount constraint
-    assert buy_amount == 0 or buy_amount >= Config.MIN_TRADABLE_AMOUNT
-    assert sell_amount == 0 or sell_amount >= Config.MIN_TRADABLE_AMOUNT
+    assert buy_amount == 0 or buy_amount >= config.MIN_TRADABLE_AMOUNT
+    assert sell_amount == 0 or sell_amount >= config.MIN_TRADABLE_AMOUNT
 
 
 def validate(
@@ -21,14 +21,13 @@ def validate(
     orders,
     prices,
     fee,
-    max_nr_exec_orders=None
+    max_nr_exec_orders=None,
+    config=None
 ):
-    # NOTE: do not add this as a default parameter above, since
-    # default parameters are evaluated when the function is defined, and
-    # not when it is called. This means that runtime changes to the Config
-    # singleton would not be reflected.
+    if config is None:
+        config = Config.snapshot()
     if max_nr_exec_orders is None:
-        max_nr_exec_orders = Config.MAX_NR_EXEC_ORDERS
+        max_nr_exec_orders = config.MAX_NR_EXEC_ORDERS
 
     assert all(price.denominator == 1 for price in prices.values())
 
@@ -53,7 +52,9 @@ def validate(
 
     # Validate order constraints, and collect token and account balances.
     for order in orders:
-        validate_order_constraints(order, order.buy_amount, order.sell_amount)
+        validate_order_constraints(
+            order, order.buy_amount, order.sell_amount, config
+        )
         token_balances[order.buy_token] -= order.buy_amount
         token_balances[order.sell_token] += order.sell_amount
         token_balance_account[order.account_id][order.buy_token] += order.buy_amount
@@ -71,11 +72,11 @@ def validate(
 
     # Min average fee:
     total_fees = token_balances[fee.token]
-    assert total_fees / nr_exec_orders >= Config.MIN_AVERAGE_ORDER_FEE
+    assert total_fees / nr_exec_orders >= config.MIN_AVERAGE_ORDER_FEE
 
     # Min absolute fee:
     assert all(
-        o.fee(prices, fee) >= Config.MIN_ABSOLUTE_ORDER_FEE
+        o.fee(prices, fee) >= config.MIN_ABSOLUTE_ORDER_FEE
         for o in orders if o.sell_token != fee.token and o.buy_amount > 0
     )
 
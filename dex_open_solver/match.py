@@ -1,33 +1,118 @@
 import argparse
+import importlib
 import logging
+import sys
 from fractions import Fraction as F
 
-from .best_token_pair_solver.solver import \
+from .best_token_pair_solver.cli import \
     setup_arg_parser as setup_best_token_pair_parser
-from .core.util import LoggerFormatter
-from .token_pair_solver.solver import \
+from .core.util import open_file, setup_logging
+from .token_pair_solver.cli import \
     setup_arg_parser as setup_token_pair_solver_parser
 from .core.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Commands that do not solve a given instance file, and therefore have their
+# own argument parser: `gp_match <command> [args]`.
+# Maps command name to the module implementing its `main(argv)`, and its help.
+COMMANDS = {
+    'serve': (
+        'dex_open_solver.server',
+        "Solve instances posted over a local socket."
+    ),
+    'convert': (
+        'dex_open_solver.convert',
+        "Convert an instance json file into a binary snapshot."
+    ),
+    'batch': (
+        'dex_open_solver.batch',
+        "Solve instances read as JSON Lines."
+    ),
+    'merge': (
+        'dex_open_solver.merge',
+        "Select the best of the solutions of best-token-pair shards."
+    )
+}
+
+
+def setup_command_parser():
+    """Return the parser of `gp_match <command> [args]`.
+
+    Only the command is parsed: the remaining arguments are left to the
+    parser of the command module (so that `gp_match <command> -h` shows its
+    help).
+    """
+    parser = argparse.ArgumentParser(
+        prog='gp_match',
+        description="Run a gp_match command."
+    )
+    subparsers = parser.add_subparsers(
+        title='command',
+        dest='command',
+        description="valid commands",
+        help="run `gp_match command -h` for help on a command"
+    )
+    for command, (_, help) in COMMANDS.items():
+        subparsers.add_parser(command, help=help, add_help=False)
+    return parser
+
+
+def commands_help():
+    """Return the help on COMMANDS, shown by `gp_match -h`."""
+    return "commands (run `gp_match <command> -h` for help on a command):\n" + \
+        "".join(
+            f"  gp_match {command:<10s}{help}\n"
+            for command, (_, help) in COMMANDS.items()
+        )
+
+
+def instance_file(filename):
+    """Open an instance file for reading ('-' for stdin), decompressing it
+    if its extension is .gz, .bz2 or .xz. Snapshot files (written by
+    `gp_match convert`) are opened in binary mode.
+    """
+    if filename == '-':
+        return sys.stdin
+    try:
+        return open_file(filename)
+    except OSError as e:
+        raise argparse.ArgumentTypeError(f"can't open '{filename}': {e}")
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if len(argv) > 0 and argv[0] in COMMANDS:
+        args, command_argv = setup_command_parser().parse_known_args(argv)
+        command_module = importlib.import_module(COMMANDS[args.command][0])
+        return command_module.main(command_argv)
 
-def main():
     parser = argparse.ArgumentParser(
-        description="Match orders in an orderbook."
+        description="Match orders in an orderbook.",
+        epilog=commands_help(),
+        formatter_class=argparse.RawDescriptionHelpFormatter
     )
     parser.add_argument(
         'instance',
-        type=argparse.FileType('r'),
-        help="File containing the instance to solve."
+        type=instance_file,
+        help="File containing the instance to solve "
+             "(possibly compressed: .gz, .bz2 or .xz, or a .snapshot file)."
     )
     parser.add_argument(
         '--solution',
         type=str,
         default=None,
-        help="File where the solution should be output to. "
+        help="File where the solution should be output to, compressed if "
+             "its extension is .gz, .bz2 or .xz. "
              "(by default creates a file in a temp directory)"
     )
+    parser.add_argument(
+        '--compact-solution',
+        action='store_true',
+        help="Write the solution json without indentation."
+    )
     parser.add_argument(
         '--logging',
         choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
@@ -61,6 +146,23 @@ def main():
         type=int,
         help="Maximum time for solving, in seconds."
     )
+    parser.add_argument(
+        '--trace',
+        type=str,
+        default=None,
+        help="File where the trace of the solve (exchange rate candidates, "
+             "rounding adjustments, ...) should be output to, as JSON Lines. "
+             "(by default only written, in a temp directory, if the solution "
+             "is not valid)"
+    )
+    parser.add_argument(
+        '--profile',
+        choices=['cprofile', 'tracemalloc'],
+        default=None,
+        type=str,
+        help="Profile the run, and write the report (cProfile statistics or "
+             "memory peak and allocations) next to the solution file."
+    )
 
     subparsers = parser.add_subparsers(
         title='subcommand',
@@ -72,24 +174,28 @@ def main():
 
     setup_best_token_pair_parser(subparsers)
 
-    args = parser.parse_args()
-    log_level = getattr(logging, args.logging)
+    args = parser.parse_args(argv)
 
     args.solution_filename = args.solution
 
-    Config.MIN_AVERAGE_ORDER_FEE = args.min_avg_fee_per_order
     if args.min_abs_fee_per_order is None:
-        Config.MIN_ABSOLUTE_ORDER_FEE = Config.MIN_AVERAGE_ORDER_FEE
-    else:
-        Config.MIN_ABSOLUTE_ORDER_FEE = args.min_abs_fee_per_order
+        args.min_abs_fee_per_order = args.min_avg_fee_per_order
+    args.config = Config.snapshot(
+        MIN_AVERAGE_ORDER_FEE=args.min_avg_fee_per_order,
+        MIN_ABSOLUTE_ORDER_FEE=args.min_abs_fee_per_order
+    )
 
-    handler = logging.StreamHandler()
-    formatter = LoggerFormatter(style='{', rationals=args.log_rationals)
-    handler.setFormatter(formatter)
-    logging.basicConfig(level=log_level, style='{', handlers=[handler])
-    logger.setLevel(log_level)
+    setup_logging(args.logging, rationals=args.log_rationals)
+    logger.setLevel(args.logging)
 
-    args.exec_subcommand(args)
+    if args.profile is None:
+        args.exec_subcommand(args)
+    else:
+        from .profiling import run_profiled
+        run_profiled(
+            args.profile, args.solution_filename,
+            lambda: args.exec_subcommand(args)
+        )
 
 
 if __name__ == '__main__':
@@ -0,0 +1,128 @@
+"""Merge the solutions of best-token-pair shards.
+
+The token pairs of an instance can be split across hosts with
+`gp_match instance.json best-token-pair --shard K/N`. The solution with the
+highest objective among those of the N shards is the best-token-pair
+solution of the instance:
+
+    gp_match merge shard-1.json shard-2.json ... --solution solution.json
+
+Solutions of different instances (see `api.instance_digest`), or of
+different numbers of shards, are not merged.
+"""
+import argparse
+import json
+import logging
+from fractions import Fraction as F
+
+from .core.api import write_solution
+from .core.util import open_file, setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def select_best_solution(solutions):
+    """Return the index of the solution with the highest objective.
+
+    Solutions are compared as the best-token-pair solver compares the
+    solutions of token pairs: a solution replaces the best one so far only
+    if its objective is higher, and must be positive to replace the first
+    one (trivial solutions have zero objective).
+    """
+    best_objective = 0
+    best_index = 0
+    for index, solution in enumerate(solutions):
+        objective = F(solution['solver']['objective'])
+        if objective > best_objective:
+            best_objective = objective
+            best_index = index
+    return best_index
+
+
+def check_same_instance(solutions):
+    """Raise ValueError unless the solutions are of the same instance, and
+    of shards of the same number N of shards (or none is sharded)."""
+    digests = {solution['solver'].get('instance_digest') for solution in solutions}
+    if None in digests or len(digests) > 1:
+        raise ValueError("Solutions are not of the same instance.")
+    nr_shards = {
+        solution['solver']['shard'].split('/')[1]
+        if 'shard' in solution['solver'] else None
+        for solution in solutions
+    }
+    if len(nr_shards) > 1:
+        raise ValueError("Solutions are not of the same number of shards.")
+
+
+def missing_shards(solutions):
+    """Return the shards 'K/N' missing from the solutions of N shards."""
+    shards = {solution['solver'].get('shard') for solution in solutions}
+    nr_shards = {int(shard.split('/')[1]) for shard in shards if shard}
+    return sorted(
+        f'{k}/{n}' for n in nr_shards for k in range(1, n + 1)
+        if f'{k}/{n}' not in shards
+    )
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog='gp_match merge',
+        description="Select the best of the solutions of best-token-pair shards."
+    )
+    parser.add_argument(
+        'solutions',
+        type=str,
+        nargs='+',
+        help="Solution files of the shards (possibly compressed)."
+    )
+    parser.add_argument(
+        '--solution',
+        type=str,
+        default=None,
+        help="File where the merged solution should be output to. "
+             "(by default creates a file in a temp directory)"
+    )
+    parser.add_argument(
+        '--compact-solution',
+        action='store_true',
+        help="Write the solution json without indentation."
+    )
+    parser.add_argument(
+        '--logging',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        default='INFO',
+        type=str,
+        help="Logging level."
+    )
+    args = parser.parse_args(argv)
+
+    setup_logging(args.logging)
+
+    solutions = []
+    for solution_filename in args.solutions:
+        with open_file(solution_filename) as fd:
+            solution = json.load(fd)
+        if 'objective' not in solution.get('solver', {}):
+            parser.error(
+                f"'{solution_filename}' is not a best-token-pair solution."
+            )
+        solutions.append(solution)
+
+    try:
+        check_same_instance(solutions)
+    except ValueError as e:
+        parser.error(str(e))
+
+    for shard in missing_shards(solutions):
+        logger.warning("Missing the solution of shard %s.", shard)
+
+    best_index = select_best_solution(solutions)
+    logger.info(
+        "Best solution is '%s' (objective %s).",
+        args.solutions[best_index],
+        solutions[best_index]['solver']['objective']
+    )
+
+    write_solution(
+        solutions[best_index], args.solution, compact=args.compact_solution
+    )
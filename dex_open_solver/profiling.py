@@ -0,0 +1,119 @@
+"""Profile a gp_match run.
+
+    gp_match instance.json --solution solution.json --profile cprofile ...
+
+writes the cProfile statistics next to the solution, in solution.json.prof
+(to be read with pstats, snakeviz, ...), and
+
+    gp_match instance.json --solution solution.json --profile tracemalloc ...
+
+writes the peak of memory allocated, and the largest allocations still alive
+at the end of the run, in solution.json.tracemalloc.txt.
+
+In both cases a summary of the hot spots in the solver modules (see
+HOT_MODULES) is logged and written in solution.json.profile.txt.
+
+This module is only imported when profiling, so that it costs nothing
+otherwise.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import tempfile
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+# Modules where most of the solving time is spent.
+HOT_MODULES = ('xrate.py', 'amount.py', 'orderbook.py', 'round.py')
+
+# Number of functions (or lines) in summaries.
+TOP_N = 15
+
+# Number of frames kept for each allocation traced.
+TRACEMALLOC_NR_FRAMES = 10
+
+
+def report_basename(solution_filename):
+    """Return the filename that reports of a run are named after: its
+    solution file, or a file in a temp directory if none is given."""
+    if solution_filename is None:
+        fd, filename = tempfile.mkstemp(prefix='profile-')
+        os.close(fd)
+        return filename
+    return solution_filename
+
+
+def hot_module_pattern():
+    """Return the pstats restriction matching the functions of HOT_MODULES."""
+    return '(' + '|'.join(
+        module.replace('.', r'\.') for module in HOT_MODULES
+    ) + ')'
+
+
+def run_cprofile(run, basename):
+    """Run under cProfile, and write the statistics to basename.prof."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return run()
+    finally:
+        profiler.disable()
+        filename = basename + '.prof'
+        profiler.dump_stats(filename)
+
+        summary = io.StringIO()
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.strip_dirs().sort_stats('cumulative')
+        stats.print_stats(hot_module_pattern(), TOP_N)
+        write_summary(basename, filename, summary.getvalue())
+
+
+def run_tracemalloc(run, basename):
+    """Run under tracemalloc, and write a memory report to
+    basename.tracemalloc.txt."""
+    tracemalloc.start(TRACEMALLOC_NR_FRAMES)
+    try:
+        return run()
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        filename = basename + '.tracemalloc.txt'
+        with open(filename, 'w') as fd:
+            fd.write(f"Peak memory allocated: {peak / 2**20:.1f} MiB\n\n")
+            fd.write("Largest allocations alive at the end of the run:\n")
+            for statistic in snapshot.statistics('lineno')[:TOP_N]:
+                fd.write(f"{statistic}\n")
+
+        hot_snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(True, '*/' + module) for module in HOT_MODULES
+        ])
+        summary = f"Peak memory allocated: {peak / 2**20:.1f} MiB\n" + ''.join(
+            f"{statistic}\n"
+            for statistic in hot_snapshot.statistics('lineno')[:TOP_N]
+        )
+        write_summary(basename, filename, summary)
+
+
+def write_summary(basename, filename, summary):
+    """Write the summary of the report in filename to basename.profile.txt,
+    and log it."""
+    with open(basename + '.profile.txt', 'w') as fd:
+        fd.write(summary)
+    logger.info("Profile written to '%s':\n%s", filename, summary)
+
+
+def run_profiled(profiler, solution_filename, run):
+    """Call run() under profiler ('cprofile' or 'tracemalloc'), and return
+    its result.
+
+    Reports are written next to the solution file, even if run() fails.
+    """
+    basename = report_basename(solution_filename)
+    if profiler == 'cprofile':
+        return run_cprofile(run, basename)
+    return run_tracemalloc(run, basename)
@@ -0,0 +1,239 @@
+"""Long-running solver server.
+
+Solves instances posted over a local socket (localhost HTTP, or HTTP over a
+Unix domain socket), returning the solution in the response. This avoids
+paying process startup and import costs for every batch.
+
+Requests are POSTed to `/token-pair` or `/best-token-pair`, with a json body:
+
+    {
+        "instance": {...},
+        "token_pair": ["T0000", "T0001"],  (token-pair only)
+        "xrate": "3/2",                    (token-pair only, optional)
+        "time_limit": 30,                  (optional)
+        "min_avg_fee_per_order": "0",      (optional)
+        "min_abs_fee_per_order": "0"       (optional)
+    }
+
+The response body is the solution json, with the per-request timings (in
+seconds) added to the solver block. Timings are also reported in the
+Server-Timing header (in milliseconds).
+
+Invalid requests (not json, or with unknown or invalid options) get a 400
+response, and solves that fail a 500 response. The solutions of
+deterministic requests (see `is_deterministic`) are cached, and repeated
+requests get the cached solution, with their own timings.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import signal
+import socketserver
+import sys
+import time
+from collections import OrderedDict
+from decimal import Decimal as D
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from importlib import import_module
+
+from .api import MODE_OPTIONS, check_options, solve_instance
+from .core.util import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def is_deterministic(mode, options):
+    """Return whether a request always gets the same solution.
+
+    Best-token-pair solves match token pairs in a random order, and the
+    solutions of time-limited solves depend on how far they got.
+    """
+    return mode == 'token-pair' and options.get('time_limit') is None
+
+
+class SolutionCache:
+    """LRU cache of solutions, keyed by request body digest."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._solutions = OrderedDict()
+
+    def get(self, key):
+        if key not in self._solutions:
+            return None
+        self._solutions.move_to_end(key)
+        return self._solutions[key]
+
+    def put(self, key, solution):
+        if self.max_size <= 0:
+            return
+        self._solutions[key] = solution
+        self._solutions.move_to_end(key)
+        while len(self._solutions) > self.max_size:
+            self._solutions.popitem(last=False)
+
+
+class SolverRequestHandler(BaseHTTPRequestHandler):
+    """Handles solve requests. Requests are served one at a time."""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        mode = self.path.lstrip('/')
+        if mode not in MODE_OPTIONS:
+            self.send_error(404, f"Unknown solver '{self.path}'.")
+            return
+
+        timings = []
+        tic = time.perf_counter()
+        try:
+            request = json.loads(body, parse_float=D)
+            if not isinstance(request, dict) or \
+                    not isinstance(request.get('instance'), dict):
+                raise ValueError("Expecting a json object with an instance.")
+            instance = request.pop('instance')
+            check_options(mode, request)
+        except ValueError as e:
+            self.send_error(400, f"Invalid request: {e}")
+            return
+        timings.append(('parse', time.perf_counter() - tic))
+
+        cache_key = None
+        solution = None
+        if is_deterministic(mode, request):
+            cache_key = hashlib.sha256(self.path.encode() + body).hexdigest()
+            solution = self.server.cache.get(cache_key)
+
+        if solution is not None:
+            timings.append(('cache', 0))
+        else:
+            tic = time.perf_counter()
+            try:
+                # The instance was only parsed for this request, so the
+                # solution can be integrated into it.
+                solution = solve_instance(instance, mode, request)
+            except Exception as e:
+                logger.exception("Solver failed.")
+                self.send_error(500, f"Solver failed: {e!r}")
+                return
+            timings.append(('solve', time.perf_counter() - tic))
+            if cache_key is not None:
+                self.server.cache.put(cache_key, solution)
+
+        # The cached solution is kept without the timings of this request.
+        solution = dict(
+            solution, solver=dict(solution['solver'], timings=dict(timings))
+        )
+
+        tic = time.perf_counter()
+        response = json.dumps(solution, indent=4).encode()
+        timings.append(('serialize', time.perf_counter() - tic))
+
+        logger.info(
+            "%s: %s.", self.path,
+            ", ".join(f"{name} {seconds:.3f}s" for name, seconds in timings)
+        )
+        self.send_solution(response, timings)
+
+    def send_solution(self, response, timings):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        self.send_header('Server-Timing', ", ".join(
+            f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings
+        ))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def address_string(self):
+        # Clients of Unix domain sockets have no address.
+        if isinstance(self.client_address, tuple):
+            return super().address_string()
+        return 'unix'
+
+    def log_message(self, format, *args):
+        logger.debug("%s - " + format, self.address_string(), *args)
+
+
+class SolverHTTPServer(HTTPServer):
+    def __init__(self, server_address, cache_size):
+        super().__init__(server_address, SolverRequestHandler)
+        self.cache = SolutionCache(cache_size)
+
+
+class UnixSolverHTTPServer(socketserver.UnixStreamServer):
+    def __init__(self, socket_path, cache_size):
+        super().__init__(socket_path, SolverRequestHandler)
+        self.cache = SolutionCache(cache_size)
+
+
+def create_server(host='127.0.0.1', port=0, unix_socket=None, cache_size=32):
+    """Create a solver server listening on host:port, or on a unix socket."""
+    if unix_socket is not None:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        return UnixSolverHTTPServer(unix_socket, cache_size)
+    return SolverHTTPServer((host, port), cache_size)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog='gp_match serve',
+        description="Serve solve requests over a local socket."
+    )
+    parser.add_argument(
+        '--host',
+        type=str,
+        default='127.0.0.1',
+        help="Address to listen on."
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8000,
+        help="Port to listen on."
+    )
+    parser.add_argument(
+        '--unix-socket',
+        type=str,
+        default=None,
+        help="Listen on this Unix domain socket instead of host:port."
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=32,
+        help="Number of solutions kept for repeated deterministic requests."
+    )
+    parser.add_argument(
+        '--logging',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        default='INFO',
+        type=str,
+        help="Logging level."
+    )
+    args = parser.parse_args(argv)
+
+    setup_logging(args.logging)
+
+    # Import the solvers upfront rather than on the first request.
+    import_module('dex_open_solver.token_pair_solver.solver')
+    import_module('dex_open_solver.best_token_pair_solver.solver')
+
+    server = create_server(
+        args.host, args.port, args.unix_socket, args.cache_size
+    )
+    logger.info("Listening on %s.", args.unix_socket or server.server_address)
+
+    # Shut down cleanly (e.g. removing the unix socket) when terminated.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.unix_socket is not None:
+            os.remove(args.unix_socket)
@@ -13,16 +13,11 @@ See https://github.com/gnosis/dex-open-solver/blob/master/doc/token_pair/token_p
 import logging
 
 from ..core.config import Config
+from ..core.context import NULL_CONTEXT
 from ..core.orderbook import sorted_orders_by_exec_priority
 
-
 logger = logging.getLogger(__name__)
 
-# To account for the possibility that the minimum tradable amount
-# constraint will end up being violated when rounding the solution to
-# integers, the effective lower bound is conservatively increased here.
-MIN_TRADABLE_AMOUNT = Config.MIN_RATIONAL_TRADABLE_AMOUNT
-
 
 #############################################################################
 #    xrate = p(b_token) / p(s_token) = (s_amount / b_amount) * (1 - fee).   #
@@ -102,19 +97,21 @@ def filter_orders_violating_max_xrate(xrate, b_orders, s_orders, fee):
     return b_orders, s_orders
 
 
-def filter_orders_violating_min_tradable_amount(xrate, b_orders, s_orders, fee):
+def filter_orders_violating_min_tradable_amount(
+    xrate, b_orders, s_orders, fee, min_tradable_amount
+):
     """Remove orders which will violate min tradable amount."""
 
     b_orders = [
         order for order in b_orders
-        if order.max_sell_amount >= MIN_TRADABLE_AMOUNT
-        and b_buy_amount_from_b_max_sell_amount(order, xrate, fee) >= MIN_TRADABLE_AMOUNT
+        if order.max_sell_amount >= min_tradable_amount
+        and b_buy_amount_from_b_max_sell_amount(order, xrate, fee) >= min_tradable_amount
     ]
 
     s_orders = [
         order for order in s_orders
-        if order.max_sell_amount >= MIN_TRADABLE_AMOUNT
-        and s_buy_amount_from_s_max_sell_amount(order, xrate, fee) >= MIN_TRADABLE_AMOUNT
+        if order.max_sell_amount >= min_tradable_amount
+        and s_buy_amount_from_s_max_sell_amount(order, xrate, fee) >= min_tradable_amount
     ]
 
     return b_orders, s_orders
@@ -266,7 +263,7 @@ def undo_s_order_execution(b_i, s_i, b_orders, s_orders, xrate, fee):
 # Checks if either b_orders[b_i] or s_orders[s_i], or both, violate the minimum tradable
 # amount constraint, and undo them if so.
 def undo_order_execution_violating_min_tradable_amount_constraint(
-    b_i, s_i, b_orders, s_orders, xrate, fee
+    b_i, s_i, b_orders, s_orders, xrate, fee, min_tradable_amount
 ):
     undone_order_execution = False
 
@@ -277,7 +274,7 @@ def undo_order_execution_violating_min_tradable_amount_constraint(
     # If current b_order fails to satisfy the minimum tradable amount, then undo it.
     b_buy_amount = b_orders[b_i].buy_amount
     b_sell_amount = b_sell_amount_from_b_buy_amount(b_buy_amount, xrate, fee)
-    if b_buy_amount < MIN_TRADABLE_AMOUNT or b_sell_amount < MIN_TRADABLE_AMOUNT:
+    if b_buy_amount < min_tradable_amount or b_sell_amount < min_tradable_amount:
         logger.debug(
             "b_order %s violates minimum tradable amount constraint. Skipped.",
             b_orders[b_i].id
@@ -292,7 +289,7 @@ def undo_order_execution_violating_min_tradable_amount_constraint(
     # If current s_order fails to satisfy the minimum tradable amount, then undo it.
     s_buy_amount = s_orders[s_i].buy_amount
     s_sell_amount = s_sell_amount_from_s_buy_amount(s_buy_amount, xrate, fee)
-    if s_buy_amount < MIN_TRADABLE_AMOUNT or s_sell_amount < MIN_TRADABLE_AMOUNT:
+    if s_buy_amount < min_tradable_amount or s_sell_amount < min_tradable_amount:
         # Undo current s_order.
         logger.debug(
             "s_order %s violates minimum tradable amount constraint. Skipped.",
@@ -305,7 +302,8 @@ def undo_order_execution_violating_min_tradable_amount_constraint(
 
 
 def compute_buy_amounts(
-    xrate, b_orders, s_orders, fee, max_nr_exec_orders=None
+    xrate, b_orders, s_orders, fee, max_nr_exec_orders=None, config=None,
+    context=NULL_CONTEXT
 ):
     """Compute optimal buy amounts for two sets of orders between two tokens.
 
@@ -313,12 +311,16 @@ def compute_buy_amounts(
     xrate = p(b_token) / p(s_token) = (s_amount / b_amount) * (1 - fee).
     """
 
-    # NOTE: do not add this as a default parameter above, since
-    # default parameters are evaluated when the function is defined, and
-    # not when it is called. This means that runtime changes to the Config
-    # singleton would not be reflected.
+    if config is None:
+        config = Config.snapshot()
     if max_nr_exec_orders is None:
-        max_nr_exec_orders = Config.MAX_NR_EXEC_ORDERS
+        max_nr_exec_orders = config.MAX_NR_EXEC_ORDERS
+    context.metrics.count('compute_buy_amounts')
+
+    # To account for the possibility that the minimum tradable amount
+    # constraint will end up being violated when rounding the solution to
+    # integers, the effective lower bound is conservatively increased here.
+    min_tradable_amount = config.MIN_RATIONAL_TRADABLE_AMOUNT
 
     # Reset buy amounts to zero.
     for b_order in b_orders:
@@ -333,7 +335,7 @@ def compute_buy_amounts(
 
     # Remove orders which will violate the min tradable amount.
     b_orders, s_orders = filter_orders_violating_min_tradable_amount(
-        xrate, b_orders, s_orders, fee
+        xrate, b_orders, s_orders, fee, min_tradable_amount
     )
 
     # Early exit: if there are no orders on one of the sides, there's no match.
@@ -375,7 +377,7 @@ def compute_buy_amounts(
     while undone_order_execution:
         b_i, s_i, undone_order_execution = \
             undo_order_execution_violating_min_tradable_amount_constraint(
-                b_i, s_i, b_orders, s_orders, xrate, fee
+                b_i, s_i, b_orders, s_orders, xrate, fee, min_tradable_amount
             )
 
     # Token balance invariant.
@@ -1,24 +1,46 @@
 
 """Load and setup a token pair problem from an instance json."""
-from copy import deepcopy
-
-from ..core.api import load_fee
-from ..core.order import Order
+from ..core.api import load_accounts_and_orders, load_fee
+from ..core.config import Config
+from ..core.context import NULL_CONTEXT
 from ..core.orderbook import restrict_order_sell_amounts_by_balances
 
 
-def load_problem(instance, token_pair):
-    """Load and setup a token pair problem from an instance json."""
+def is_token_pair_order(order_dict, token_pair):
+    """Check if an order dict may be a b_order, s_order or f_order of token_pair.
+
+    Since the fee token is not needed, this can be used to skip orders while
+    the instance is loaded. Note that the balance restriction of an order only
+    depends on orders with the same account and tokens, which are kept or
+    skipped together.
+    """
     b_buy_token, s_buy_token = token_pair
+    buy_token = order_dict['buyToken']
+    return buy_token == b_buy_token or (
+        buy_token == s_buy_token and order_dict['sellToken'] == b_buy_token
+    )
 
-    accounts = deepcopy(instance['accounts'])
 
-    orders = [
-        Order.load_from_dict(order_dict, str(index))
-        for index, order_dict in enumerate(instance['orders'])
-    ]
+def load_problem(instance, token_pair, config=None, context=NULL_CONTEXT):
+    """Load and setup a token pair problem from an instance json.
+
+    Only the orders of the token pair and fee token, and their accounts,
+    are loaded.
+    """
+    if config is None:
+        config = Config.snapshot()
+    b_buy_token, s_buy_token = token_pair
+
+    with context.metrics.phase('load'):
+        accounts, orders = load_accounts_and_orders(
+            instance, config,
+            order_filter=lambda order_dict: is_token_pair_order(
+                order_dict, token_pair
+            )
+        )
 
-    orders = restrict_order_sell_amounts_by_balances(orders, accounts)
+    with context.metrics.phase('balance_restriction'):
+        orders = restrict_order_sell_amounts_by_balances(orders, accounts)
 
     b_orders = [
         order for order in orders
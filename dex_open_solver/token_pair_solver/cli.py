@@ -0,0 +1,31 @@
+"""Command line interface for the token-pair subcommand.
+
+Kept apart from the solver module so that setting up the argument parser
+does not import the solver.
+"""
+from fractions import Fraction as F
+
+
+def main(args):
+    from .solver import main
+    return main(args)
+
+
+def setup_arg_parser(subparsers):
+    parser = subparsers.add_parser(
+        'token-pair', help="Matches orders on a given token pair."
+    )
+
+    parser.add_argument(
+        'token_pair',
+        type=str,
+        nargs=2,
+        help='Token pair (b_buy_token, s_buy_token).'
+    )
+    parser.add_argument(
+        '--xrate',
+        type=F,
+        help='Exchange rate (token1/token2) as a fraction.'
+    )
+
+    parser.set_defaults(exec_subcommand=main)
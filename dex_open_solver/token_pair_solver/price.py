@@ -2,18 +2,19 @@ from fractions import Fraction as F
 from math import ceil, floor
 
 from ..core.config import Config
+from ..core.context import NULL_CONTEXT
 from ..core.order import Order
 
 from .xrate import find_best_xrate
 
 
 def create_market_order(
-    buy_token, sell_token, sell_amount, s_orders
+    buy_token, sell_token, sell_amount, s_orders, config
 ):
     # Market order: sell everything at the lowest price.
 
     # adjust sell amount to satisfy minimum tradable amount
-    sell_amount = max(sell_amount, Config.MIN_RATIONAL_TRADABLE_AMOUNT)
+    sell_amount = max(sell_amount, config.MIN_RATIONAL_TRADABLE_AMOUNT)
 
     # Compute the most optimistic xrate selling buy_token for sell_token.
     min_xrate = min(order.max_xrate for order in s_orders)
@@ -32,7 +33,8 @@ def create_market_order(
 
 # Find a subset of f_orders (sell fee for buy_token) that can cover buy_token_imbalance.
 def compute_token_price_to_cover_imbalance(
-    buy_token, fee, buy_token_imbalance, f_orders
+    buy_token, fee, buy_token_imbalance, f_orders, config,
+    context=NULL_CONTEXT
 ):
     # The max sell amount is the current fee imbalance plus an estimate
     # of the imbalance obtained when rounding to integers.
@@ -41,11 +43,15 @@ def compute_token_price_to_cover_imbalance(
     buy_fee_market_order = create_market_order(
         buy_token=fee.token, sell_token=buy_token,
         sell_amount=sell_amount,
-        s_orders=f_orders
+        s_orders=f_orders,
+        config=config
     )
 
     # Compute the optimal xrate, which is the absolute b_buy_token_price.
-    xrate, _ = find_best_xrate([buy_fee_market_order], f_orders, fee)
+    xrate, _ = find_best_xrate(
+        [buy_fee_market_order], f_orders, fee, config=config,
+        context=context
+    )
 
     # Note: xrate = fee_token_price / buy_token_price.
 
@@ -20,11 +20,13 @@ def rounding_buffer(
     s_max_sell_amounts = [s_order.max_sell_amount for s_order in s_orders]
 
     # Slightly decrease max_sell_amounts so that is possible to round solution
-    # without violating the max sell amount constraint.
+    # without violating the max sell amount constraint. The prices given are
+    # the ones of the solution that will be rounded (xrate must be the final
+    # one, see solve_token_pair).
     orders, prices = aggregate_orders_prices(
         token_pair, b_orders, s_orders, [], xrate, b_buy_token_price, fee
     )
-    setup_rounding_buffer(orders, list(token_pair), prices, fee)
+    setup_rounding_buffer(orders, list(token_pair), prices, fee, solution_prices=True)
 
     try:
         yield (b_orders, s_orders)
@@ -1,22 +1,27 @@
-import json
 import logging
 import time
+from collections import OrderedDict
 from copy import deepcopy
-from decimal import Decimal as D
 from fractions import Fraction as F
 from math import ceil, floor
 
-from ..core.api import Stats, dump_solution
+from ..core.api import (Stats, build_solution, exit_status,
+                        load_instance_file, write_solution)
 from ..core.config import Config
+from ..core.context import NULL_CONTEXT, Deadline, SolveContext
+from ..core.events import (F_ORDERS_CHOSEN, PAIR_FINISHED, PAIR_STARTED,
+                           ROUNDING_DONE, VIABILITY_ITERATION, XRATE_FOUND)
 from ..core.orderbook import (compute_approx_economic_viable_subset,
+                              compute_objective_of_touched_orders,
                               count_nr_exec_orders, is_economic_viable,
                               is_trivial, sorted_orders_by_exec_priority)
 from ..core.round import round_solution
+from ..core.util import stopping_on_signals
 from ..core.validation import validate
 from .amount import compute_buy_amounts
-from .api import load_problem
-from .orderbook import (IntegerTraits, RationalTraits, aggregate_orders_prices,
-                        compute_b_buy_token_imbalance,
+from .api import is_token_pair_order, load_problem
+from .orderbook import (IntegerTraits, RationalTraits,
+                        aggregate_orders_prices, compute_b_buy_token_imbalance,
                         compute_objective_rational,
                         count_orders_satisfying_xrate,
                         prune_unrealizable_orders)
@@ -50,19 +55,18 @@ def solve_token_pair(
     fee,
     xrate=None,
     b_buy_token_price=None,
-    max_nr_exec_orders=None
+    max_nr_exec_orders=None,
+    config=None,
+    context=NULL_CONTEXT
 ):
     """Find optimal execution of b_orders and s_orders.
 
     Sets b_orders/s_orders buy_amount and returns optimal exchange rate.
     """
-
-    # NOTE: do not add this as a default parameter above, since
-    # default parameters are evaluated when the function is defined, and
-    # not when it is called. This means that runtime changes to the Config
-    # singleton would not be reflected.
+    if config is None:
+        config = Config.snapshot()
     if max_nr_exec_orders is None:
-        max_nr_exec_orders = Config.MAX_NR_EXEC_ORDERS
+        max_nr_exec_orders = config.MAX_NR_EXEC_ORDERS
 
     if len(b_orders) == 0 or len(s_orders) == 0:
         return None
@@ -74,12 +78,18 @@ def solve_token_pair(
 
     # Compute optimal exchange rate if not given.
     if xrate is None:
-        xrate, _ = find_best_xrate(b_orders, s_orders, fee)
+        with context.metrics.phase('xrate_search'):
+            xrate, _ = find_best_xrate(
+                b_orders, s_orders, fee, config=config, context=context
+            )
         logger.debug(
             "p(%s) / p(%s) = %s (precise arithmetic)",
             b_buy_token,
             s_buy_token, xrate
         )
+        context.trace.record('xrate', token_pair=token_pair, xrate=xrate)
+        if context.observer is not None:
+            context.observer(XRATE_FOUND, token_pair=token_pair, xrate=xrate)
 
     # Return if there is no possible order matching.
     if xrate is None:
@@ -97,14 +107,16 @@ def solve_token_pair(
 
     # Execute orders based on optimal exchange rate.
     compute_buy_amounts(
-        xrate, b_orders, s_orders, fee, max_nr_exec_orders=max_nr_exec_orders
+        xrate, b_orders, s_orders, fee,
+        max_nr_exec_orders=max_nr_exec_orders, config=config, context=context
     )
 
     return xrate
 
 
 def solve_b_buy_token_and_fee_token(
-    b_buy_token_imbalance, b_buy_token, b_orders, f_orders, fee
+    b_buy_token_imbalance, b_buy_token, b_orders, f_orders, fee, config,
+    context=NULL_CONTEXT
 ):
     """Find optimal execution of b_orders and f_orders.
 
@@ -125,7 +137,9 @@ def solve_b_buy_token_and_fee_token(
         buy_token=b_buy_token,
         fee=fee,
         buy_token_imbalance=b_buy_token_imbalance,
-        f_orders=f_orders
+        f_orders=f_orders,
+        config=config,
+        context=context
     )
 
     # Execute orders that buy the b_buy_token imbalance due to fee for fee.
@@ -133,7 +147,8 @@ def solve_b_buy_token_and_fee_token(
     fee_debt_order = create_market_order(
         buy_token=fee.token, sell_token=b_buy_token,
         sell_amount=b_buy_token_imbalance,
-        s_orders=f_orders
+        s_orders=f_orders,
+        config=config
     )
 
     # 2/2: execute the artifical order against existing orders buying b_buy_token
@@ -142,14 +157,16 @@ def solve_b_buy_token_and_fee_token(
     fee_xrate = solve_token_pair(
         (fee.token, b_buy_token),
         [fee_debt_order], f_orders, fee,
-        xrate=fee_xrate
+        xrate=fee_xrate,
+        config=config,
+        context=context
     )
     assert fee_xrate is not None
 
     return b_buy_token_price
 
 
-def compute_nr_f_orders_to_execute(b_orders, s_orders, f_orders):
+def compute_nr_f_orders_to_execute(b_orders, s_orders, f_orders, config):
     """Compute the number (interval) of f_orders that can be executed
     while satisfying the maximum number of executed orders constraint.
     """
@@ -160,7 +177,7 @@ def compute_nr_f_orders_to_execute(b_orders, s_orders, f_orders):
     max_nr_exec_b_orders = count_nr_exec_orders(b_orders)
     max_nr_exec_s_orders = count_nr_exec_orders(s_orders)
 
-    assert max_nr_exec_b_orders + max_nr_exec_s_orders <= Config.MAX_NR_EXEC_ORDERS
+    assert max_nr_exec_b_orders + max_nr_exec_s_orders <= config.MAX_NR_EXEC_ORDERS
 
     # The actual constraint to enforce is:
     # nr_b_exec_orders + nr_s_exec_orders + nr_f_exec_orders <= MAX_NR_EXEC_ORDERS
@@ -169,11 +186,11 @@ def compute_nr_f_orders_to_execute(b_orders, s_orders, f_orders):
     # Which is trivially satisfied if:
     # nr_f_exec_orders <=
     # MAX_NR_EXEC_ORDERS - max(nr_b_exec_orders) - max(nr_s_exec_orders)
-    min_max_nr_exec_f_orders = Config.MAX_NR_EXEC_ORDERS \
+    min_max_nr_exec_f_orders = config.MAX_NR_EXEC_ORDERS \
         - max_nr_exec_b_orders - max_nr_exec_s_orders + 1
 
     # At least one b_order and one s_order must be matched.
-    max_nr_exec_f_orders = min(len(f_orders), Config.MAX_NR_EXEC_ORDERS - 2)
+    max_nr_exec_f_orders = min(len(f_orders), config.MAX_NR_EXEC_ORDERS - 2)
 
     # Try the highest number of f_orders as possible. In other words, do not constrain
     # the number of f_orders to execute unless it is really necessary.
@@ -191,7 +208,9 @@ def solve_token_pair_and_fee_token_given_exec_f_orders(
     token_pair,
     b_orders, s_orders, f_orders,
     xrate,
-    fee
+    fee,
+    config,
+    context=NULL_CONTEXT
 ):
     """Match orders between token pair and the fee token, assuming
     that there will be at most `nr_exec_f_orders` orders selling
@@ -207,7 +226,9 @@ def solve_token_pair_and_fee_token_given_exec_f_orders(
     b_buy_token_price = solve_b_buy_token_and_fee_token(
         approx_b_buy_token_imbalance,
         b_buy_token, b_orders, f_orders[:nr_exec_f_orders],
-        fee=fee
+        fee=fee,
+        config=config,
+        context=context
     )
 
     # It can happen (due to side constraints) that the number of executed
@@ -221,23 +242,35 @@ def solve_token_pair_and_fee_token_given_exec_f_orders(
     # Re-execute orders between token pair with the fixed b_buy_token_price,
     # and adjusted max_nr_exec_orders.
     # This fixes the final xrate, and therefore the final s_buy_token_price.
-    max_nr_bs_exec_orders = Config.MAX_NR_EXEC_ORDERS - nr_exec_f_orders
+    max_nr_bs_exec_orders = config.MAX_NR_EXEC_ORDERS - nr_exec_f_orders
 
     logger.debug("")
     logger.debug("=== (Re)solving %s -- %s ===", b_buy_token, s_buy_token)
     logger.debug("\tWith price for %s\t:\t%s", b_buy_token, b_buy_token_price)
     logger.debug("\tWith maximum nr bs orders\t:\t%s", max_nr_bs_exec_orders)
 
+    # The final xrate makes the price of s_buy_token an integer. It only
+    # depends on the limit xrates of the orders, so it is known before the
+    # orders are executed, and the rounding buffer can be sized from the
+    # prices of the solution that will be rounded.
+    final_xrate = F(b_buy_token_price, compute_s_buy_token_price(
+        b_buy_token_price, xrate, b_orders, s_orders, fee
+    ))
+
     # Execute orders with slightly decreased max_sell_amounts so that later on
     # is possible to round solution without violating the max sell amount constraint.
-    with rounding_buffer(token_pair, b_orders, s_orders, xrate, b_buy_token_price, fee):
+    with rounding_buffer(
+        token_pair, b_orders, s_orders, final_xrate, b_buy_token_price, fee
+    ):
         adjusted_xrate = solve_token_pair(
             token_pair,
             b_orders, s_orders,
             fee,
             xrate=xrate,
             b_buy_token_price=b_buy_token_price,
-            max_nr_exec_orders=max_nr_bs_exec_orders
+            max_nr_exec_orders=max_nr_bs_exec_orders,
+            config=config,
+            context=context
         )
 
     objective = compute_objective_rational(
@@ -250,9 +283,43 @@ def solve_token_pair_and_fee_token_given_exec_f_orders(
     return (objective, adjusted_xrate, b_buy_token_price)
 
 
+def log_exec_amounts(
+    token_pair, b_orders, s_orders, f_orders, xrate, b_buy_token_price, fee
+):
+    """Log the prices and the amounts bought by executed orders (at debug
+    level)."""
+    b_buy_token, s_buy_token = token_pair
+    logger.debug("Price of %s\t:\t%s", b_buy_token, b_buy_token_price)
+    logger.debug("Price of %s\t:\t%s", s_buy_token, b_buy_token_price / xrate)
+    logger.debug(
+        "Amounts of %s bought in exchange for %s:",
+        b_buy_token, s_buy_token
+    )
+    logger.debug("\t%s", [
+        {b_order.id: b_order.buy_amount}
+        for b_order in b_orders if b_order.buy_amount > 0
+    ])
+    logger.debug(
+        "Amounts of %s bought in exchange for %s:",
+        s_buy_token, b_buy_token
+    )
+    logger.debug("\t%s", [
+        {s_order.id: s_order.buy_amount}
+        for s_order in s_orders if s_order.buy_amount > 0
+    ])
+    logger.debug(
+        "Amounts of %s bought in exchange for FEE (%s):",
+        b_buy_token, fee.token
+    )
+    logger.debug("\t%s", [
+        {f_order.id: f_order.buy_amount}
+        for f_order in f_orders if f_order.buy_amount > 0
+    ])
+
+
 def solve_token_pair_and_fee_token(
     token_pair, accounts, b_orders, s_orders, f_orders, fee,
-    xrate=None
+    xrate=None, config=None, context=NULL_CONTEXT
 ):
     """Match orders between token pair and the fee token, taking into account
     all side constraints except economic viability. This means the solution obtained
@@ -264,6 +331,12 @@ def solve_token_pair_and_fee_token(
 
     Sets b_orders/s_orders/f_orders (integral) buy_amounts for the best execution.
     """
+    if config is None:
+        config = Config.snapshot()
+
+    if len(b_orders) == 0 or len(s_orders) == 0:
+        return TRIVIAL_SOLUTION
+
     # remove trivially infeasible orders
     b_orders, s_orders = prune_unrealizable_orders(b_orders, s_orders, fee)
 
@@ -288,7 +361,10 @@ def solve_token_pair_and_fee_token(
         "=== Solving %s -- %s (rational arithmetic) ===",
         b_buy_token, s_buy_token
     )
-    xrate = solve_token_pair(token_pair, b_orders, s_orders, fee, xrate=xrate)
+    xrate = solve_token_pair(
+        token_pair, b_orders, s_orders, fee, xrate=xrate, config=config,
+        context=context
+    )
 
     if count_nr_exec_orders(b_orders) == 0:
         logger.info("No matching orders between %s and %s.", b_buy_token, s_buy_token)
@@ -321,7 +397,7 @@ def solve_token_pair_and_fee_token(
         # Compute the number of f_orders that can be executed so that the maximum number
         # of executed orders constraint is satisfied.
         min_nr_exec_f_orders, max_nr_exec_f_orders = \
-            compute_nr_f_orders_to_execute(b_orders, s_orders, f_orders)
+            compute_nr_f_orders_to_execute(b_orders, s_orders, f_orders, config)
 
         # If the interval of number of f_orders to try is empty, then there's no solution.
         if min_nr_exec_f_orders > max_nr_exec_f_orders:
@@ -334,40 +410,57 @@ def solve_token_pair_and_fee_token(
         )
 
         # Find number of f_orders that leads to higher objective value.
-        f_orders = sorted_orders_by_exec_priority(f_orders)
-        best_objective = None
-        best_solution = (xrate, None, b_orders, s_orders, f_orders)
-        for nr_exec_f_orders in range(min_nr_exec_f_orders, max_nr_exec_f_orders + 1):
-            # Compute objective value and solution given current nr_exec_f_orders.
-            objective, adjusted_xrate, b_buy_token_price = \
-                solve_token_pair_and_fee_token_given_exec_f_orders(
-                    nr_exec_f_orders, b_buy_token_imbalance,
-                    token_pair, b_orders, s_orders, f_orders, xrate, fee
+        with context.metrics.phase('f_orders'):
+            f_orders = sorted_orders_by_exec_priority(f_orders)
+            best_objective = None
+            best_solution = (xrate, None, b_orders, s_orders, f_orders)
+            for nr_exec_f_orders in range(min_nr_exec_f_orders, max_nr_exec_f_orders + 1):
+                # Once the deadline has expired, keep the best solution so far.
+                if best_objective is not None and context.deadline_expired():
+                    logger.debug("Deadline expired - keeping best nr_exec_f_orders.")
+                    break
+
+                # Compute objective value and solution given current nr_exec_f_orders.
+                objective, adjusted_xrate, b_buy_token_price = \
+                    solve_token_pair_and_fee_token_given_exec_f_orders(
+                        nr_exec_f_orders, b_buy_token_imbalance,
+                        token_pair, b_orders, s_orders, f_orders, xrate, fee, config,
+                        context
+                    )
+
+                # Skip iteration if it was not possible to connect to fee token.
+                if b_buy_token_price is None:
+                    continue
+
+                assert objective is not None
+
+                logger.debug("Objective\t:\t%s\t[best=%s]", objective, best_objective)
+
+                # Optimization: Since f_orders are ordered by limit xrate, the objective
+                # as a function of the size of the prefix used has only one optimum.
+                # In other words, we can stop trying to augmenting the set of f_orders
+                # once adding a new f_order degrades the objective.
+                if best_objective is not None and objective < best_objective:
+                    break
+
+                # Update best solution found so far if necessary.
+                assert best_objective is None or objective >= best_objective
+                best_objective = objective
+                best_solution = deepcopy(
+                    (adjusted_xrate, b_buy_token_price, b_orders, s_orders, f_orders)
                 )
 
-            # Skip iteration if it was not possible to connect to fee token.
-            if b_buy_token_price is None:
-                continue
-
-            assert objective is not None
-
-            logger.debug("Objective\t:\t%s\t[best=%s]", objective, best_objective)
-
-            # Optimization: Since f_orders are ordered by limit xrate, the objective
-            # as a function of the size of the prefix used has only one optimum.
-            # In other words, we can stop trying to augmenting the set of f_orders
-            # once adding a new f_order degrades the objective.
-            if best_objective is not None and objective < best_objective:
-                break
-
-            # Update best solution found so far if necessary.
-            assert best_objective is None or objective >= best_objective
-            best_objective = objective
-            best_solution = deepcopy(
-                (adjusted_xrate, b_buy_token_price, b_orders, s_orders, f_orders)
-            )
-
         xrate, b_buy_token_price, b_orders, s_orders, f_orders = best_solution
+        nr_exec_f_orders = count_nr_exec_orders(f_orders)
+        context.trace.record(
+            'f_orders', token_pair=token_pair,
+            nr_exec_f_orders=nr_exec_f_orders, objective=best_objective
+        )
+        if context.observer is not None:
+            context.observer(
+                F_ORDERS_CHOSEN, token_pair=token_pair,
+                nr_exec_f_orders=nr_exec_f_orders, objective=best_objective
+            )
 
         # Return trivial solution in case it was not possible to connect to the fee token.
         # This can happen due to side constraints, for example if the resulting f_orders
@@ -376,33 +469,11 @@ def solve_token_pair_and_fee_token(
             logger.debug("Could not execute f_orders.")
             return TRIVIAL_SOLUTION
 
-        logger.debug("Price of %s\t:\t%s", b_buy_token, b_buy_token_price)
-        logger.debug("Price of %s\t:\t%s", s_buy_token, b_buy_token_price / xrate)
-        logger.debug(
-            "Amounts of %s bought in exchange for %s:",
-            b_buy_token, s_buy_token
-        )
-        logger.debug("\t%s", [
-            {b_order.id: b_order.buy_amount}
-            for b_order in b_orders if b_order.buy_amount > 0
-        ])
-        logger.debug(
-            "Amounts of %s bought in exchange for %s:",
-            s_buy_token, b_buy_token
-        )
-        logger.debug("\t%s", [
-            {s_order.id: s_order.buy_amount}
-            for s_order in s_orders if s_order.buy_amount > 0
-        ])
-
-        logger.debug(
-            "Amounts of %s bought in exchange for FEE (%s):",
-            b_buy_token, fee.token
-        )
-        logger.debug("\t%s", [
-            {f_order.id: f_order.buy_amount}
-            for f_order in f_orders if f_order.buy_amount > 0
-        ])
+        if logger.isEnabledFor(logging.DEBUG):
+            log_exec_amounts(
+                token_pair, b_orders, s_orders, f_orders, xrate,
+                b_buy_token_price, fee
+            )
 
     # Aggregate orders and prices.
     orders, prices = aggregate_orders_prices(
@@ -412,7 +483,11 @@ def solve_token_pair_and_fee_token(
     # Integrate sell_amounts and prices in solution, and round.
     logger.debug("")
     logger.debug("=== Rounding ===")
-    if not round_solution(prices, orders, fee):
+    with context.metrics.phase('rounding'):
+        rounded = round_solution(prices, orders, fee, config, context)
+    if context.observer is not None:
+        context.observer(ROUNDING_DONE, token_pair=token_pair, rounded=rounded)
+    if not rounded:
         logger.warning("Could not round solution.")
         return TRIVIAL_SOLUTION
 
@@ -421,7 +496,7 @@ def solve_token_pair_and_fee_token(
 
 def solve_token_pair_and_fee_token_economic_viable(
     token_pair, accounts, b_orders, s_orders, f_orders, fee,
-    xrate=None
+    xrate=None, config=None, context=NULL_CONTEXT
 ):
     """Match orders between token pair and the fee token, taking into
     account all side constraints, including economic viability.
@@ -432,27 +507,58 @@ def solve_token_pair_and_fee_token_economic_viable(
     Sets b_orders/s_orders/f_orders (integral) buy_amounts for the best execution.
     Also returns the (integral) prices found.
     """
+    if config is None:
+        config = Config.snapshot()
+
     b_buy_token, s_buy_token = token_pair
+    context.trace.record('pair', token_pair=token_pair)
 
     orders, prices = TRIVIAL_SOLUTION
 
+    # Orders that can still be executed on each side, indexed by id so that
+    # dropping an order does not require rebuilding the whole side.
+    b_orders = OrderedDict((o.id, o) for o in b_orders)
+    s_orders = OrderedDict((o.id, o) for o in s_orders)
+
     # Search for an economically viable solution.
+    iteration = 0
     while len(b_orders) > 0 or len(s_orders) > 0:
 
+        # Once the deadline has expired, give up: the solution of the previous
+        # iteration (if any) is not economically viable.
+        if context.deadline_expired():
+            logger.debug("Deadline expired - returning trivial solution.")
+            orders, prices = TRIVIAL_SOLUTION
+            break
+        context.metrics.count('viability_iterations')
+
         # Solve current problem.
         orders, prices = solve_token_pair_and_fee_token(
-            token_pair, accounts, b_orders, s_orders, f_orders, fee, xrate
+            token_pair, accounts,
+            list(b_orders.values()), list(s_orders.values()), f_orders,
+            fee, xrate, config, context
         )
 
         # If solution is economically viable, exit.
         # Hopefully, in large majority of cases this will occur in the first iteration.
-        if is_economic_viable(orders, prices, fee, IntegerTraits) or is_trivial(orders):
+        with context.metrics.phase('viability'):
+            viable = is_economic_viable(orders, prices, fee, IntegerTraits, config) \
+                or is_trivial(orders)
+        if context.observer is not None:
+            context.observer(
+                VIABILITY_ITERATION, token_pair=token_pair, iteration=iteration,
+                nr_orders=len(b_orders) + len(s_orders), viable=viable
+            )
+        if viable:
             break
+        iteration += 1
 
         # If solution cannot be made economically viable (assuming prices wouldn't change)
-        if len(compute_approx_economic_viable_subset(
-            orders, prices, fee, IntegerTraits
-        )) == 0:
+        with context.metrics.phase('viability'):
+            viable_subset = compute_approx_economic_viable_subset(
+                orders, prices, fee, IntegerTraits, config
+            )
+        if len(viable_subset) == 0:
             orders, prices = TRIVIAL_SOLUTION
             break
 
@@ -462,56 +568,96 @@ def solve_token_pair_and_fee_token_economic_viable(
         # more than needed (note that prices, and hence order fees, keep changing).
 
         # Find and remove the order paying the least fee.
-        b_order_with_min_buy_amount = min(
-            [o for o in b_orders if o.buy_amount > 0],
-            key=lambda o: o.buy_amount
-        )
-        s_order_with_min_buy_amount = min(
-            [o for o in s_orders if o.buy_amount > 0],
-            key=lambda o: o.buy_amount
-        )
+        # Buy amounts and prices change with every solve, so the volumes are
+        # taken from the current solution. The s_orders come first so that,
+        # on ties, the s_order is the one removed.
+        with context.metrics.phase('viability'):
+            order_with_min_volume = min(
+                [
+                    o for o in orders if o.buy_amount > 0
+                    and o.buy_token == s_buy_token and o.sell_token == b_buy_token
+                ] + [
+                    o for o in orders if o.buy_amount > 0
+                    and o.buy_token == b_buy_token and o.sell_token == s_buy_token
+                ],
+                key=lambda o: o.buy_amount * prices[o.buy_token]
+            )
 
-        if b_order_with_min_buy_amount.buy_amount * prices[b_buy_token]\
-           < s_order_with_min_buy_amount.buy_amount * prices[s_buy_token]:
-            b_orders = [
-                o for o in b_orders if o.id != b_order_with_min_buy_amount.id
-            ]
+        if order_with_min_volume.id in b_orders:
+            del b_orders[order_with_min_volume.id]
         else:
-            s_orders = [
-                o for o in s_orders if o.id != s_order_with_min_buy_amount.id
-            ]
+            del s_orders[order_with_min_volume.id]
 
     # Make sure the solution is correct.
-    validate(accounts, orders, prices, fee)
+    with context.metrics.phase('validation'):
+        try:
+            validate(accounts, orders, prices, fee, config=config)
+        except AssertionError:
+            logger.error("Invalid solution of %s -- %s.", b_buy_token, s_buy_token)
+            context.trace.dump()
+            raise
 
     return orders, prices
 
 
-def main(args):
-    start_time = time.time()
+def solve_instance(
+    instance, token_pair, xrate=None, time_limit=None, start_time=None,
+    config=None, context=None
+):
+    """Find token pair + fee token matching for an instance dict.
 
-    # Load dict from json.
-    instance = json.load(args.instance, parse_float=D)
+    If time_limit is given, the solver stops once it has elapsed since
+    start_time, with the best solution found so far (see `Deadline`), and
+    the exit status is 'timeout'.
+
+    If no context is given, the solve gets its own (see `SolveContext`).
+
+    Returns the solution as a dict (see `build_solution`), with the phase
+    times and counters of the solve in the solver block (see `metrics`).
+    The instance is modified in place.
+    """
+    if start_time is None:
+        start_time = time.time()
+    if config is None:
+        config = Config.snapshot()
+    if context is None:
+        context = SolveContext.create()
+    if time_limit is not None:
+        context = context._replace(deadline=Deadline(time_limit, start_time))
 
     # Load problem.
     # b_orders: orders buying b_buy_token
     # s_orders: orders selling b_buy_token (buying s_buy_token)
     # f_orders: orders selling fee token for b_buy_token
     accounts, b_orders, s_orders, f_orders, fee = load_problem(
-        instance, args.token_pair
+        instance, token_pair, config, context
     )
 
     # Find token pair + fee token matching.
+    if context.observer is not None:
+        context.observer(PAIR_STARTED, token_pair=token_pair)
+        pair_start_time = time.time()
     orders, prices = solve_token_pair_and_fee_token_economic_viable(
-        args.token_pair, accounts, b_orders, s_orders, f_orders, fee, xrate=args.xrate
+        token_pair, accounts, b_orders, s_orders, f_orders, fee,
+        xrate=xrate, config=config, context=context
     )
+    if context.observer is not None:
+        context.observer(
+            PAIR_FINISHED, token_pair=token_pair,
+            objective=compute_objective_of_touched_orders(
+                prices, accounts, orders, fee
+            ),
+            runtime=time.time() - pair_start_time
+        )
 
     runtime = time.time() - start_time
-    stats = Stats(runtime=runtime, exit_status="completed")
+    stats = Stats(
+        runtime=runtime, exit_status=exit_status(context),
+        metrics=context.metrics
+    )
 
-    # Dump solution to file.
-    dump_solution(
-        instance, args.solution_filename,
+    return build_solution(
+        instance,
         orders,
         prices,
         fee=fee,
@@ -519,24 +665,47 @@ def main(args):
         arith_traits=IntegerTraits()
     )
 
-    return instance
 
+def main(args):
+    start_time = time.time()
 
-def setup_arg_parser(subparsers):
-    parser = subparsers.add_parser(
-        'token-pair', help="Matches orders on a given token pair."
+    # The solver returns the best solution found so far on SIGTERM or SIGINT.
+    config = getattr(args, 'config', None)
+    if config is None:
+        config = Config.snapshot()
+    deadline = Deadline(getattr(args, 'time_limit', None), start_time)
+    context = SolveContext.create(
+        deadline=deadline, trace_filename=getattr(args, 'trace', None)
     )
 
-    parser.add_argument(
-        'token_pair',
-        type=str,
-        nargs=2,
-        help='Token pair (b_buy_token, s_buy_token).'
-    )
-    parser.add_argument(
-        '--xrate',
-        type=F,
-        help='Exchange rate (token1/token2) as a fraction.'
+    # Load dict from json.
+    token_pair = tuple(args.token_pair)
+    with context.metrics.phase('load'):
+        instance = load_instance_file(
+            args.instance, config,
+            order_filter=lambda order_dict: is_token_pair_order(
+                order_dict, token_pair
+            )
+        )
+
+    loaded_orders = instance['orders']
+    with stopping_on_signals(deadline):
+        solution = solve_instance(
+            instance, token_pair, xrate=args.xrate, start_time=start_time,
+            config=config, context=context
+        )
+
+    # The solution holds copies of the order dicts it needs, so the orders
+    # loaded from the instance file (e.g. a memory-mapped snapshot) can be
+    # released.
+    loaded_orders.close()
+
+    # Dump solution (and trace, if asked) to file.
+    write_solution(
+        solution, args.solution_filename,
+        compact=getattr(args, 'compact_solution', False)
     )
+    if context.trace.filename is not None:
+        context.trace.dump()
 
-    parser.set_defaults(exec_subcommand=main)
+    return instance
@@ -19,6 +19,7 @@ from itertools import groupby
 from math import sqrt, log, ceil
 
 from ..core.config import Config
+from ..core.context import NULL_CONTEXT
 
 from .amount import compute_buy_amounts
 from .orderbook import compute_objective_rational, prune_unrealizable_orders
@@ -202,8 +203,10 @@ class SymbolicSolver:
         ['b_pi', 'b_yb', 'b_yb_F', 's_pi', 's_yb', 's_yb_F', 'c', 'f']
     )
 
-    def __init__(self, fee):
+    def __init__(self, fee, config=None, context=NULL_CONTEXT):
         self.fee = fee
+        self.config = Config.snapshot() if config is None else config
+        self.context = context
 
     # Iterates through the set of unfilled orders.
     def orders_U(self, orders, partial_idx):
@@ -311,8 +314,10 @@ class SymbolicSolver:
 
     # Computes objective value from order execution via `compute_buy_amounts`.
     def compute_objective(self, xrate, b_orders, s_orders):
+        self.context.metrics.count('candidates')
         compute_buy_amounts(
-            xrate, b_orders, s_orders, fee=self.fee
+            xrate, b_orders, s_orders, fee=self.fee, config=self.config,
+            context=self.context
         )
         return compute_objective_rational(
             b_orders=b_orders, s_orders=s_orders, f_orders=[],
@@ -349,9 +354,6 @@ class SymbolicSolver:
         xrate_lb, xrate_ub = interval_data.xrate
         b_orders, s_orders = interval_data.orders
 
-        if len(xrates) == 0:
-            return (None, None)
-
         xrates_obj = [
             (
                 xrate,
@@ -359,18 +361,26 @@ class SymbolicSolver:
                 self.compute_objective(xrate, b_orders, s_orders)
             ) for xrate, root_ids in xrates
         ]
+        self.context.trace.record(
+            'interval', xrate_lb=xrate_lb, xrate_ub=xrate_ub,
+            candidates=xrates_obj
+        )
+
+        if len(xrates_obj) == 0:
+            return (None, None)
 
         opt = max(xrates_obj, key=lambda xio: xio[2])
 
-        logger.debug(
-            "Exchange rate candidates in interval xrate \u2208 [%s, %s]:",
-            xrate_lb, xrate_ub
-        )
-        for xrate, root_ids, obj in xrates_obj:
+        if logger.isEnabledFor(logging.DEBUG):
             logger.debug(
-                "\troots%s : (%s, %s)\t" + ("[local optimum]" if obj == opt[2] else ""),
-                root_ids, xrate, obj
+                "Exchange rate candidates in interval xrate \u2208 [%s, %s]:",
+                xrate_lb, xrate_ub
             )
+            for xrate, root_ids, obj in xrates_obj:
+                logger.debug(
+                    "\troots%s : (%s, %s)\t%s", root_ids, xrate, obj,
+                    "[local optimum]" if obj == opt[2] else ""
+                )
 
         return (opt[0], opt[2])
 
@@ -467,12 +477,16 @@ class SymbolicSolver:
         # find the xrate for the trivial solution with maximum objective.
         best_trivial_xrate = max(xrates_obj, key=lambda x: x[1])[0]
 
-        xrates_obj += [
-            self.solve_interval(interval_data)
-            for interval_data in xrate_interval_iterator(
-                b_orders, s_orders, self.fee, best_trivial_xrate
-            )
-        ]
+        for interval_data in xrate_interval_iterator(
+            b_orders, s_orders, self.fee, best_trivial_xrate
+        ):
+            # Once the deadline has expired, the best xrate found so far is
+            # returned (there is at least the one of the trivial solution).
+            if self.context.deadline_expired():
+                logger.debug("Deadline expired - skipping remaining intervals.")
+                break
+            self.context.metrics.count('intervals')
+            xrates_obj.append(self.solve_interval(interval_data))
 
         # Filter out invalid xrates.
         xrates_obj = [(xrate, obj) for xrate, obj in xrates_obj if xrate is not None]
@@ -484,10 +498,13 @@ class SymbolicSolver:
         return max(xrates_obj, key=lambda xo: xo[1])
 
 
-def find_best_xrate(b_orders, s_orders, fee, Solver=SymbolicSolver):
+def find_best_xrate(
+    b_orders, s_orders, fee, Solver=SymbolicSolver, config=None,
+    context=NULL_CONTEXT
+):
     """Find the optimal xrate for executing a set of orders and counter-orders.
 
     Convention: xrate = p(b_buy_token) / p(s_buy_token) = s_buy_amount / b_buy_amount.
     """
-    solver = Solver(fee)
+    solver = Solver(fee, config, context)
     return solver.solve(b_orders, s_orders)
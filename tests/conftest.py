@@ -6,6 +6,7 @@ import pytest
 import hypothesis
 from itertools import product
 
+E2E_DIR = Path(__file__).parent / 'e2e'
 
 # In the "ci" profile tests are deterministic
 hypothesis.settings.register_profile('ci', derandomize=True)
@@ -40,10 +41,16 @@ def get_local_instance_parameter_values(metafunc):
     """Add `local_instance` variable to tests.
 
     Populate `local_instance` variable with any *.json file in the same
-    directory as the test.
+    directory as the test, and with the files listed in the LOCAL_INSTANCES
+    variable of the test module (relative to tests/e2e), so that tests can
+    share instances instead of copying them.
     """
     cur_dir = Path(metafunc.module.__file__).parent
     instances = glob.glob(str(cur_dir) + '/*.json')
+    instances += [
+        str(E2E_DIR / filename)
+        for filename in getattr(metafunc.module, 'LOCAL_INSTANCES', [])
+    ]
 
     return instances
 
@@ -0,0 +1,32 @@
+"""Assert that concurrent solves with different parameters do not interfere."""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal as D
+
+from dex_open_solver.api import solve
+
+
+LOCAL_INSTANCES = ['token-pair/has-non-trival-solution/driver-e2e-instance.json']
+
+
+def test_concurrent_solves_use_own_config(local_instance):
+    """Asserts that each solve uses its own minimum fee per order."""
+    with open(local_instance, 'r') as fd:
+        instance = json.load(fd, parse_float=D)
+
+    # The solution of the instance pays ~2e18 fee per order.
+    min_avg_fees_per_order = [0, int(1e20)] * 4
+
+    def solve_with_min_avg_fee(min_avg_fee_per_order):
+        solution = solve(instance, 'token-pair', {
+            'token_pair': ['token0', 'token1'],
+            'min_avg_fee_per_order': min_avg_fee_per_order
+        })
+        return len(solution['orders'])
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        nr_touched_orders = list(
+            executor.map(solve_with_min_avg_fee, min_avg_fees_per_order)
+        )
+
+    assert nr_touched_orders == [2, 0] * 4
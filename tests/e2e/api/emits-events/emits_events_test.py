@@ -0,0 +1,55 @@
+"""Assert that observers of a solve get the events of every token pair."""
+import json
+from collections import Counter
+from decimal import Decimal as D
+from fractions import Fraction as F
+
+from dex_open_solver.api import solve
+from dex_open_solver.core import events
+
+
+LOCAL_INSTANCES = ['best-token-pair/has-non-trival-solution/instance.json']
+
+
+def solve_and_observe(local_instance, mode, config=None):
+    with open(local_instance, 'r') as fd:
+        instance = json.load(fd, parse_float=D)
+    observed = []
+    solution = solve(
+        instance, mode, config,
+        observer=lambda event, **fields: observed.append((event, fields))
+    )
+    return solution, observed
+
+
+def test_best_token_pair_events(local_instance):
+    """Asserts that every token pair matched is started and finished, and
+    that the best objective is the one of the solution."""
+    solution, observed = solve_and_observe(local_instance, 'best-token-pair')
+
+    counts = Counter(event for event, _ in observed)
+    assert counts[events.PAIR_STARTED] == counts[events.PAIR_FINISHED] > 1
+    assert counts[events.XRATE_FOUND] > 0
+    assert counts[events.VIABILITY_ITERATION] > 0
+    assert all('token_pair' in fields for _, fields in observed)
+
+    objectives = [
+        fields['objective'] for event, fields in observed
+        if event == events.PAIR_FINISHED
+    ]
+    assert max(objectives) == F(solution['solver']['objective'])
+
+
+def test_token_pair_events(local_instance):
+    """Asserts that the events of a token pair are emitted in order."""
+    token_pair = ('T0000', 'T0001')
+    _, observed = solve_and_observe(
+        local_instance, 'token-pair', {'token_pair': token_pair}
+    )
+
+    names = [event for event, _ in observed]
+    assert names[0] == events.PAIR_STARTED
+    assert names[-1] == events.PAIR_FINISHED
+    assert names.index(events.XRATE_FOUND) < \
+        names.index(events.VIABILITY_ITERATION)
+    assert all(fields['token_pair'] == token_pair for _, fields in observed)
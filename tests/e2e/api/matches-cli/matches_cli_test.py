@@ -0,0 +1,39 @@
+"""Assert that the in-process API returns the solution written by gp_match."""
+import json
+from decimal import Decimal as D
+
+from dex_open_solver.api import solve
+from dex_open_solver.match import main
+
+
+LOCAL_INSTANCES = ['token-pair/has-non-trival-solution/driver-e2e-instance.json']
+
+
+def test_token_pair_solution_matches_cli(local_instance, tmp_path):
+    """Asserts that solve() returns the gp_match token-pair solution."""
+    solution_filename = str(tmp_path / 'solution.json')
+    main([
+        local_instance, '--solution', solution_filename,
+        'token-pair', 'token0', 'token1'
+    ])
+    with open(solution_filename, 'r') as fd:
+        expected_solution = json.load(fd)
+
+    with open(local_instance, 'r') as fd:
+        instance = json.load(fd, parse_float=D)
+    solution = solve(instance, 'token-pair', {'token_pair': ['token0', 'token1']})
+
+    # Round trip through json, as gp_match does.
+    solution = json.loads(json.dumps(solution))
+    del solution['solver'], expected_solution['solver']
+    assert solution == expected_solution
+
+
+def test_solve_does_not_modify_instance(local_instance):
+    """Asserts that solve() leaves its instance argument untouched."""
+    with open(local_instance, 'r') as fd:
+        instance = json.load(fd, parse_float=D)
+    with open(local_instance, 'r') as fd:
+        original_instance = json.load(fd, parse_float=D)
+    solve(instance, 'best-token-pair')
+    assert instance == original_instance
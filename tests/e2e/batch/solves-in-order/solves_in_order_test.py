@@ -0,0 +1,47 @@
+"""Assert that batch solutions are output in the order of the instances."""
+import json
+from decimal import Decimal as D
+
+import pytest
+
+from dex_open_solver.api import solve
+from dex_open_solver.batch import main
+
+
+LOCAL_INSTANCES = ['token-pair/has-non-trival-solution/driver-e2e-instance.json']
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_solves_in_order(local_instance, tmp_path, workers):
+    """Asserts that each output line is the solution of its input line."""
+    with open(local_instance, 'r') as fd:
+        instance = json.load(fd)
+
+    # The solution of the instance pays ~2e18 fee per order.
+    min_avg_fees_per_order = [0, int(1e20)] * 4
+    instances_file = str(tmp_path / 'instances.jsonl')
+    with open(instances_file, 'w') as fd:
+        for min_avg_fee_per_order in min_avg_fees_per_order:
+            fd.write(json.dumps({
+                'instance': instance,
+                'min_avg_fee_per_order': min_avg_fee_per_order
+            }) + '\n')
+        fd.write(json.dumps({'not': 'an instance'}) + '\n')
+
+    solutions_file = str(tmp_path / 'solutions.jsonl')
+    main([
+        'token-pair', instances_file, '--output', solutions_file,
+        '--token-pair', 'token0', 'token1', '--workers', str(workers)
+    ])
+    with open(solutions_file, 'r') as fd:
+        solutions = [json.loads(line) for line in fd]
+
+    assert [len(s.get('orders', [])) for s in solutions] == [2, 0] * 4 + [0]
+    assert 'error' in solutions[-1]
+
+    expected_solution = solve(
+        json.loads(json.dumps(instance), parse_float=D),
+        'token-pair', {'token_pair': ['token0', 'token1']}
+    )
+    del solutions[0]['solver'], expected_solution['solver']
+    assert solutions[0] == expected_solution
@@ -0,0 +1,35 @@
+"""Assert that solutions record whether the solver ran out of time."""
+import pytest
+
+from dex_open_solver.match import main
+from tests.util import read_json
+
+
+LOCAL_INSTANCES = ['best-token-pair/has-non-trival-solution/instance.json']
+
+
+def test_zero_time_limit_returns_trivial_solution(local_instance, tmp_path):
+    """Asserts that a run without any time returns the trivial solution,
+    records the timeout, and saves no token pair as matched."""
+    solution_filename = str(tmp_path / 'solution.json')
+    checkpoint_filename = str(tmp_path / 'run.checkpoint')
+    main([
+        local_instance, '--solution', solution_filename, '--time-limit', '0',
+        'best-token-pair', '--checkpoint', checkpoint_filename
+    ])
+    solution = read_json(solution_filename)
+    assert solution['solver']['exit_status'] == 'timeout'
+    assert solution['orders'] == []
+    assert read_json(checkpoint_filename)['evaluated_token_pairs'] == []
+
+
+@pytest.mark.parametrize('mode', [
+    ['token-pair', 'T0000', 'T0001'], ['best-token-pair']
+])
+def test_completed_exit_status(local_instance, tmp_path, mode):
+    solution_filename = str(tmp_path / 'solution.json')
+    main([
+        local_instance, '--solution', solution_filename,
+        '--time-limit', '600'
+    ] + mode)
+    assert read_json(solution_filename)['solver']['exit_status'] == 'completed'
@@ -0,0 +1,145 @@
+"""Assert that runs resumed from a checkpoint find the best solution."""
+import json
+from fractions import Fraction as F
+
+from dex_open_solver.best_token_pair_solver import solver
+from dex_open_solver.match import main
+from tests.util import read_json
+
+
+LOCAL_INSTANCES = ['best-token-pair/has-non-trival-solution/instance.json']
+
+
+class Killed(Exception):
+    pass
+
+
+def test_resumes_from_checkpoint(local_instance, tmp_path, monkeypatch):
+    """Asserts that runs killed after matching a few token pairs, resumed
+    from a checkpoint, match every token pair once and find the objective of
+    a single run."""
+    solution_filename = str(tmp_path / 'solution.json')
+    main([local_instance, '--solution', solution_filename, 'best-token-pair'])
+    expected_solution = read_json(solution_filename)
+
+    # Every run is killed when about to match its third token pair.
+    match_token_pair_and_evaluate = solver.match_token_pair_and_evaluate
+    nr_calls = 0
+
+    def killed_match_token_pair_and_evaluate(*args, **kwargs):
+        nonlocal nr_calls
+        nr_calls += 1
+        if nr_calls > 2:
+            raise Killed()
+        return match_token_pair_and_evaluate(*args, **kwargs)
+
+    monkeypatch.setattr(solver, 'CHECKPOINT_INTERVAL', 0)
+    monkeypatch.setattr(
+        solver, 'match_token_pair_and_evaluate',
+        killed_match_token_pair_and_evaluate
+    )
+
+    checkpoint_filename = str(tmp_path / 'run.checkpoint')
+    evaluated_token_pairs = []
+    nr_runs = 0
+    while True:
+        nr_runs += 1
+        nr_calls = 0
+        try:
+            main([
+                local_instance, '--solution', solution_filename,
+                'best-token-pair', '--checkpoint', checkpoint_filename,
+                '--seed', '1'
+            ])
+            break
+        except Killed:
+            checkpoint = read_json(checkpoint_filename)
+            assert checkpoint['evaluated_token_pairs'][:-2] == \
+                evaluated_token_pairs
+            evaluated_token_pairs = checkpoint['evaluated_token_pairs']
+
+    checkpoint = read_json(checkpoint_filename)
+    assert nr_runs > 1
+    assert checkpoint['seed'] == 1
+    assert len(set(map(tuple, checkpoint['evaluated_token_pairs']))) == \
+        len(checkpoint['evaluated_token_pairs'])
+    solution = read_json(solution_filename)
+    assert solution['solver']['objective'] == \
+        expected_solution['solver']['objective']
+    assert solution['objVals'] == expected_solution['objVals']
+
+
+def test_ignores_checkpoint_of_another_instance(local_instance, tmp_path):
+    """Asserts that a checkpoint of another instance with as many orders is
+    not resumed from, and that a tampered incumbent is not restored."""
+    # Another instance, with the same number of orders.
+    instance = read_json(local_instance)
+    for order in instance['orders']:
+        order['buyAmount'] = str(int(order['buyAmount']) * 2)
+    other_instance = str(tmp_path / 'other-instance.json')
+    with open(other_instance, 'w') as fd:
+        json.dump(instance, fd)
+
+    solution_filename = str(tmp_path / 'solution.json')
+    main([other_instance, '--solution', solution_filename, 'best-token-pair'])
+    expected_solution = read_json(solution_filename)
+
+    checkpoint_filename = str(tmp_path / 'run.checkpoint')
+    for instance_filename in [local_instance, other_instance]:
+        main([
+            instance_filename, '--solution', solution_filename,
+            'best-token-pair', '--checkpoint', checkpoint_filename
+        ])
+    assert read_json(solution_filename)['solver']['objective'] == \
+        expected_solution['solver']['objective']
+
+    # Only the last solution of the checkpoint is a valid incumbent.
+    checkpoint = read_json(checkpoint_filename)
+    checkpoint['objective'] = str(F(checkpoint['objective']) + 1)
+    with open(checkpoint_filename, 'w') as fd:
+        json.dump(checkpoint, fd)
+    main([
+        other_instance, '--solution', solution_filename,
+        'best-token-pair', '--checkpoint', checkpoint_filename
+    ])
+    assert read_json(solution_filename)['solver']['objective'] == \
+        expected_solution['solver']['objective']
+
+
+def test_ignores_checkpoint_of_another_shard(local_instance, tmp_path):
+    """Asserts that a checkpoint of another shard is not resumed from."""
+    def run(shard, checkpoint_filename):
+        solution_filename = str(tmp_path / 'solution.json')
+        main([
+            local_instance, '--solution', solution_filename,
+            'best-token-pair', '--shard', shard,
+            '--checkpoint', checkpoint_filename
+        ])
+        return read_json(solution_filename), read_json(checkpoint_filename)
+
+    expected_solution, expected_checkpoint = run('2/2', str(tmp_path / '2.ckpt'))
+
+    checkpoint_filename = str(tmp_path / 'run.checkpoint')
+    run('1/2', checkpoint_filename)
+    solution, checkpoint = run('2/2', checkpoint_filename)
+
+    assert checkpoint['shard'] == [2, 2]
+    assert sorted(checkpoint['evaluated_token_pairs']) == \
+        sorted(expected_checkpoint['evaluated_token_pairs'])
+    assert solution['solver']['objective'] == \
+        expected_solution['solver']['objective']
+
+
+def test_seeded_order_is_reproducible(local_instance, tmp_path):
+    """Asserts that runs with the same seed match token pairs in the same
+    order."""
+    orders = []
+    for run in range(2):
+        checkpoint_filename = str(tmp_path / f'run-{run}.checkpoint')
+        main([
+            local_instance, '--solution', str(tmp_path / 'solution.json'),
+            'best-token-pair', '--checkpoint', checkpoint_filename,
+            '--seed', '7'
+        ])
+        orders.append(read_json(checkpoint_filename)['evaluated_token_pairs'])
+    assert orders[0] == orders[1]
@@ -0,0 +1,82 @@
+"""Assert that merging the solutions of shards gives the best solution."""
+import json
+
+import pytest
+
+from dex_open_solver.best_token_pair_solver.solver import shard_token_pairs
+from dex_open_solver.match import main
+from tests.util import read_json
+
+
+LOCAL_INSTANCES = ['best-token-pair/has-non-trival-solution/instance.json']
+
+
+def test_shards_merge_to_best(local_instance, tmp_path):
+    """Asserts that the merged solution has the objective of the unsharded."""
+    solution_filename = str(tmp_path / 'solution.json')
+    main([local_instance, '--solution', solution_filename, 'best-token-pair'])
+    with open(solution_filename, 'r') as fd:
+        expected_solution = json.load(fd)
+
+    nr_shards = 3
+    shard_filenames = []
+    for k in range(1, nr_shards + 1):
+        shard_filenames.append(str(tmp_path / f'shard-{k}.json'))
+        main([
+            local_instance, '--solution', shard_filenames[-1],
+            'best-token-pair', '--shard', f'{k}/{nr_shards}'
+        ])
+
+    merged_filename = str(tmp_path / 'merged.json')
+    main(['merge'] + shard_filenames + ['--solution', merged_filename])
+    with open(merged_filename, 'r') as fd:
+        solution = json.load(fd)
+
+    assert solution['solver']['objective'] == \
+        expected_solution['solver']['objective']
+    assert solution['objVals'] == expected_solution['objVals']
+
+
+def test_rejects_shards_of_other_instances(local_instance, tmp_path):
+    """Asserts that shards of another instance, or of another number of
+    shards, are not merged."""
+    instance = read_json(local_instance)
+    instance['orders'].pop()
+    other_instance = str(tmp_path / 'other-instance.json')
+    with open(other_instance, 'w') as fd:
+        json.dump(instance, fd)
+
+    shard_filenames = {}
+    for instance_filename, shard in [
+        (local_instance, '1/2'), (local_instance, '1/3'), (other_instance, '2/2')
+    ]:
+        shard_filenames[instance_filename, shard] = \
+            str(tmp_path / f'shard-{len(shard_filenames)}.json')
+        main([
+            instance_filename, '--solution',
+            shard_filenames[instance_filename, shard],
+            'best-token-pair', '--shard', shard
+        ])
+
+    for other_shard in [(local_instance, '1/3'), (other_instance, '2/2')]:
+        with pytest.raises(SystemExit):
+            main([
+                'merge', shard_filenames[local_instance, '1/2'],
+                shard_filenames[other_shard],
+                '--solution', str(tmp_path / 'merged.json')
+            ])
+
+
+def test_shards_partition_token_pairs():
+    """Asserts that shards partition the token pairs, whatever their order."""
+    token_pairs = [(f'T{b}', f'T{s}') for b in range(5) for s in range(5) if b != s]
+    nr_shards = 3
+    shards = [
+        shard_token_pairs(token_pairs, (k, nr_shards))
+        for k in range(1, nr_shards + 1)
+    ]
+    assert sorted(sum(shards, [])) == sorted(token_pairs)
+    assert shards == [
+        shard_token_pairs(list(reversed(token_pairs)), (k, nr_shards))
+        for k in range(1, nr_shards + 1)
+    ]
@@ -0,0 +1,82 @@
+"""Assert that the best solution found so far is available while solving."""
+import json
+import os
+import signal
+from decimal import Decimal as D
+from fractions import Fraction as F
+
+from dex_open_solver.best_token_pair_solver import solver
+from dex_open_solver.match import main
+from tests.util import read_json
+
+
+LOCAL_INSTANCES = ['best-token-pair/has-non-trival-solution/instance.json']
+
+
+def test_incumbent_solutions_improve(local_instance, monkeypatch):
+    """Asserts that incumbent solutions have increasing objectives, do not
+    modify the instance, and end with the solution returned."""
+    with open(local_instance, 'r') as fd:
+        instance = json.load(fd, parse_float=D)
+    incumbents = []
+    monkeypatch.setattr(solver, 'INCUMBENT_INTERVAL', 0)
+    solution = solver.solve_instance(
+        instance, seed=1, on_incumbent=incumbents.append
+    )
+
+    assert len(incumbents) > 0
+    assert incumbents[0]['orders'] != []
+    assert all(
+        incumbent['solver']['exit_status'] == 'incumbent'
+        for incumbent in incumbents
+    )
+    objectives = [F(incumbent['solver']['objective']) for incumbent in incumbents]
+    assert objectives == sorted(set(objectives))
+
+    del incumbents[-1]['solver'], solution['solver']
+    assert incumbents[-1] == solution
+
+
+def test_incumbent_solutions_are_throttled(local_instance, monkeypatch):
+    """Asserts that only the first incumbent solution is notified within the
+    interval, and that the best solution found is still returned."""
+    with open(local_instance, 'r') as fd:
+        instance = json.load(fd, parse_float=D)
+    incumbents = []
+    monkeypatch.setattr(solver, 'INCUMBENT_INTERVAL', 3600)
+    solution = solver.solve_instance(
+        instance, seed=1, on_incumbent=incumbents.append
+    )
+
+    assert len(incumbents) == 1
+    assert incumbents[0]['orders'] != []
+    assert F(incumbents[0]['solver']['objective']) <= \
+        F(solution['solver']['objective'])
+
+
+def test_sigterm_returns_best_solution(local_instance, tmp_path, monkeypatch):
+    """Asserts that a run receiving SIGTERM while matching writes the best
+    solution found so far."""
+    match_token_pair_and_evaluate = solver.match_token_pair_and_evaluate
+    nr_calls = 0
+
+    def terminated_match_token_pair_and_evaluate(*args, **kwargs):
+        nonlocal nr_calls
+        nr_calls += 1
+        if nr_calls == 3:
+            os.kill(os.getpid(), signal.SIGTERM)
+        return match_token_pair_and_evaluate(*args, **kwargs)
+
+    monkeypatch.setattr(
+        solver, 'match_token_pair_and_evaluate',
+        terminated_match_token_pair_and_evaluate
+    )
+
+    solution_filename = str(tmp_path / 'solution.json')
+    main([local_instance, '--solution', solution_filename, 'best-token-pair'])
+
+    assert nr_calls == 3
+    assert signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
+    solution = read_json(solution_filename)
+    assert solution['solver']['exit_status'] == 'interrupted'
+    assert not os.path.exists(str(tmp_path / '.tmp-solution.json'))
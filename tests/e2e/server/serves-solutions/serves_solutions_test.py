@@ -0,0 +1,107 @@
+"""Assert that the solver server returns the same solution as the solver."""
+import json
+import threading
+from contextlib import contextmanager
+from decimal import Decimal as D
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from dex_open_solver import server as solver_server
+from dex_open_solver.server import create_server
+from dex_open_solver.token_pair_solver.solver import solve_instance
+
+
+LOCAL_INSTANCES = ['token-pair/has-non-trival-solution/driver-e2e-instance.json']
+
+
+@contextmanager
+def running_server():
+    server = create_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def post(server, path, body):
+    """Post a request body to the server, and return the solution dict."""
+    host, port = server.server_address
+    request = Request(f'http://{host}:{port}{path}', data=body.encode())
+    with urlopen(request) as response:
+        return json.load(response)
+
+
+def test_serves_token_pair_solution(local_instance):
+    """Asserts that a solution served for local_instance is the solver's."""
+    with open(local_instance, 'r') as fd:
+        instance = json.load(fd)
+    body = json.dumps({'instance': instance, 'token_pair': ['token0', 'token1']})
+
+    with running_server() as server:
+        solution = post(server, '/token-pair', body)
+
+    with open(local_instance, 'r') as fd:
+        expected_solution = solve_instance(
+            json.load(fd, parse_float=D), ('token0', 'token1')
+        )
+
+    assert 'solve' in solution['solver']['timings']
+    del solution['solver'], expected_solution['solver']
+    assert solution == expected_solution
+
+
+@pytest.mark.parametrize('body', [
+    '{"instance": ',
+    '[]',
+    '{"token_pair": ["token0", "token1"]}',
+    '{"instance": {}, "token_pair": ["token0", "token1"], "seed": 1}',
+    '{"instance": {}}',
+    '{"instance": {}, "token_pair": ["token0", "token1"], "xrate": "x"}'
+])
+def test_rejects_invalid_requests(body):
+    with running_server() as server:
+        with pytest.raises(HTTPError) as error:
+            post(server, '/token-pair', body)
+    assert error.value.code == 400
+
+
+def test_reports_solver_failures(local_instance, monkeypatch):
+    """Asserts that errors raised while solving are server errors."""
+    def failing_solve_instance(instance, mode, options):
+        raise KeyError('T0')
+
+    monkeypatch.setattr(solver_server, 'solve_instance', failing_solve_instance)
+    with open(local_instance, 'r') as fd:
+        instance = json.load(fd)
+    body = json.dumps({'instance': instance, 'token_pair': ['token0', 'token1']})
+    with running_server() as server:
+        with pytest.raises(HTTPError) as error:
+            post(server, '/token-pair', body)
+    assert error.value.code == 500
+
+
+def test_caches_deterministic_solutions_only(local_instance):
+    """Asserts that only repeated token-pair requests without time limit are
+    served from the cache, with their own timings."""
+    with open(local_instance, 'r') as fd:
+        instance = json.load(fd)
+    requests = [
+        ('/token-pair', {'token_pair': ['token0', 'token1']}, True),
+        ('/token-pair', {'token_pair': ['token0', 'token1'], 'time_limit': 60},
+         False),
+        ('/best-token-pair', {}, False)
+    ]
+    with running_server() as server:
+        for path, options, cached in requests:
+            body = json.dumps(dict(options, instance=instance))
+            first_solution = post(server, path, body)
+            solution = post(server, path, body)
+            assert 'solve' in first_solution['solver']['timings']
+            assert ('cache' in solution['solver']['timings']) == cached
+            assert ('solve' in solution['solver']['timings']) != cached
+            del first_solution['solver'], solution['solver']
+            assert solution == first_solution
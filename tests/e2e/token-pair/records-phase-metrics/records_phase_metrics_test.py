@@ -0,0 +1,29 @@
+"""Assert that the solver block records where the solve spent its time."""
+import json
+
+from dex_open_solver.match import main
+
+
+LOCAL_INSTANCES = ['token-pair/has-non-trival-solution/driver-e2e-instance.json']
+
+
+def test_records_phase_metrics(local_instance, tmp_path):
+    """Asserts that phase times add up to at most the runtime, and that the
+    work done is counted."""
+    solution_filename = str(tmp_path / 'solution.json')
+    main([
+        local_instance, '--solution', solution_filename,
+        'token-pair', 'token0', 'token1'
+    ])
+    with open(solution_filename, 'r') as fd:
+        solver = json.load(fd)['solver']
+
+    phases = solver['phases']
+    assert {'load', 'xrate_search', 'rounding', 'validation'} <= set(phases)
+    assert all(time >= 0 for time in phases.values())
+    assert sum(phases.values()) <= solver['runtime']
+
+    counters = solver['counters']
+    assert counters['viability_iterations'] >= 1
+    assert counters['intervals'] >= 1
+    assert counters['compute_buy_amounts'] >= counters['candidates'] >= 1
@@ -0,0 +1,36 @@
+"""Assert that profiled runs write their report next to the solution."""
+import pstats
+
+from dex_open_solver.match import main
+
+
+LOCAL_INSTANCES = ['token-pair/has-non-trival-solution/driver-e2e-instance.json']
+
+
+def test_writes_cprofile_statistics(local_instance, tmp_path):
+    """Asserts that the statistics can be loaded, and that the summary lists
+    functions of the solver modules."""
+    solution_filename = str(tmp_path / 'solution.json')
+    main([
+        local_instance, '--solution', solution_filename, '--profile', 'cprofile',
+        'token-pair', 'token0', 'token1'
+    ])
+    stats = pstats.Stats(solution_filename + '.prof')
+    assert any(
+        filename.endswith('xrate.py') for filename, _, _ in stats.stats
+    )
+    with open(solution_filename + '.profile.txt', 'r') as fd:
+        assert 'xrate.py' in fd.read()
+
+
+def test_writes_tracemalloc_report(local_instance, tmp_path):
+    """Asserts that the memory report and its summary give the peak."""
+    solution_filename = str(tmp_path / 'solution.json')
+    main([
+        local_instance, '--solution', solution_filename,
+        '--profile', 'tracemalloc', 'token-pair', 'token0', 'token1'
+    ])
+    with open(solution_filename + '.tracemalloc.txt', 'r') as fd:
+        assert fd.read().startswith('Peak memory allocated:')
+    with open(solution_filename + '.profile.txt', 'r') as fd:
+        assert fd.read().startswith('Peak memory allocated:')
@@ -0,0 +1,48 @@
+"""Assert that the trace of a solve is written when asked, or when the
+solution is not valid."""
+import json
+
+import pytest
+
+import dex_open_solver.token_pair_solver.solver as token_pair_solver
+from dex_open_solver.match import main
+
+
+LOCAL_INSTANCES = ['token-pair/has-non-trival-solution/driver-e2e-instance.json']
+
+
+def read_trace(filename):
+    with open(filename, 'r') as fd:
+        return [json.loads(line) for line in fd]
+
+
+def test_writes_trace(local_instance, tmp_path):
+    """Asserts that the exchange rate search and its outcome are traced."""
+    trace_filename = str(tmp_path / 'trace.jsonl')
+    main([
+        local_instance, '--solution', str(tmp_path / 'solution.json'),
+        '--trace', trace_filename, 'token-pair', 'token0', 'token1'
+    ])
+    records = read_trace(trace_filename)
+
+    assert records[0] == {'kind': 'pair', 'token_pair': ['token0', 'token1']}
+    kinds = {record['kind'] for record in records}
+    assert {'interval', 'xrate'} <= kinds
+    interval = next(record for record in records if record['kind'] == 'interval')
+    assert set(interval) == {'kind', 'xrate_lb', 'xrate_ub', 'candidates'}
+
+
+def test_writes_trace_of_invalid_solution(local_instance, tmp_path, monkeypatch):
+    """Asserts that the trace is written before the validation error is
+    raised."""
+    def validate(*args, **kwargs):
+        raise AssertionError()
+    monkeypatch.setattr(token_pair_solver, 'validate', validate)
+
+    trace_filename = str(tmp_path / 'trace.jsonl')
+    with pytest.raises(AssertionError):
+        main([
+            local_instance, '--solution', str(tmp_path / 'solution.json'),
+            '--trace', trace_filename, 'token-pair', 'token0', 'token1'
+        ])
+    assert read_trace(trace_filename)[0]['kind'] == 'pair'
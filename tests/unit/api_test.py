@@ -0,0 +1,65 @@
+import json
+from decimal import Decimal as D
+from pathlib import Path
+
+import pytest
+
+from dex_open_solver.core.api import load_problem
+from dex_open_solver.core.stream import load_instance
+from dex_open_solver.token_pair_solver.api import \
+    load_problem as load_token_pair_problem
+from dex_open_solver.token_pair_solver.api import is_token_pair_order
+
+ROOT_DIR = Path(__file__).parent.parent.parent
+
+INSTANCE_FILES = sorted(
+    str(path) for path in (ROOT_DIR / 'tests' / 'e2e').glob('*/*/*.json')
+)
+
+
+def token_pairs(instance):
+    """All token pairs that can be passed to the token pair solver."""
+    tokens = {o['buyToken'] for o in instance['orders']} \
+        | {o['sellToken'] for o in instance['orders']}
+    fee_token = instance['fee']['token']
+    return [
+        (b_buy_token, s_buy_token)
+        for b_buy_token in sorted(tokens)
+        for s_buy_token in sorted(tokens - {b_buy_token, fee_token})
+    ]
+
+
+def order_caps(orders):
+    return {order.id: order.max_sell_amount for order in orders}
+
+
+@pytest.mark.parametrize('instance_file', INSTANCE_FILES)
+def test_token_pair_problem_has_same_order_caps(instance_file):
+    """Test that loading only the token pair orders gives the same order caps."""
+    with open(instance_file, 'r') as fd:
+        instance = json.load(fd, parse_float=D)
+    _, orders, _ = load_problem(instance)
+
+    for token_pair in token_pairs(instance)[:20]:
+        b_buy_token, s_buy_token = token_pair
+        expected_orders = [
+            o for o in orders
+            if {o.buy_token, o.sell_token} == {b_buy_token, s_buy_token}
+            or (o.buy_token == b_buy_token and o.sell_token == instance['fee']['token'])
+        ]
+
+        _, b_orders, s_orders, f_orders, _ = load_token_pair_problem(
+            instance, token_pair
+        )
+        assert order_caps(b_orders + s_orders + f_orders) == \
+            order_caps(expected_orders)
+
+        with open(instance_file, 'r') as fd:
+            streamed_instance = load_instance(
+                fd, order_filter=lambda o: is_token_pair_order(o, token_pair)
+            )
+        _, b_orders, s_orders, f_orders, _ = load_token_pair_problem(
+            streamed_instance, token_pair
+        )
+        assert order_caps(b_orders + s_orders + f_orders) == \
+            order_caps(expected_orders)
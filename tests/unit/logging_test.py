@@ -0,0 +1,33 @@
+import logging
+from fractions import Fraction as F
+
+from dex_open_solver.core import round as core_round
+from dex_open_solver.core.util import LoggerFormatter
+
+
+def make_record(msg, args):
+    return logging.LogRecord('test', logging.INFO, __file__, 1, msg, args, None)
+
+
+def test_formatter_converts_nested_fractions():
+    record = make_record("%s %s %s", (F(1, 2), [{'0': F(1, 4)}], 'text'))
+    text = LoggerFormatter().format(record)
+    assert text.endswith("5.000e-01 [{'0': 2.500e-01}] text")
+
+    record = make_record("%s %s", (F(1, 2), [{'0': F(1, 4)}]))
+    text = LoggerFormatter(rationals=True).format(record)
+    assert text.endswith("1/2 [{'0': 1/4}]")
+
+
+def test_token_balances_not_logged_above_debug(monkeypatch, caplog):
+    calls = []
+    monkeypatch.setattr(
+        core_round, 'log_token_balances', lambda *args: calls.append(args)
+    )
+    caplog.set_level(logging.INFO, logger=core_round.logger.name)
+    core_round.round_solution({}, [], fee=None)
+    assert calls == []
+
+    caplog.set_level(logging.DEBUG, logger=core_round.logger.name)
+    core_round.round_solution({}, [], fee=None)
+    assert len(calls) == 1
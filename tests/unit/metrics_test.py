@@ -0,0 +1,29 @@
+import time
+
+from dex_open_solver.core.metrics import NULL_METRICS, SolveMetrics
+
+
+def test_nested_phases_are_exclusive():
+    metrics = SolveMetrics()
+    start_time = time.perf_counter()
+    with metrics.phase('outer'):
+        time.sleep(0.01)
+        with metrics.phase('inner'):
+            time.sleep(0.02)
+        with metrics.phase('outer'):
+            time.sleep(0.01)
+    elapsed = time.perf_counter() - start_time
+    metrics.count('calls')
+    metrics.count('calls', 2)
+
+    phases = metrics.to_dict()['phases']
+    assert phases['outer'] >= 0.02
+    assert phases['inner'] >= 0.02
+    assert phases['outer'] + phases['inner'] <= elapsed
+    assert metrics.to_dict()['counters'] == {'calls': 3}
+
+
+def test_null_metrics_record_nothing():
+    with NULL_METRICS.phase('phase'):
+        NULL_METRICS.count('calls')
+    assert not hasattr(NULL_METRICS, 'to_dict')
@@ -0,0 +1,65 @@
+import json
+from fractions import Fraction as F
+
+from hypothesis import given
+from hypothesis import strategies as s
+
+from dex_open_solver.core.config import Config
+from dex_open_solver.core.order import Order, parse_amount
+
+# Amounts as sent by the protocol, and other inputs Fraction accepts.
+amounts = s.one_of(
+    s.integers(min_value=1, max_value=10**30).map(str),
+    s.integers(min_value=1, max_value=10**30),
+    s.fractions(min_value=F(1, 10**6), max_value=10**30).map(str),
+    s.decimals(min_value=1, max_value=10**30, places=3).map(str)
+)
+
+
+@given(amounts)
+def test_parse_amount(amount):
+    """Test that amounts are parsed as Fraction would."""
+    assert parse_amount(amount) == F(amount)
+
+
+@given(s.lists(s.tuples(amounts, amounts), max_size=10))
+def test_load_from_dicts(amount_pairs):
+    """Test that loading order dicts in bulk is the same as one by one."""
+    order_dicts = [
+        {
+            'accountID': 'A', 'buyToken': 'T0', 'sellToken': 'T1',
+            'sellAmount': sell_amount, 'buyAmount': buy_amount
+        }
+        for sell_amount, buy_amount in amount_pairs
+    ]
+    config = Config.snapshot()
+
+    orders = Order.load_from_dicts(order_dicts, config)
+
+    for index, (order, order_dict) in enumerate(zip(orders, order_dicts)):
+        sell_amount = F(order_dict['sellAmount'])
+        buy_amount = max(config.MIN_TRADABLE_AMOUNT, F(order_dict['buyAmount']))
+        assert order.id == str(index)
+        assert order.max_sell_amount == sell_amount
+        assert order.max_xrate == sell_amount / buy_amount
+        assert isinstance(order.max_sell_amount, F)
+        assert isinstance(order.max_xrate, F)
+
+
+def test_loaded_orders_share_token_and_account_strings():
+    """Test that equal tokens and account ids are loaded as the same object."""
+    order_dicts = json.loads(json.dumps([
+        {
+            'accountID': 'A0', 'buyToken': 'T0', 'sellToken': 'T1',
+            'sellAmount': '1', 'buyAmount': '1'
+        }
+    ] * 2))
+    assert order_dicts[0]['accountID'] is not order_dicts[1]['accountID']
+
+    for orders in [
+        Order.load_from_dicts(order_dicts),
+        [Order.load_from_dict(order_dict) for order_dict in order_dicts]
+    ]:
+        assert orders[0].buy_token is orders[1].buy_token
+        assert orders[0].sell_token is orders[1].sell_token
+        assert orders[0].account_id is orders[1].account_id
@@ -0,0 +1,65 @@
+from fractions import Fraction as F
+
+from hypothesis import given
+from hypothesis import strategies as s
+
+from dex_open_solver.core.api import Fee
+from dex_open_solver.core.config import Config
+from dex_open_solver.core.order import Order
+from dex_open_solver.core.order_util import IntegerTraits
+from dex_open_solver.core.round import (compute_spanning_order_arborescence,
+                                        enumerate_spanning_arborescence,
+                                        is_acyclic, repair_leaf_token)
+
+fee = Fee(token='F', value=0)
+
+tokens = s.sampled_from(['F', 'T0', 'T1'])
+
+
+@given(s.lists(s.tuples(tokens, tokens).filter(lambda e: e[0] != e[1]), max_size=6))
+def test_enumerate_spanning_arborescence(edges):
+    """Test that the enumerated arborescence is as large as Edmond's."""
+    import networkx as nx
+
+    edges = [(u, v) for u, v in edges if v != fee.token]
+    tree = enumerate_spanning_arborescence(edges)
+
+    assert is_acyclic(tree)
+    assert all((parent, child) in edges for child, parent in tree.items())
+
+    G = nx.DiGraph(edges)
+    arborescence = nx.algorithms.tree.branchings.Edmonds(G).find_optimum()
+    assert len(tree) == len(arborescence.edges)
+
+
+def test_token_pair_arborescence():
+    """Test the arborescence of a token pair + fee token solution."""
+    orders = [
+        Order(buy_token='T0', sell_token='T1', max_sell_amount=1, max_xrate=1),
+        Order(buy_token='T1', sell_token='T0', max_sell_amount=1, max_xrate=1),
+        Order(buy_token='T0', sell_token='F', max_sell_amount=1, max_xrate=1)
+    ]
+    assert compute_spanning_order_arborescence(orders, fee) == {'T0': 'F', 'T1': 'T0'}
+
+
+def test_repair_leaf_token():
+    """Test that an imbalance no single order can absorb is spread over orders."""
+    fee = Fee(token='F', value=F(1, 1000))
+    prices = {'T0': 10**18, 'T1': 10**18}
+    orders = [
+        Order(buy_token='T1', sell_token='T0', max_sell_amount=20035, max_xrate=2),
+        Order(buy_token='T1', sell_token='T0', max_sell_amount=20035, max_xrate=2)
+    ]
+    for order in orders:
+        order.buy_amount = 20000
+        order.set_sell_amount_from_buy_amount(prices, fee, IntegerTraits)
+    token_balances = {'T0': 0, 'T1': 25}
+
+    repair_leaf_token(
+        'T1', 'T0', orders, token_balances, prices, fee, Config.snapshot()
+    )
+
+    assert token_balances['T1'] == 0
+    assert token_balances['T0'] == sum(o.sell_amount for o in orders) - 2 * 20020
+    assert all(o.buy_amount > 20000 for o in orders)
+    assert all(o.sell_amount <= o.max_sell_amount for o in orders)
@@ -0,0 +1,132 @@
+import io
+import json
+from argparse import Namespace
+from decimal import Decimal as D
+from pathlib import Path
+
+import pytest
+
+from dex_open_solver.core.order import Order
+from dex_open_solver.core.snapshot import load_snapshot, write_snapshot
+from dex_open_solver.token_pair_solver.solver import main
+
+ROOT_DIR = Path(__file__).parent.parent.parent
+
+INSTANCE_FILES = sorted(
+    str(path) for path in (ROOT_DIR / 'tests' / 'e2e').glob('*/*/*.json')
+)
+
+
+def convert(instance_file, snapshot_file):
+    with open(instance_file, 'r') as instance_fd, \
+            open(snapshot_file, 'wb') as snapshot_fd:
+        write_snapshot(instance_fd, snapshot_fd)
+
+
+def order_attributes(order):
+    return (
+        order.id, order.account_id, order.buy_token, order.sell_token,
+        order.max_sell_amount, order.max_xrate
+    )
+
+
+@pytest.mark.parametrize('instance_file', INSTANCE_FILES)
+def test_load_snapshot(tmp_path, instance_file):
+    """Test that a loaded snapshot is the same as the parsed json."""
+    with open(instance_file, 'r') as fd:
+        expected_instance = json.load(fd, parse_float=D)
+    snapshot_file = str(tmp_path / 'instance.snapshot')
+    convert(instance_file, snapshot_file)
+    with open(snapshot_file, 'rb') as fd:
+        instance = load_snapshot(fd)
+
+    assert list(instance.keys()) == list(expected_instance.keys())
+    assert [list(o.items()) for o in instance['orders']] == [
+        list(o.items()) for o in expected_instance['orders']
+    ]
+    assert [order_attributes(o) for o in instance['orders'].orders] == [
+        order_attributes(o)
+        for o in Order.load_from_dicts(expected_instance['orders'])
+    ]
+    del instance['orders'], expected_instance['orders']
+    assert instance == expected_instance
+
+
+def test_snapshot_keeps_other_order_fields_exactly(tmp_path):
+    instance_text = (
+        '{"accounts": {"0": {"T0": "100"}}, "orders": [{"accountID": "0", '
+        '"sellToken": "T0", "buyToken": "T1", "sellAmount": "100", '
+        '"buyAmount": "1", "orderID": 7, "limit": 0.10000000000000000000000001}]}'
+    )
+    snapshot_file = str(tmp_path / 'instance.snapshot')
+    with open(snapshot_file, 'wb') as fd:
+        write_snapshot(io.StringIO(instance_text), fd)
+
+    with open(snapshot_file, 'rb') as fd:
+        orders = load_snapshot(fd)['orders']
+        order_dict = orders[0]
+        orders.close()
+    assert order_dict['orderID'] == 7
+    assert order_dict['limit'] == D('0.10000000000000000000000001')
+
+
+def test_snapshot_keeps_order_key_order_and_amount_types(tmp_path):
+    instance_text = (
+        '{"accounts": {}, "orders": [{"orderID": 1, "buyAmount": 1, '
+        '"sellToken": "T0", "sellAmount": "100", "accountID": "0", '
+        '"buyToken": "T1"}, {"accountID": "0", "sellAmount": 100, '
+        '"buyAmount": "1", "sellToken": "T1", "buyToken": "T0"}]}'
+    )
+    expected_orders = json.loads(instance_text)['orders']
+    snapshot_file = str(tmp_path / 'instance.snapshot')
+    with open(snapshot_file, 'wb') as fd:
+        write_snapshot(io.StringIO(instance_text), fd)
+
+    with open(snapshot_file, 'rb') as fd:
+        orders = load_snapshot(fd)['orders']
+        order_dicts = list(orders)
+        orders.close()
+    for order_dict, expected_order_dict in zip(order_dicts, expected_orders):
+        assert [(k, v, type(v)) for k, v in order_dict.items()] == [
+            (k, v, type(v)) for k, v in expected_order_dict.items()
+        ]
+
+
+def test_snapshot_rejects_fractional_amounts():
+    instance = {
+        'accounts': {},
+        'orders': [{
+            'accountID': '0', 'sellToken': 'T0', 'buyToken': 'T1',
+            'sellAmount': '1/2', 'buyAmount': '1'
+        }]
+    }
+    with pytest.raises(ValueError):
+        write_snapshot(io.StringIO(json.dumps(instance)), io.BytesIO())
+
+
+def test_snapshot_solution_is_the_same(tmp_path):
+    """Test that solving a snapshot gives the same solution as the json."""
+    instance_file = str(
+        ROOT_DIR / 'tests' / 'e2e' / 'token-pair' / 'does-not-crash-match-pair'
+        / 'fee-connection.json'
+    )
+    snapshot_file = str(tmp_path / 'instance.snapshot')
+    convert(instance_file, snapshot_file)
+
+    solutions = []
+    for filename, mode in [(instance_file, 'r'), (snapshot_file, 'rb')]:
+        solution_file = str(tmp_path / 'solution.json')
+        with open(filename, mode) as fd:
+            main(Namespace(
+                instance=fd,
+                token_pair=('token0', 'token1'),
+                solution_filename=solution_file,
+                xrate=None
+            ))
+        with open(solution_file, 'r') as fd:
+            solution = json.load(fd)
+        del solution['solver']
+        solutions.append(solution)
+
+    assert solutions[0] == solutions[1]
+    assert len(solutions[0]['orders']) > 0
@@ -1,10 +1,14 @@
+from copy import deepcopy
 from fractions import Fraction as F
+from unittest.mock import patch
 
-from hypothesis import event, given
+from hypothesis import assume, event, given
 
 from dex_open_solver.core.api import Fee
 from dex_open_solver.core.config import Config
+from dex_open_solver.core.context import NULL_CONTEXT, Deadline
 from dex_open_solver.core.orderbook import count_nr_exec_orders
+from dex_open_solver.token_pair_solver import solver
 from dex_open_solver.token_pair_solver.solver import (
     solve_token_pair_and_fee_token_economic_viable
 )
@@ -16,7 +20,7 @@ from tests.unit.util import examples
 
 
 def solve_token_pair_and_fee_token_helper(
-    b_orders, s_orders, f_orders, fee
+    b_orders, s_orders, f_orders, fee, config, context=NULL_CONTEXT
 ):
     token_pair = ('T0', 'T1')
 
@@ -37,7 +41,8 @@ def solve_token_pair_and_fee_token_helper(
         f_order.account_id = 'A'
 
     orders, prices = solve_token_pair_and_fee_token_economic_viable(
-        token_pair, accounts, b_orders, s_orders, f_orders, fee
+        token_pair, accounts, b_orders, s_orders, f_orders, fee, config=config,
+        context=context
     )
 
     if count_nr_exec_orders(orders) == 0:
@@ -45,6 +50,8 @@ def solve_token_pair_and_fee_token_helper(
     else:
         event("found non-trivial solution")
 
+    return orders, prices
+
 
 # Test main function using default constants.
 @given(
@@ -55,9 +62,12 @@ def solve_token_pair_and_fee_token_helper(
 @examples(solve_token_pair_and_fee_token_examples)
 def test_solve_token_pair_and_fee_token(b_orders, s_orders, f_orders):
     fee = Fee(token='F', value=F(1, 1000))
-    Config.MIN_AVERAGE_ORDER_FEE = 0
-    Config.MIN_ABSOLUTE_ORDER_FEE = 0
-    solve_token_pair_and_fee_token_helper(b_orders, s_orders, f_orders, fee)
+    config = Config.snapshot(
+        MIN_AVERAGE_ORDER_FEE=0, MIN_ABSOLUTE_ORDER_FEE=0
+    )
+    solve_token_pair_and_fee_token_helper(
+        b_orders, s_orders, f_orders, fee, config
+    )
 
 
 # Test minimum average fee per order constraint.
@@ -72,10 +82,13 @@ def test_min_average_order_fee_constraint(
 ):
     fee = Fee(token='F', value=F(1, 1000))
 
-    Config.MIN_AVERAGE_ORDER_FEE = int(10e18)
-    Config.MIN_ABSOLUTE_ORDER_FEE = 0
+    config = Config.snapshot(
+        MIN_AVERAGE_ORDER_FEE=int(10e18), MIN_ABSOLUTE_ORDER_FEE=0
+    )
 
-    solve_token_pair_and_fee_token_helper(b_orders, s_orders, f_orders, fee)
+    solve_token_pair_and_fee_token_helper(
+        b_orders, s_orders, f_orders, fee, config
+    )
 
 
 # Test minimum absolute fee per order constraint.
@@ -90,7 +103,97 @@ def test_min_absolute_order_fee_constraint(
     # Note that fee ratio here is different than usual.
     fee = Fee(token='F', value=F(1, 1000))
 
-    Config.MIN_AVERAGE_ORDER_FEE = 0
-    Config.MIN_ABSOLUTE_ORDER_FEE = int(10e18)
+    config = Config.snapshot(
+        MIN_AVERAGE_ORDER_FEE=0, MIN_ABSOLUTE_ORDER_FEE=int(10e18)
+    )
+
+    solve_token_pair_and_fee_token_helper(
+        b_orders, s_orders, f_orders, fee, config
+    )
 
-    solve_token_pair_and_fee_token_helper(b_orders, s_orders, f_orders, fee)
+
+# Test that the solver gives up once the deadline has expired.
+@given(
+    random_order_list(min_size=1, max_size=4, buy_token='T0', sell_token='T1'),
+    random_order_list(min_size=1, max_size=4, buy_token='T1', sell_token='T0'),
+    random_order_list(min_size=1, max_size=4, buy_token='T0', sell_token='F')
+)
+def test_expired_deadline(b_orders, s_orders, f_orders):
+    fee = Fee(token='F', value=F(1, 1000))
+    deadline = Deadline(0, start_time=0)
+    context = NULL_CONTEXT._replace(deadline=deadline)
+
+    orders, prices = solve_token_pair_and_fee_token_helper(
+        b_orders, s_orders, f_orders, fee, Config.snapshot(), context
+    )
+
+    assert count_nr_exec_orders(orders) == 0
+    assert deadline.reached
+
+
+def solution_amounts(orders, prices):
+    return [
+        (order.id, order.buy_amount, order.sell_amount) for order in orders
+    ], prices
+
+
+# Test that a deadline expiring within the loop choosing the number of orders
+# selling fee keeps the best solution found so far.
+@given(
+    random_order_list(min_size=1, max_size=4, buy_token='T0', sell_token='T1'),
+    random_order_list(min_size=1, max_size=4, buy_token='T1', sell_token='T0'),
+    random_order_list(min_size=4, max_size=6, buy_token='T0', sell_token='F')
+)
+@examples(solve_token_pair_and_fee_token_examples)
+def test_deadline_expiring_while_choosing_f_orders(b_orders, s_orders, f_orders):
+    fee = Fee(token='F', value=F(1, 1000))
+    # Few executed orders, so that several numbers of f_orders are tried.
+    config = Config.snapshot(
+        MAX_NR_EXEC_ORDERS=6, MIN_AVERAGE_ORDER_FEE=0, MIN_ABSOLUTE_ORDER_FEE=0
+    )
+    deadline = Deadline()
+    context = NULL_CONTEXT._replace(deadline=deadline)
+
+    # The deadline expires once a number of orders selling fee gave a solution.
+    given_exec_f_orders = solver.solve_token_pair_and_fee_token_given_exec_f_orders
+    nr_exec_f_orders_tried = []
+    nr_solutions = 0
+
+    def expiring_given_exec_f_orders(nr_exec_f_orders, *args, **kwargs):
+        nonlocal nr_solutions
+        result = given_exec_f_orders(nr_exec_f_orders, *args, **kwargs)
+        nr_exec_f_orders_tried.append(nr_exec_f_orders)
+        _, _, b_buy_token_price = result
+        if b_buy_token_price is not None:
+            nr_solutions += 1
+            deadline.stop()
+        return result
+
+    with patch.object(
+        solver, 'solve_token_pair_and_fee_token_given_exec_f_orders',
+        expiring_given_exec_f_orders
+    ):
+        solution = solve_token_pair_and_fee_token_helper(
+            deepcopy(b_orders), deepcopy(s_orders), deepcopy(f_orders), fee,
+            config, context
+        )
+    assume(nr_solutions > 0)
+    assert nr_solutions == 1
+    if deadline.reached:
+        event("f_orders loop cut short")
+
+    # Same as a solve only trying the numbers of orders selling fee tried.
+    compute_nr_f_orders_to_execute = solver.compute_nr_f_orders_to_execute
+
+    def tried_nr_f_orders_to_execute(*args, **kwargs):
+        min_nr_exec_f_orders, _ = compute_nr_f_orders_to_execute(*args, **kwargs)
+        return min_nr_exec_f_orders, nr_exec_f_orders_tried[-1]
+
+    with patch.object(
+        solver, 'compute_nr_f_orders_to_execute', tried_nr_f_orders_to_execute
+    ):
+        expected_solution = solve_token_pair_and_fee_token_helper(
+            b_orders, s_orders, f_orders, fee, config
+        )
+
+    assert solution_amounts(*solution) == solution_amounts(*expected_solution)
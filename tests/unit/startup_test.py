@@ -0,0 +1,74 @@
+"""Guard the import budget of the gp_match entry point.
+
+The solver is launched as a fresh process per batch, so importing the entry
+point should not pull in the solvers or any heavy dependency.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+from dex_open_solver.match import COMMANDS
+
+ROOT_DIR = Path(__file__).parents[2]
+
+# Maximum cumulative import time of dex_open_solver.match, in microseconds.
+# About ten times what it takes, so that only a regression (such as importing
+# a solver or networkx) exceeds it.
+IMPORT_TIME_BUDGET_US = 300000
+
+# Number of measurements of the import time, of which the fastest is used.
+NR_MEASUREMENTS = 3
+
+# Modules that must only be imported when a subcommand actually runs.
+LAZY_MODULES = [
+    # Dependencies of the solvers and commands.
+    'cProfile',
+    'http.server',
+    'json',
+    'mmap',
+    'networkx',
+    'socketserver',
+    'tempfile',
+    'tracemalloc',
+    # The solvers, and the modules of the commands.
+    'dex_open_solver.api',
+    'dex_open_solver.core.api',
+    'dex_open_solver.core.snapshot',
+    'dex_open_solver.profiling',
+    'dex_open_solver.token_pair_solver.solver',
+    'dex_open_solver.best_token_pair_solver.solver'
+] + [module for module, _ in COMMANDS.values()]
+
+
+def import_times(module):
+    """Return {module: cumulative import time [us]} from `python -X importtime`,
+    for the modules imported by module in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True,
+        cwd=str(ROOT_DIR)
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_entry_point_does_not_import_heavy_modules():
+    modules = import_times('dex_open_solver.match')
+
+    assert 'dex_open_solver.match' in modules
+    for module in LAZY_MODULES:
+        assert module not in modules
+
+
+def test_entry_point_import_budget():
+    import_time = min(
+        import_times('dex_open_solver.match')['dex_open_solver.match']
+        for _ in range(NR_MEASUREMENTS)
+    )
+
+    assert import_time <= IMPORT_TIME_BUDGET_US
@@ -0,0 +1,79 @@
+import io
+import json
+from decimal import Decimal as D
+from pathlib import Path
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as s
+
+from dex_open_solver.core.stream import (JSONStreamReader, load_instance,
+                                         write_json)
+from dex_open_solver.core.util import open_file
+
+ROOT_DIR = Path(__file__).parent.parent.parent
+
+INSTANCE_FILES = sorted(
+    str(path) for path in (ROOT_DIR / 'tests' / 'e2e').glob('*/*/*.json')
+)
+
+json_values = s.recursive(
+    s.none() | s.booleans() | s.integers() | s.text(),
+    lambda children: s.lists(children) | s.dictionaries(s.text(), children),
+    max_leaves=10
+)
+
+
+@given(json_values, s.integers(min_value=1, max_value=8))
+def test_read_value(value, chunk_size):
+    """Test that values are read whole, whatever the chunk size."""
+    text = json.dumps(value, indent=1)
+    reader = JSONStreamReader(io.StringIO(text), chunk_size)
+    assert reader.read_value() == (value, text)
+    reader.expect_end()
+
+
+@pytest.mark.parametrize('instance_file', INSTANCE_FILES)
+@pytest.mark.parametrize('chunk_size', [7, 2**16])
+def test_load_instance(instance_file, chunk_size):
+    """Test that a loaded instance is the same as the parsed json."""
+    with open(instance_file, 'r') as fd:
+        expected_instance = json.load(fd, parse_float=D)
+    with open(instance_file, 'r') as fd:
+        instance = load_instance(fd, chunk_size=chunk_size)
+
+    assert list(instance.keys()) == list(expected_instance.keys())
+    assert list(instance['orders']) == expected_instance['orders']
+    assert [order.id for order in instance['orders'].orders] == \
+        [str(index) for index in range(len(expected_instance['orders']))]
+    del instance['orders'], expected_instance['orders']
+    assert instance == expected_instance
+
+
+@pytest.mark.parametrize('extension', ['.json', '.json.gz', '.json.bz2', '.json.xz'])
+def test_load_compressed_instance(tmp_path, extension):
+    """Test that compressed instances are loaded as the uncompressed one."""
+    with open(INSTANCE_FILES[0], 'r') as fd:
+        text = fd.read()
+    expected_instance = json.loads(text, parse_float=D)
+    instance_file = str(tmp_path / ('instance' + extension))
+    with open_file(instance_file, 'w') as fd:
+        fd.write(text)
+    with open_file(instance_file) as fd:
+        instance = load_instance(fd, chunk_size=7)
+
+    assert list(instance['orders']) == expected_instance['orders']
+    del instance['orders'], expected_instance['orders']
+    assert instance == expected_instance
+
+
+@given(s.dictionaries(s.text(), json_values))
+def test_write_json(obj):
+    """Test that the output is the same as the one of json.dump."""
+    fd = io.StringIO()
+    write_json(obj, fd)
+    assert fd.getvalue() == json.dumps(obj, indent=4)
+
+    fd = io.StringIO()
+    write_json(obj, fd, indent=None)
+    assert fd.getvalue() == json.dumps(obj, separators=(',', ':'))
@@ -0,0 +1,23 @@
+import json
+from fractions import Fraction as F
+
+from dex_open_solver.core.trace import NULL_TRACE, TraceBuffer
+
+
+def test_trace_keeps_last_records(tmp_path):
+    trace = TraceBuffer(str(tmp_path / 'trace.jsonl'), capacity=2)
+    for i in range(3):
+        trace.record('interval', xrate_lb=F(i, 3), candidates=[(F(1, 2), [3], i)])
+    filename = trace.dump()
+
+    with open(filename, 'r') as fd:
+        records = [json.loads(line) for line in fd]
+    assert records == [
+        {'kind': 'interval', 'xrate_lb': '1/3', 'candidates': [['1/2', ['3'], '1']]},
+        {'kind': 'interval', 'xrate_lb': '2/3', 'candidates': [['1/2', ['3'], '2']]}
+    ]
+
+
+def test_null_trace_records_nothing():
+    NULL_TRACE.record('pair', token_pair=('T0', 'T1'))
+    assert NULL_TRACE.dump() is None
@@ -4,6 +4,8 @@ from hypothesis import assume, given, settings
 
 from dex_open_solver.core.api import Fee
 from dex_open_solver.core.config import Config
+from dex_open_solver.core.context import NULL_CONTEXT, Deadline
+from dex_open_solver.core.metrics import SolveMetrics
 from dex_open_solver.token_pair_solver.amount import compute_buy_amounts
 from dex_open_solver.token_pair_solver.orderbook import compute_objective_rational
 from dex_open_solver.token_pair_solver.xrate import find_best_xrate
@@ -14,8 +16,8 @@ from tests.unit.xrate_test_examples import find_best_xrate_examples
 fee = Fee(token='T0', value=F(1, 1000))
 
 
-def compute_objective(b_orders, s_orders, xrate, fee):
-    compute_buy_amounts(xrate, b_orders, s_orders, fee)
+def compute_objective(b_orders, s_orders, xrate, fee, config):
+    compute_buy_amounts(xrate, b_orders, s_orders, fee, config=config)
     return compute_objective_rational(
         b_orders, s_orders, [],
         xrate,
@@ -24,6 +26,13 @@ def compute_objective(b_orders, s_orders, xrate, fee):
     )
 
 
+def xrate_bounds(b_orders, s_orders):
+    """Return the bounds of the xrates at which orders can be matched."""
+    b_order_xrates = [b_o.max_xrate * (1 - fee.value) for b_o in b_orders]
+    s_order_xrates = [1 / (s_o.max_xrate * (1 - fee.value)) for s_o in s_orders]
+    return min(s_order_xrates), max(b_order_xrates)
+
+
 @given(
     random_order_list(min_size=1, max_size=4, buy_token='T0', sell_token='T1'),
     random_order_list(min_size=1, max_size=4, buy_token='T1', sell_token='T0')
@@ -34,26 +43,82 @@ def test_find_best_xrate(b_orders, s_orders):
     """Test if find_best_xrate returns the optimal xrate."""
 
     # Skip cases when there is no possible matching:
-    b_order_xrates = [b_o.max_xrate * (1 - fee.value) for b_o in b_orders]
-    s_order_xrates = [1 / (s_o.max_xrate * (1 - fee.value)) for s_o in s_orders]
-
-    xrate_ub = max(b_order_xrates)
-    xrate_lb = min(s_order_xrates)
-
+    xrate_lb, xrate_ub = xrate_bounds(b_orders, s_orders)
     assume(xrate_lb <= xrate_ub)
 
     # Disable side constraints.
-    Config.MAX_NR_EXEC_ORDERS = len(b_orders) + len(s_orders)
-    Config.MIN_TRADABLE_AMOUNT = 0
+    config = Config.snapshot(
+        MAX_NR_EXEC_ORDERS=len(b_orders) + len(s_orders),
+        MIN_TRADABLE_AMOUNT=0
+    )
 
-    optimal_xrate, _ = find_best_xrate(b_orders, s_orders, fee)
-    optimal_objective = compute_objective(b_orders, s_orders, optimal_xrate, fee)
+    optimal_xrate, _ = find_best_xrate(b_orders, s_orders, fee, config=config)
+    optimal_objective = compute_objective(
+        b_orders, s_orders, optimal_xrate, fee, config
+    )
 
     # brute-force algorithm to try to find a better xrate
     nr_steps = 100
     step = (xrate_ub - xrate_lb) / nr_steps
     xrate = xrate_lb
     while xrate <= xrate_ub:
-        objective = compute_objective(b_orders, s_orders, xrate, fee)
+        objective = compute_objective(b_orders, s_orders, xrate, fee, config)
         assert objective <= optimal_objective
         xrate += step
+
+
+class CheckCountingDeadline(Deadline):
+    """Deadline expiring at its (nr_checks + 1)-th check."""
+
+    def __init__(self, nr_checks):
+        super().__init__()
+        self.nr_checks = nr_checks
+
+    def expired(self):
+        if self.nr_checks == 0:
+            self.stop()
+        self.nr_checks -= 1
+        return super().expired()
+
+
+@given(
+    random_order_list(min_size=1, max_size=4, buy_token='T0', sell_token='T1'),
+    random_order_list(min_size=1, max_size=4, buy_token='T1', sell_token='T0')
+)
+@examples(find_best_xrate_examples)
+@settings(deadline=None)
+def test_deadline_keeps_best_xrate_so_far(b_orders, s_orders):
+    """Test that find_best_xrate returns the best xrate of the intervals
+    visited before the deadline expired."""
+    xrate_lb, xrate_ub = xrate_bounds(b_orders, s_orders)
+    assume(xrate_lb <= xrate_ub)
+
+    config = Config.snapshot(
+        MAX_NR_EXEC_ORDERS=len(b_orders) + len(s_orders),
+        MIN_TRADABLE_AMOUNT=0
+    )
+
+    context = NULL_CONTEXT._replace(metrics=SolveMetrics())
+    _, optimal_objective = find_best_xrate(
+        b_orders, s_orders, fee, config=config, context=context
+    )
+    nr_intervals = context.metrics.to_dict()['counters'].get('intervals', 0)
+
+    # The best objective found only improves with the intervals visited.
+    best_objectives = []
+    for nr_visited_intervals in range(nr_intervals + 1):
+        deadline = CheckCountingDeadline(nr_visited_intervals)
+        context = NULL_CONTEXT._replace(deadline=deadline, metrics=SolveMetrics())
+        _, objective = find_best_xrate(
+            b_orders, s_orders, fee, config=config, context=context
+        )
+        assert context.metrics.to_dict()['counters'].get('intervals', 0) == \
+            nr_visited_intervals
+        assert deadline.reached == (nr_visited_intervals < nr_intervals)
+        best_objectives.append(objective)
+
+    assert best_objectives[-1] == optimal_objective
+    assert all(
+        objective is None or later_objective >= objective
+        for objective, later_objective in zip(best_objectives, best_objectives[1:])
+    )
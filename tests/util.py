@@ -0,0 +1,7 @@
+import json
+
+
+def read_json(filename):
+    """Read a json file (e.g. a solution written by `gp_match`)."""
+    with open(filename, 'r') as fd:
+        return json.load(fd)